@@ -0,0 +1,174 @@
+"""
+Benchmark of the WISE propagator on the source/pm1a/kb/detector beamline of test_manfredda_to_wofry.py,
+sweeping the number of samples and of pools. Every case runs in a separate process: wall time, peak RSS and
+throughput are appended to a JSON history file.
+
+    python -m wofrywise2._test.benchmark_wise_propagator --n-samples 1000 2000 4000 --n-pools 1 2 --history history.json
+
+--standin runs on the pure numpy stand-in of wiselib2 (used anyway when wiselib2 is not installed).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+def build_beamline(n_samples):
+    from numpy import deg2rad
+
+    import wiselib2.Fundation as Fundation
+    import wiselib2.Optics as Optics
+    import wiselib2.FermiSource as Fermi
+
+    from wofrywise2.beamline.wise_beamline_element import WiseBeamlineElement
+    from wofrywise2.beamline.light_sources.wise_gaussian_source import WiseGaussianSource
+    from wofrywise2.beamline.optical_elements.wise_plane_mirror import WisePlaneMirror
+    from wofrywise2.beamline.optical_elements.wise_elliptic_mirror import WiseEllipticMirror
+    from wofrywise2.beamline.optical_elements.wise_detector import WiseDetector
+    from wofrywise2.propagator.propagator1D.wise_propagator import WisePropagationElements
+
+    Lambda = 32e-9
+
+    s = WiseGaussianSource(name='source',
+                           source_gaussian=Optics.SourceGaussian(Lambda, Fermi.Waist0E(Lambda)),
+                           position_directives=Fundation.PositioningDirectives(ReferTo='absolute', XYCentre=[0, 0], Angle=deg2rad(0)))
+
+    pm1a = WisePlaneMirror(name='pm1a',
+                           plane_mirror=Optics.MirrorPlane(L=0.4, AngleGrazing=deg2rad(2.5)),
+                           position_directives=Fundation.PositioningDirectives(ReferTo='upstream', PlaceWhat='centre', PlaceWhere='centre', Distance=48090.1))
+
+    kb = WiseEllipticMirror(name='kb',
+                            elliptic_mirror=Optics.MirrorElliptic(f1=98, f2=1.2, L=0.4, Alpha=deg2rad(2.5)),
+                            position_directives=Fundation.PositioningDirectives(ReferTo='source', PlaceWhat='upstream focus', PlaceWhere='centre'))
+
+    d = WiseDetector(name='detector',
+                     detector=Optics.Detector(L=400e-6, AngleGrazing=deg2rad(90)),
+                     position_directives=Fundation.PositioningDirectives(ReferTo='upstream', PlaceWhat='centre', PlaceWhere='downstream focus', Distance=0))
+
+    wise_propagation_elements = WisePropagationElements()
+
+    for optical_element in [s, pm1a, kb, d]:
+        if not optical_element.wise_optical_element.IsSource:
+            optical_element.wise_optical_element.ComputationSettings.UseCustomSampling = True
+            optical_element.wise_optical_element.ComputationSettings.NSamples = n_samples
+
+        wise_propagation_elements.add_beamline_element(WiseBeamlineElement(optical_element=optical_element))
+
+    return wise_propagation_elements
+
+def get_peak_rss():
+    try:
+        import resource
+    except ImportError: # not available on Windows
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    return peak_rss if sys.platform == "darwin" else peak_rss*1024
+
+def run_case(n_samples, n_pools, repeat=3):
+    import numpy
+
+    from wofry.propagator.propagator import PropagationParameters, PropagationManager
+
+    from wofrywise2.propagator.wavefront1D.wise_wavefront import WiseWavefront
+    from wofrywise2.propagator.propagator1D.wise_propagator import WisePropagator, WISE_APPLICATION
+
+    PropagationManager.Instance().set_propagation_mode(WISE_APPLICATION, 0)
+
+    wise_propagation_elements = build_beamline(n_samples)
+
+    parameters = PropagationParameters(wavefront=WiseWavefront(wise_computation_results=None), propagation_elements=wise_propagation_elements)
+    parameters.set_additional_parameters("NPools", n_pools)
+    parameters.set_additional_parameters("single_propagation", False)
+    parameters.set_additional_parameters("use_cache", False)
+
+    propagator = WisePropagator()
+
+    wall_times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        wavefront = propagator.do_propagation(parameters)
+        wall_times.append(time.perf_counter() - start_time)
+
+    # number of (source, target) couples of the Huygens integrals
+    integral_terms = 0
+    item_list = wise_propagation_elements.get_wise_propagation_elements().ItemList
+    for wise_optical_element in item_list[1:]:
+        n_upstream = numpy.size(wise_optical_element.Parent.ComputationResults.Field) if not wise_optical_element.Parent.IsSource else 1
+        integral_terms += n_upstream*numpy.size(wise_optical_element.ComputationResults.Field)
+
+    wall_time = min(wall_times)
+
+    return {"n_samples" : n_samples,
+            "n_pools" : n_pools,
+            "repeat" : repeat,
+            "wall_time" : wall_time,
+            "wall_times" : wall_times,
+            "peak_rss" : get_peak_rss(),
+            "samples_per_second" : (len(item_list) - 1)*n_samples/wall_time,
+            "integral_terms_per_second" : integral_terms/wall_time,
+            "detector_intensity" : float(numpy.sum(numpy.abs(wavefront.wise_computation_result.Field)**2))}
+
+def get_environment(standin):
+    import numpy
+
+    return {"python" : platform.python_version(),
+            "numpy" : numpy.__version__,
+            "platform" : platform.platform(),
+            "processor" : platform.processor(),
+            "cpu_count" : os.cpu_count(),
+            "wiselib2" : "stand-in" if standin else "installed"}
+
+def append_history(history_file, run):
+    history = []
+    if os.path.exists(history_file):
+        with open(history_file, "r") as file: history = json.load(file)
+
+    history.append(run)
+
+    with open(history_file, "w") as file: json.dump(history, file, indent=2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WISE propagator benchmark")
+    parser.add_argument("--n-samples", type=int, nargs="+", default=[1000, 2000, 4000])
+    parser.add_argument("--n-pools", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--history", default="wise_benchmark_history.json")
+    parser.add_argument("--tag", default="")
+    parser.add_argument("--standin", action="store_true", help="use the numpy stand-in of wiselib2")
+    parser.add_argument("--case", type=int, nargs=2, help=argparse.SUPPRESS)
+    arguments = parser.parse_args(argv)
+
+    from wofrywise2._test import wiselib2_standin
+    standin = wiselib2_standin.install(force=arguments.standin)
+
+    if not arguments.case is None:
+        result = run_case(arguments.case[0], arguments.case[1], arguments.repeat)
+
+        # wiselib2 writes on stdout as well: the result is the last line
+        sys.stdout.write("\n" + json.dumps(result) + "\n")
+        return
+
+    cases = []
+    for n_samples in arguments.n_samples:
+        for n_pools in arguments.n_pools:
+            command = [sys.executable, "-m", "wofrywise2._test.benchmark_wise_propagator",
+                       "--case", str(n_samples), str(n_pools), "--repeat", str(arguments.repeat)]
+            if standin: command.append("--standin")
+
+            output = subprocess.run(command, stdout=subprocess.PIPE, check=True, universal_newlines=True).stdout
+            cases.append(json.loads(output.strip().splitlines()[-1]))
+
+            print("N = %6d  NPools = %2d  wall time = %8.3f s  peak RSS = %8.1f MB  %10.3g terms/s" %
+                  (n_samples, n_pools, cases[-1]["wall_time"], (cases[-1]["peak_rss"] or 0)/2**20, cases[-1]["integral_terms_per_second"]))
+
+    append_history(arguments.history, {"timestamp" : time.strftime("%Y-%m-%dT%H:%M:%S"),
+                                       "tag" : arguments.tag,
+                                       "environment" : get_environment(standin),
+                                       "cases" : cases})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Helpers of the tests that propagate the source/pm1a/kb/detector beamline of benchmark_wise_propagator.py on the
+numpy stand-in of wiselib2 (installed on import, also when wiselib2 is installed: the results are deterministic
+and fast to compute).
+"""
+from wofrywise2._test import wiselib2_standin
+
+wiselib2_standin.install(force=True)
+
+from wofry.propagator.propagator import PropagationParameters, PropagationManager
+
+from wofrywise2._test.benchmark_wise_propagator import build_beamline
+from wofrywise2.propagator.wavefront1D.wise_wavefront import WiseWavefront
+from wofrywise2.propagator.propagator1D.wise_propagator import WisePropagator, WISE_APPLICATION
+
+N_SAMPLES = 200
+
+def get_parameters(wise_propagation_elements=None, wavefront=None, **additional_parameters):
+    PropagationManager.Instance().set_propagation_mode(WISE_APPLICATION, 0) # STEP_BY_STEP
+
+    if wise_propagation_elements is None: wise_propagation_elements = build_beamline(N_SAMPLES)
+
+    if wavefront is None: wavefront = WiseWavefront(wise_computation_results=None)
+
+    parameters = PropagationParameters(wavefront=wavefront, propagation_elements=wise_propagation_elements)
+    parameters.set_additional_parameters("NPools", 1)
+    parameters.set_additional_parameters("single_propagation", False)
+
+    for name, value in additional_parameters.items(): parameters.set_additional_parameters(name, value)
+
+    return parameters
+
+def get_fields(wise_propagation_elements):
+    return dict([(wise_optical_element.Name, wise_optical_element.ComputationResults.Field)
+                 for wise_optical_element in wise_propagation_elements.get_wise_propagation_elements().ItemList
+                 if not wise_optical_element.IsSource])
+
+def propagate(parameters, propagator=None):
+    return (WisePropagator() if propagator is None else propagator).do_propagation(parameters)
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import unittest
+
+import numpy
+
+from wofrywise2._test.standin_propagation import build_beamline, get_fields, get_parameters, propagate, N_SAMPLES
+
+from wofry.propagator.propagator import PropagationManager, PropagationMode
+from wofry.propagator.wavefront1D.generic_wavefront import GenericWavefront1D
+
+from wofrywise2.propagator.propagator1D.wise_backends import NumpyBackend
+from wofrywise2.propagator.propagator1D.wise_huygens import BYTES_PER_COUPLE
+from wofrywise2.propagator.propagator1D.wise_propagator import WisePropagator, WISE_APPLICATION
+
+N_BLOCKS = 10 # per element
+
+def propagate_async(parameters, progress_callback=None):
+    return asyncio.run(WisePropagator().do_propagation_async(parameters, progress_callback=progress_callback))
+
+def get_blocked_parameters(wise_propagation_elements=None):
+    return get_parameters(wise_propagation_elements, use_cache=True, backend="numpy", max_memory=BYTES_PER_COUPLE*N_SAMPLES*N_SAMPLES//N_BLOCKS)
+
+class GatedBackend(NumpyBackend):
+    # the computation waits for the gate after the first block of the detector
+
+    def __init__(self, gate):
+        super(GatedBackend, self).__init__()
+        self.gate = gate
+
+    def set_block_callback(self, block_callback=None):
+        def gated_block_callback(name, done, total):
+            block_callback(name, done, total)
+
+            if name == "detector": self.gate.wait(10.0)
+
+        super(GatedBackend, self).set_block_callback(None if block_callback is None else gated_block_callback)
+
+class AsyncPropagationTest(unittest.TestCase):
+
+    def test_same_result_of_do_propagation(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        propagate(get_parameters(wise_propagation_elements, use_cache=False))
+        expected_fields = get_fields(wise_propagation_elements)
+
+        # the wiselib2 kernel reports the elements only
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        with self.assertWarnsRegex(UserWarning, "The wiselib2 backend ignores the block callback"):
+            result = propagate_async(get_parameters(wise_propagation_elements, use_cache=False, profile=True))
+
+        for name, field in get_fields(wise_propagation_elements).items(): numpy.testing.assert_array_equal(field, expected_fields[name])
+        numpy.testing.assert_array_equal(result.wise_computation_result.Field, expected_fields["detector"])
+
+        profile = result.get_propagation_profile()
+        self.assertFalse(profile is None)
+        self.assertEqual([record["name"] for record in profile.get_records()], ["pm1a", "kb", "detector"])
+
+    def test_deferred_plan(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        wavefront = GenericWavefront1D.initialize_wavefront_from_range(-1e-3, 1e-3, N_SAMPLES)
+
+        try:
+            # the whole beamline mode registers the output in the deferred plan, filled by the next computing propagation
+            parameters = get_parameters(wise_propagation_elements, wavefront=wavefront, use_cache=False, is_full_propagator=False)
+            PropagationManager.Instance().set_propagation_mode(WISE_APPLICATION, PropagationMode.WHOLE_BEAMLINE)
+
+            deferred_wavefront = WisePropagator().do_propagation(parameters)
+        finally:
+            PropagationManager.Instance().set_propagation_mode(WISE_APPLICATION, PropagationMode.STEP_BY_STEP)
+
+        self.assertFalse(wise_propagation_elements.get_deferred_plan().is_empty())
+
+        with self.assertWarns(UserWarning): result = propagate_async(get_parameters(wise_propagation_elements, wavefront=wavefront, use_cache=False))
+
+        self.assertTrue(wise_propagation_elements.get_deferred_plan().is_empty())
+        numpy.testing.assert_array_equal(deferred_wavefront.get_complex_amplitude(), result.get_complex_amplitude())
+
+    def test_progress(self):
+        events = []
+        propagate_async(get_blocked_parameters(), progress_callback=events.append)
+
+        element_events = [event for event in events if event["event"] == "element"]
+        self.assertEqual([event["element"] for event in element_events], ["pm1a", "kb", "detector"])
+        self.assertEqual([event["done"]/event["total"] for event in element_events], [1/3, 2/3, 1.0])
+
+        # the blocks of each element precede its element event, with increasing fractions up to 1
+        for name in ["kb", "detector"]:
+            indexes = [index for index, event in enumerate(events) if event["element"] == name]
+            block_events = [events[index] for index in indexes[:-1]]
+
+            self.assertEqual(events[indexes[-1]]["event"], "element")
+            self.assertEqual(len(block_events), N_BLOCKS)
+            self.assertEqual([event["event"] for event in block_events], ["block"]*N_BLOCKS)
+
+            fractions = [event["done"]/event["total"] for event in block_events]
+            self.assertTrue(all(numpy.diff(fractions) > 0))
+            self.assertEqual(fractions[-1], 1.0)
+
+    def test_cancellation(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        parameters = get_blocked_parameters(wise_propagation_elements)
+
+        gate = threading.Event()
+        events = []
+        parameters.set_additional_parameters("backend", GatedBackend(gate))
+
+        async def cancel_at_the_detector():
+            def progress_callback(progress):
+                events.append(progress)
+
+                if progress["event"] == "block" and progress["element"] == "detector" and not gate.is_set():
+                    task.cancel()
+                    # scheduled after the cancellation of the task, that stops the computation
+                    asyncio.get_running_loop().call_soon(gate.set)
+
+            task = asyncio.ensure_future(WisePropagator().do_propagation_async(parameters, progress_callback=progress_callback))
+
+            await task
+
+        self.assertRaises(asyncio.CancelledError, asyncio.run, cancel_at_the_detector())
+        self.assertEqual([(event["event"], event["element"]) for event in events if event["element"] == "detector"], [("block", "detector")])
+
+        # nothing of the interrupted propagation is cached: the detector is computed again
+        propagate(get_blocked_parameters(wise_propagation_elements))
+
+        self.assertIn("detector", wise_propagation_elements.get_propagation_stats()["computed_elements"])
+
+        expected_propagation_elements = build_beamline(N_SAMPLES)
+        propagate(get_blocked_parameters(expected_propagation_elements))
+
+        for name, field in get_fields(expected_propagation_elements).items():
+            numpy.testing.assert_array_equal(get_fields(wise_propagation_elements)[name], field, name)
+
+if __name__ == "__main__":
+    unittest.main()
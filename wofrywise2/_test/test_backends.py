@@ -0,0 +1,85 @@
+import json
+import subprocess
+import sys
+import unittest
+
+import numpy
+
+from wofrywise2._test.standin_propagation import build_beamline, get_fields, get_parameters, propagate
+
+# the backends are compared on the KB beamline of benchmark_wise_propagator.py with the installed wiselib2, in a
+# fresh interpreter (the other tests replace it with the stand-in)
+N_SAMPLES = 300
+TOLERANCE = 1e-9 # relative to the largest value of the wiselib2 field
+
+COMPARISON_SCRIPT = """
+import json, sys
+
+try:
+    import wiselib2
+except ImportError:
+    sys.stdout.write("\\n" + json.dumps(None))
+    sys.exit(0)
+
+import numpy
+
+from wofry.propagator.propagator import PropagationParameters, PropagationManager
+
+from wofrywise2._test.benchmark_wise_propagator import build_beamline
+from wofrywise2.propagator.wavefront1D.wise_wavefront import WiseWavefront
+from wofrywise2.propagator.propagator1D.wise_propagator import WisePropagator, WISE_APPLICATION
+
+PropagationManager.Instance().set_propagation_mode(WISE_APPLICATION, 0)
+
+fields = {}
+for backend in ["wiselib2", "numpy"]:
+    wise_propagation_elements = build_beamline(%d)
+
+    parameters = PropagationParameters(wavefront=WiseWavefront(wise_computation_results=None), propagation_elements=wise_propagation_elements)
+    parameters.set_additional_parameters("NPools", 1)
+    parameters.set_additional_parameters("single_propagation", False)
+    parameters.set_additional_parameters("use_cache", False)
+    parameters.set_additional_parameters("backend", backend)
+
+    WisePropagator().do_propagation(parameters)
+
+    fields[backend] = dict([(oe.Name, oe.ComputationResults.Field) for oe in wise_propagation_elements.get_wise_propagation_elements().ItemList if not oe.IsSource])
+
+# wiselib2 prints on the standard output: the result is the last line
+sys.stdout.write("\\n" + json.dumps(dict([(name, float(numpy.max(numpy.abs(fields["numpy"][name] - field))/numpy.max(numpy.abs(field))))
+                                          for name, field in fields["wiselib2"].items()])))
+"""
+
+def run_comparison():
+    output = subprocess.run([sys.executable, "-c", COMPARISON_SCRIPT % N_SAMPLES],
+                            stdout=subprocess.PIPE, check=True, universal_newlines=True).stdout
+
+    return json.loads(output.strip().splitlines()[-1])
+
+class BackendsTest(unittest.TestCase):
+
+    def test_numpy_backend_against_wiselib2(self):
+        relative_differences = run_comparison()
+
+        if relative_differences is None: self.skipTest("wiselib2 is not installed")
+
+        self.assertEqual(sorted(relative_differences.keys()), ["detector", "kb", "pm1a"])
+        for name, relative_difference in relative_differences.items(): self.assertLess(relative_difference, TOLERANCE, name)
+
+class StandinBackendsTest(unittest.TestCase):
+
+    def test_numpy_backend_against_the_standin(self):
+        # the stand-in integrates with its own direct kernel, one target point at a time
+        fields = {}
+        for backend in ["wiselib2", "numpy"]:
+            wise_propagation_elements = build_beamline(N_SAMPLES)
+            propagate(get_parameters(wise_propagation_elements, use_cache=False, backend=backend, free_space_fast_path=False))
+
+            fields[backend] = get_fields(wise_propagation_elements)
+
+        self.assertEqual(sorted(fields["numpy"].keys()), ["detector", "kb", "pm1a"])
+        for name, field in fields["wiselib2"].items():
+            self.assertLess(numpy.max(numpy.abs(fields["numpy"][name] - field))/numpy.max(numpy.abs(field)), TOLERANCE, name)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+import numpy
+
+from wofrywise2._test.standin_propagation import build_beamline, get_fields, get_parameters, propagate, N_SAMPLES
+
+from wofrywise2.propagator.propagator1D.wise_propagator import WisePropagator
+
+N_WORKERS = 2
+
+# detector defocus and pm1a distance of each variant: the first four share source -> kb, the last two source -> pm1a
+VARIANTS = [(0.0, None), (1e-3, None), (2e-3, None), (-1e-3, None), (0.0, 48090.0), (1e-3, 48090.0)]
+
+def get_variants(use_cache=True):
+    list_of_parameters = []
+    for defocus, distance in VARIANTS:
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+
+        if not distance is None: wise_propagation_elements.get_wise_propagation_element(1).PositioningDirectives.Distance = distance
+        wise_propagation_elements.get_wise_propagation_element(3).PositioningDirectives.Distance = defocus
+
+        list_of_parameters.append(get_parameters(wise_propagation_elements, use_cache=use_cache))
+
+    return list_of_parameters
+
+class BatchPropagationTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.expected_fields = []
+        for parameters in get_variants(use_cache=False):
+            propagate(parameters)
+            cls.expected_fields.append(get_fields(parameters.get_PropagationElements()))
+
+    def setUp(self):
+        self.propagator = WisePropagator()
+
+    def tearDown(self):
+        self.propagator.get_worker_pool(N_WORKERS).shutdown()
+
+    def check_batch(self, list_of_parameters, results):
+        self.assertEqual(len(results), len(VARIANTS))
+
+        for parameters, result, expected_fields in zip(list_of_parameters, results, self.expected_fields):
+            fields = get_fields(parameters.get_PropagationElements())
+
+            # results in input order, also set on the beamline of each variant
+            numpy.testing.assert_array_equal(result.wise_computation_result.Field, expected_fields["detector"])
+            for name, field in expected_fields.items(): numpy.testing.assert_array_equal(fields[name], field, name)
+
+    def test_serial(self):
+        list_of_parameters = get_variants()
+
+        self.check_batch(list_of_parameters, self.propagator.do_batch_propagation(list_of_parameters, max_workers=1))
+
+    def test_worker_processes(self):
+        list_of_parameters = get_variants()
+
+        self.check_batch(list_of_parameters, self.propagator.do_batch_propagation(list_of_parameters, max_workers=N_WORKERS))
+
+    def test_shared_prefixes(self):
+        list_of_parameters = get_variants()
+
+        self.propagator.do_batch_propagation(list_of_parameters, max_workers=1)
+
+        # the shared sections are computed once and restored by each variant
+        for parameters in list_of_parameters:
+            propagation_stats = parameters.get_PropagationElements().get_propagation_stats()
+
+            self.assertEqual(propagation_stats["restored_elements"], ["source", "pm1a", "kb"])
+            self.assertEqual(propagation_stats["computed_elements"], ["detector"])
+            self.assertTrue(propagation_stats["positions_refreshed"])
+
+if __name__ == "__main__":
+    unittest.main()
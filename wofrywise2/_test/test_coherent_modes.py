@@ -0,0 +1,56 @@
+import unittest
+
+import numpy
+
+from wofrywise2._test.standin_propagation import build_beamline, get_parameters, propagate, N_SAMPLES
+
+from wofrywise2.propagator.propagator1D.wise_coherent_modes import WiseGaussianSchellModes
+from wofrywise2.propagator.propagator1D.wise_field_stack import compute_field_stack
+from wofrywise2.propagator.propagator1D.wise_propagator import WisePropagator
+
+N_MODES = 6
+
+def get_waist():
+    return build_beamline(N_SAMPLES).get_wise_propagation_element(0).CoreOptics.Waist0
+
+class CoherentModesTest(unittest.TestCase):
+
+    def test_fully_coherent_source(self):
+        # a single mode, of the waist of the Gaussian source
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        field = propagate(get_parameters(wise_propagation_elements, use_cache=False)).wise_computation_result.Field
+
+        coherent_modes = WiseGaussianSchellModes(0.5*get_waist(), 1e6*get_waist(), n_modes=1)
+        result = WisePropagator().do_coherent_mode_propagation(get_parameters(build_beamline(N_SAMPLES)), coherent_modes)
+
+        self.assertEqual(result.get_n_modes(), 1)
+        numpy.testing.assert_allclose(result.get_weights(), [1.0], rtol=1e-9)
+        numpy.testing.assert_allclose(result.get_intensity(), numpy.abs(field)**2, rtol=0, atol=1e-9*numpy.max(numpy.abs(field)**2))
+        numpy.testing.assert_array_equal(result.get_abscissas(), wise_propagation_elements.get_wise_propagation_element(-1).ComputationResults.S)
+
+    def test_partially_coherent_source(self):
+        coherent_modes = WiseGaussianSchellModes(0.5*get_waist(), get_waist(), n_modes=N_MODES)
+
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        result = WisePropagator().do_coherent_mode_propagation(get_parameters(wise_propagation_elements), coherent_modes, batch_size=4)
+
+        # the modes on the detector, one per row
+        beamline = wise_propagation_elements.get_wise_propagation_elements()
+        field_stack = compute_field_stack(beamline,
+                                          wise_propagation_elements.get_wise_propagation_element(-1),
+                                          numpy.full(N_MODES, result.get_wavelength()),
+                                          source_fields=lambda source, x, y, wavelengths: coherent_modes.evaluate(source, x, y, numpy.arange(N_MODES)))
+
+        self.assertEqual(field_stack.get_fields().shape, (N_MODES, N_SAMPLES))
+        self.assertEqual(result.get_intensity().shape, (N_SAMPLES,))
+
+        intensity = numpy.sum(coherent_modes.get_weights()[:, numpy.newaxis]*numpy.abs(field_stack.get_fields())**2, axis=0)
+        numpy.testing.assert_allclose(result.get_intensity(), intensity, rtol=1e-12, atol=1e-12*numpy.max(intensity))
+
+        # decreasing weights, the first mode carries most of the power
+        weights = result.get_weights()
+        self.assertTrue(numpy.all(numpy.diff(weights) < 0))
+        self.assertGreater(numpy.sum(weights[0]*numpy.abs(field_stack.get_fields()[0])**2), 0.5*numpy.sum(intensity))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+import numpy
+
+from wofrywise2._test.standin_propagation import build_beamline, get_parameters, get_fields, propagate, N_SAMPLES
+
+from wofrywise2.propagator.propagator1D.wise_compiled_beamline import WiseCompiledBeamline
+from wofrywise2.propagator.propagator1D.wise_propagator import WisePropagationElements
+
+NAMES = ["source", "pm1a", "kb", "detector"]
+
+class CompiledBeamlineTest(unittest.TestCase):
+
+    def test_tree(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        compiled_beamline = wise_propagation_elements.compile()
+
+        self.assertIs(wise_propagation_elements.get_compiled_beamline(), compiled_beamline)
+        self.assertEqual(compiled_beamline.get_names(), NAMES)
+        self.assertEqual([oe.Name for oe in wise_propagation_elements.get_wise_propagation_elements().ItemList], NAMES)
+        self.assertEqual(wise_propagation_elements.get_propagation_elements_number(), len(NAMES))
+        self.assertIs(compiled_beamline.get_parent("kb"), compiled_beamline.get_wise_optical_element("pm1a"))
+        self.assertIs(compiled_beamline.get_child("kb"), compiled_beamline.get_wise_optical_element(-1))
+
+    def test_propagation(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        propagate(get_parameters(wise_propagation_elements))
+        reference_fields = get_fields(wise_propagation_elements)
+
+        compiled_propagation_elements = WisePropagationElements()
+        compiled_propagation_elements.set_compiled_beamline(WiseCompiledBeamline(build_beamline(N_SAMPLES).get_propagation_elements()))
+        propagate(get_parameters(compiled_propagation_elements))
+
+        for name, field in get_fields(compiled_propagation_elements).items():
+            numpy.testing.assert_array_equal(field, reference_fields[name])
+
+    def test_recompilation_replaces_the_elements(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        wise_propagation_elements.compile()
+        wise_propagation_elements.set_compiled_beamline(WiseCompiledBeamline(wise_propagation_elements.get_propagation_elements()))
+
+        self.assertEqual(wise_propagation_elements.get_propagation_elements_number(), len(NAMES))
+        self.assertEqual(len(wise_propagation_elements.get_propagation_elements_parameters()), len(NAMES))
+
+        propagate(get_parameters(wise_propagation_elements))
+
+    def test_structure_change_drops_the_compiled_beamline(self):
+        beamline_elements = build_beamline(N_SAMPLES).get_propagation_elements()
+
+        wise_propagation_elements = WisePropagationElements()
+        wise_propagation_elements.add_beamline_elements(beamline_elements[:-1])
+        wise_propagation_elements.compile()
+
+        self.assertEqual(wise_propagation_elements.get_compiled_beamline().get_names(), NAMES[:-1])
+
+        wise_propagation_elements.add_beamline_element(beamline_elements[-1])
+
+        self.assertIsNone(wise_propagation_elements.get_compiled_beamline())
+        self.assertEqual([oe.Name for oe in wise_propagation_elements.get_wise_propagation_elements().ItemList], NAMES)
+
+    def test_hash_follows_the_edits(self):
+        compiled_beamline = build_beamline(N_SAMPLES).compile()
+        other_compiled_beamline = build_beamline(N_SAMPLES).compile()
+
+        hash = compiled_beamline.get_hash()
+        element_hash = compiled_beamline.get_element_hash("kb")
+
+        self.assertEqual(compiled_beamline, other_compiled_beamline)
+
+        compiled_beamline.get_wise_optical_element("kb").CoreOptics.L = 0.3
+
+        self.assertNotEqual(compiled_beamline.get_hash(), hash)
+        self.assertNotEqual(compiled_beamline.get_element_hash("kb"), element_hash)
+        self.assertEqual(compiled_beamline.get_element_hash("pm1a"), other_compiled_beamline.get_element_hash("pm1a"))
+        self.assertNotEqual(compiled_beamline, other_compiled_beamline)
+
+    def test_duplicate_names(self):
+        beamline_elements = build_beamline(N_SAMPLES).get_propagation_elements()
+
+        self.assertRaises(ValueError, WiseCompiledBeamline, beamline_elements + [beamline_elements[1]])
+
+if __name__ == "__main__":
+    unittest.main()
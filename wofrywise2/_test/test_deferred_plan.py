@@ -0,0 +1,78 @@
+import unittest
+
+import numpy
+
+from wofrywise2._test.standin_propagation import build_beamline, get_fields, get_parameters, propagate, N_SAMPLES
+
+from wofry.propagator.propagator import PropagationManager, PropagationMode
+from wofry.propagator.wavefront1D.generic_wavefront import GenericWavefront1D
+
+from wofrywise2.propagator.wavefront1D.wise_wavefront import WiseWavefront
+from wofrywise2.propagator.propagator1D.wise_propagator import WisePropagator, WisePropagationElements, WISE_APPLICATION
+
+class DeferredPlanTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        propagate(get_parameters(wise_propagation_elements, use_cache=False))
+
+        cls.expected_fields = get_fields(wise_propagation_elements)
+
+    def propagate_whole_beamline(self, wise_propagation_elements, wavefront, is_full_propagator=False):
+        # as the widgets of a workflow, each one adding its element to the beamline
+        parameters = get_parameters(wise_propagation_elements, wavefront=wavefront, is_full_propagator=is_full_propagator)
+
+        try:
+            PropagationManager.Instance().set_propagation_mode(WISE_APPLICATION, PropagationMode.WHOLE_BEAMLINE)
+
+            return WisePropagator().do_propagation(parameters)
+        finally:
+            PropagationManager.Instance().set_propagation_mode(WISE_APPLICATION, PropagationMode.STEP_BY_STEP)
+
+    def check_workflow(self, wavefront, get_field):
+        beamline_elements = build_beamline(N_SAMPLES).get_propagation_elements()
+
+        wise_propagation_elements = WisePropagationElements()
+        for beamline_element in beamline_elements[:2]: wise_propagation_elements.add_beamline_element(beamline_element)
+
+        pm1a_wavefront = self.propagate_whole_beamline(wise_propagation_elements, wavefront)
+        wise_propagation_elements.add_beamline_element(beamline_elements[2])
+        kb_wavefront = self.propagate_whole_beamline(wise_propagation_elements, pm1a_wavefront)
+
+        # nothing is computed until the last widget
+        self.assertEqual(wise_propagation_elements.get_deferred_plan().get_registered_elements(), ["pm1a", "kb"])
+        self.assertIsNone(wise_propagation_elements.get_wise_propagation_element(1).ComputationResults.Field)
+
+        wise_propagation_elements.add_beamline_element(beamline_elements[3])
+        detector_wavefront = self.propagate_whole_beamline(wise_propagation_elements, kb_wavefront, is_full_propagator=True)
+
+        # a single pass over the beamline fills the registered wavefronts
+        self.assertTrue(wise_propagation_elements.get_deferred_plan().is_empty())
+        self.assertEqual(wise_propagation_elements.get_propagation_stats()["computed_elements"], ["pm1a", "kb", "detector"])
+
+        for name, output_wavefront in [("pm1a", pm1a_wavefront), ("kb", kb_wavefront), ("detector", detector_wavefront)]:
+            numpy.testing.assert_array_equal(get_field(output_wavefront), self.expected_fields[name], name)
+
+    def test_wise_wavefronts(self):
+        self.check_workflow(WiseWavefront(wise_computation_results=None), lambda wavefront: wavefront.wise_computation_result.Field)
+
+    def test_generic_wavefronts(self):
+        self.check_workflow(GenericWavefront1D.initialize_wavefront_from_range(-1e-3, 1e-3, N_SAMPLES, 32e-9), lambda wavefront: wavefront.get_complex_amplitude())
+
+    def test_explicit_trigger(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+
+        wavefront = self.propagate_whole_beamline(wise_propagation_elements, WiseWavefront(wise_computation_results=None))
+
+        filled = WisePropagator().do_deferred_propagation(get_parameters(wise_propagation_elements))
+
+        self.assertEqual(len(filled), 1)
+        self.assertIs(filled[0], wavefront)
+        numpy.testing.assert_array_equal(wavefront.wise_computation_result.Field, self.expected_fields["detector"])
+
+        # nothing left to compute
+        self.assertEqual(WisePropagator().do_deferred_propagation(get_parameters(wise_propagation_elements)), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from wofrywise2._test.standin_propagation import build_beamline, get_parameters, propagate, N_SAMPLES
+
+from wofrywise2.propagator.propagator1D.wise_ensemble import WiseRunningStatistics, apply_figure_errors, figure_errors_from_psd
+from wofrywise2.propagator.propagator1D.wise_propagator import WisePropagator
+
+N_REALIZATIONS = 30
+N_WORKERS = 2
+SEED = 7
+
+def get_realizations():
+    # figure errors of the kb, of a few nm
+    return figure_errors_from_psd("kb", lambda f: 1e-15/f**2, 0.4, 500, N_REALIZATIONS, seed=SEED)
+
+def load_realizations(file_names):
+    realizations = [numpy.load(file_name) for file_name in file_names]
+
+    return dict([(name, numpy.array([realization[name] for realization in realizations])) for name in ["abscissas", "intensity", "hew", "sigma"]])
+
+class EnsembleTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.output_directory = tempfile.mkdtemp()
+        cls.result = WisePropagator().do_ensemble_propagation(get_parameters(), get_realizations(), max_workers=1, output_directory=cls.output_directory)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.output_directory)
+
+    def test_output_directory(self):
+        file_names = self.result.get_realization_files()
+
+        self.assertEqual(self.result.get_n_realizations(), N_REALIZATIONS)
+        self.assertEqual(file_names, [os.path.join(self.output_directory, "realization_%06d.npz" % index) for index in range(N_REALIZATIONS)])
+
+        realizations = load_realizations(file_names)
+
+        self.assertEqual(realizations["intensity"].shape, (N_REALIZATIONS, N_SAMPLES))
+        for abscissas in realizations["abscissas"]: numpy.testing.assert_array_equal(abscissas, self.result.get_abscissas())
+        numpy.testing.assert_array_equal(realizations["hew"].min(), self.result.get_hew_statistics().get_minimum())
+        numpy.testing.assert_array_equal(realizations["sigma"].max(), self.result.get_sigma_statistics().get_maximum())
+
+    def test_realizations(self):
+        # the stored realizations are the ones of separate propagations with the same figure errors
+        intensities = load_realizations(self.result.get_realization_files())["intensity"]
+
+        for index, realization in enumerate(get_realizations()):
+            if index % 10 != 0: continue
+
+            wise_propagation_elements = build_beamline(N_SAMPLES)
+            apply_figure_errors(wise_propagation_elements, realization)
+            field = propagate(get_parameters(wise_propagation_elements)).wise_computation_result.Field
+
+            numpy.testing.assert_array_equal(intensities[index], numpy.abs(field)**2)
+
+        self.assertGreater(numpy.max(numpy.std(intensities, axis=0)), 1e-3*numpy.max(intensities))
+
+    def test_statistics(self):
+        intensities = load_realizations(self.result.get_realization_files())["intensity"]
+        intensity_statistics = self.result.get_intensity_statistics()
+
+        atol = 1e-12*numpy.max(intensities)
+        numpy.testing.assert_allclose(intensity_statistics.get_mean(), numpy.mean(intensities, axis=0), rtol=0, atol=atol)
+        numpy.testing.assert_allclose(intensity_statistics.get_std(), numpy.std(intensities, axis=0, ddof=1), rtol=0, atol=atol)
+        numpy.testing.assert_array_equal(intensity_statistics.get_minimum(), numpy.min(intensities, axis=0))
+        numpy.testing.assert_array_equal(intensity_statistics.get_maximum(), numpy.max(intensities, axis=0))
+
+        # P-square estimates, on few realizations
+        for percentile in intensity_statistics.get_percentiles():
+            numpy.testing.assert_allclose(intensity_statistics.get_percentile(percentile), numpy.percentile(intensities, percentile, axis=0),
+                                          rtol=0, atol=0.02*numpy.max(intensities))
+
+    def test_worker_processes(self):
+        propagator = WisePropagator()
+        self.addCleanup(propagator.get_worker_pool(N_WORKERS).shutdown)
+
+        result = propagator.do_ensemble_propagation(get_parameters(), get_realizations(), max_workers=N_WORKERS)
+
+        self.assertEqual(result.get_n_realizations(), N_REALIZATIONS)
+        self.assertEqual(result.get_realization_files(), [])
+        numpy.testing.assert_allclose(result.get_intensity_statistics().get_mean(), self.result.get_intensity_statistics().get_mean(),
+                                      rtol=0, atol=1e-12*numpy.max(self.result.get_intensity_statistics().get_maximum()))
+
+class RunningStatisticsTest(unittest.TestCase):
+
+    def test_percentiles(self):
+        values = numpy.random.RandomState(SEED).standard_normal((5000, 3))*[1.0, 2.0, 0.5] + [0.0, 1.0, -1.0]
+
+        running_statistics = WiseRunningStatistics(percentiles=(5, 50, 95))
+        for value in values: running_statistics.add(value)
+
+        numpy.testing.assert_allclose(running_statistics.get_mean(), numpy.mean(values, axis=0), rtol=0, atol=1e-12)
+        numpy.testing.assert_allclose(running_statistics.get_std(), numpy.std(values, axis=0, ddof=1), rtol=1e-12)
+
+        for percentile in (5, 50, 95):
+            numpy.testing.assert_allclose(running_statistics.get_percentile(percentile), numpy.percentile(values, percentile, axis=0), rtol=0, atol=0.05)
+
+        self.assertRaises(ValueError, running_statistics.get_percentile, 25)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+import numpy
+
+from wofrywise2._test.standin_propagation import build_beamline, get_parameters, propagate, N_SAMPLES
+
+from wofrywise2.propagator.propagator1D.wise_focus_sweep import compute_focus_sweep
+
+DETECTOR_SIZE = 400e-6 # as the detector of the beamline
+
+class FocusSweepTest(unittest.TestCase):
+
+    def test_figure_errors_of_the_focussing_element(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+
+        # figure error of the kb: phase profile along the mirror
+        kb = wise_propagation_elements.get_wise_propagation_element(2)
+        kb.CoreOptics.TransmissionFunction = lambda x, y: numpy.exp(1j*numpy.linspace(0, 20, numpy.size(x))**1.5)
+
+        detector_field = propagate(get_parameters(wise_propagation_elements, use_cache=False)).wise_computation_result.Field
+
+        focus_sweep = compute_focus_sweep(kb, [0.0, 1e-3], detector_size=DETECTOR_SIZE)
+
+        numpy.testing.assert_allclose(focus_sweep.get_fields()[0], detector_field, rtol=0, atol=1e-9*numpy.max(numpy.abs(detector_field)))
+        self.assertEqual(focus_sweep.get_fields().shape, (2, N_SAMPLES))
+        self.assertTrue(numpy.all(numpy.isfinite(focus_sweep.get_hew_list())))
+
+if __name__ == "__main__":
+    unittest.main()
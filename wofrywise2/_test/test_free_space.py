@@ -0,0 +1,70 @@
+import unittest
+
+import numpy
+
+from wofrywise2.propagator.propagator1D.wise_free_space import free_space_integral_1d, get_free_space_method, CONVOLUTION, FRESNEL, DIRECT
+from wofrywise2.propagator.propagator1D.wise_huygens import huygens_integral_1d
+
+WAVELENGTH = 32e-9
+N_SAMPLES = 1500
+TOLERANCE = 1e-6 # relative to the largest value of the direct integral
+
+def get_samples(x_centre, y_centre, length, n_samples, angle):
+    t = numpy.linspace(-length/2, length/2, n_samples)
+
+    return x_centre + t*numpy.cos(angle), y_centre + t*numpy.sin(angle)
+
+def get_field(n_samples):
+    s = numpy.linspace(-1, 1, n_samples)
+
+    return numpy.exp(-s**2/0.1 + 30j*s**2)
+
+class FreeSpaceIntegralTest(unittest.TestCase):
+
+    def assert_equal_to_direct_integral(self, source_samples, target_samples, method):
+        field = get_field(source_samples[0].size)
+
+        direct_integral = huygens_integral_1d(WAVELENGTH, field, *(source_samples + target_samples))
+        fast_integral, used_method = free_space_integral_1d(WAVELENGTH, field, *(source_samples + target_samples))
+
+        self.assertEqual(used_method, method)
+        self.assertLess(numpy.max(numpy.abs(fast_integral - direct_integral)), TOLERANCE*numpy.max(numpy.abs(direct_integral)))
+
+    def test_convolution(self):
+        angle = numpy.deg2rad(90.3)
+
+        self.assert_equal_to_direct_integral(get_samples(0.3, 1.0, 400e-6, N_SAMPLES, angle),
+                                             get_samples(0.35, 1.0, 400e-6, N_SAMPLES, angle),
+                                             CONVOLUTION)
+
+    def test_convolution_on_reversed_samples(self):
+        angle = numpy.deg2rad(90.3)
+
+        self.assert_equal_to_direct_integral(get_samples(0.3, 1.0, 400e-6, N_SAMPLES, angle),
+                                             get_samples(0.35, 1.0, 400e-6, N_SAMPLES, angle + numpy.pi),
+                                             CONVOLUTION)
+
+    def test_fresnel(self):
+        self.assert_equal_to_direct_integral(get_samples(0.3, 0.0, 400e-6, N_SAMPLES, numpy.pi/2),
+                                             get_samples(2.3, 10e-6, 300e-6, 1200, numpy.pi/2),
+                                             FRESNEL)
+
+    def test_direct_integral_out_of_fresnel_validity(self):
+        self.assert_equal_to_direct_integral(get_samples(0.3, 0.0, 400e-6, N_SAMPLES, numpy.pi/2),
+                                             get_samples(0.302, 0.0, 300e-6, 1200, numpy.pi/2),
+                                             DIRECT)
+
+    def test_direct_integral_on_tilted_samples(self):
+        self.assertEqual(get_free_space_method(WAVELENGTH,
+                                               *(get_samples(0.3, 0.0, 400e-6, N_SAMPLES, numpy.pi/2) +
+                                                 get_samples(0.35, 0.0, 400e-6, N_SAMPLES, numpy.pi/2 + 0.01))),
+                         DIRECT)
+
+    def test_direct_integral_on_curved_samples(self):
+        x, y = get_samples(0.3, 0.0, 400e-6, N_SAMPLES, numpy.pi/2)
+
+        self.assertEqual(get_free_space_method(WAVELENGTH, x + 1e-3*(y/200e-6)**2, y, *get_samples(0.35, 0.0, 400e-6, N_SAMPLES, numpy.pi/2)),
+                         DIRECT)
+
+if __name__ == "__main__":
+    unittest.main()
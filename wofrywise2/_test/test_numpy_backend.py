@@ -0,0 +1,76 @@
+import unittest
+import warnings
+
+import numpy
+
+from wofrywise2._test.standin_propagation import build_beamline, get_fields, get_parameters, propagate, N_SAMPLES
+
+from wofrywise2.propagator.propagator1D.wise_huygens import BYTES_PER_COUPLE
+from wofrywise2.propagator.propagator1D.wise_propagator import WisePropagator
+
+N_BLOCKS = 8 # per element
+N_THREADS = 4
+THREADS_TOLERANCE = 1e-12 # relative to the largest value of the serial field
+
+def propagate_on_numpy_backend(propagator=None, **additional_parameters):
+    wise_propagation_elements = build_beamline(N_SAMPLES)
+    propagate(get_parameters(wise_propagation_elements, use_cache=False, backend="numpy", **additional_parameters), propagator=propagator)
+
+    return get_fields(wise_propagation_elements)
+
+class NumpyBackendTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # one block per element
+        cls.serial_fields = propagate_on_numpy_backend()
+
+    def assert_serial_fields(self, fields, tolerance=0.0):
+        self.assertEqual(sorted(fields.keys()), sorted(self.serial_fields.keys()))
+
+        for name, field in fields.items():
+            numpy.testing.assert_allclose(field, self.serial_fields[name], rtol=0, atol=tolerance*numpy.max(numpy.abs(self.serial_fields[name])), err_msg=name)
+
+    def test_max_memory(self):
+        max_memory = BYTES_PER_COUPLE*N_SAMPLES*N_SAMPLES//N_BLOCKS
+
+        self.assert_serial_fields(propagate_on_numpy_backend(max_memory=max_memory))
+
+        blocks = {}
+        def block_callback(name, done, total): blocks[name] = blocks.get(name, 0) + 1
+
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        for _ in WisePropagator().iter_propagation(get_parameters(wise_propagation_elements, use_cache=False, backend="numpy", max_memory=max_memory), block_callback=block_callback): pass
+
+        # the field on pm1a is analytic
+        self.assertEqual(blocks, {"kb" : N_BLOCKS, "detector" : N_BLOCKS})
+
+    def test_max_memory_ignored_by_wiselib2(self):
+        with warnings.catch_warnings(record=True) as caught_warnings:
+            warnings.simplefilter("always")
+
+            propagate(get_parameters(use_cache=False, max_memory=BYTES_PER_COUPLE*N_SAMPLES))
+
+        self.assertIn("The wiselib2 backend ignores max_memory (see the numpy backend)", [str(caught_warning.message) for caught_warning in caught_warnings])
+
+    def test_threads(self):
+        propagator = WisePropagator()
+        self.addCleanup(propagator.shutdown_worker_pools)
+
+        # the threads compute the exponentials with numpy instead of numexpr (when installed)
+        self.assert_serial_fields(propagate_on_numpy_backend(propagator, NPools=N_THREADS, executor="threads"), tolerance=THREADS_TOLERANCE)
+        self.assert_serial_fields(propagate_on_numpy_backend(propagator, NPools=N_THREADS, executor="threads", max_memory=BYTES_PER_COUPLE*N_SAMPLES*N_SAMPLES//N_BLOCKS), tolerance=THREADS_TOLERANCE)
+
+    def test_threads_ignored_by_wiselib2(self):
+        propagator = WisePropagator()
+        self.addCleanup(propagator.shutdown_worker_pools)
+
+        with warnings.catch_warnings(record=True) as caught_warnings:
+            warnings.simplefilter("always")
+
+            propagate(get_parameters(use_cache=False, NPools=N_THREADS, executor="threads"), propagator=propagator)
+
+        self.assertIn("The wiselib2 backend ignores the executor \"threads\" (see the numpy backend)", [str(caught_warning.message) for caught_warning in caught_warnings])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import numpy
+
+from wofrywise2._test.standin_propagation import build_beamline, get_parameters, propagate, N_SAMPLES
+
+from wofrywise2.propagator.propagator1D.wise_propagator import WisePropagator
+
+WAVELENGTHS = numpy.array([30e-9, 32e-9, 35e-9])
+WEIGHTS = numpy.array([1.0, 2.0, 1.0])
+
+def build_monochromatic_beamline(wavelength):
+    wise_propagation_elements = build_beamline(N_SAMPLES)
+    wise_propagation_elements.get_wise_propagation_element(0).CoreOptics.Lambda = wavelength
+
+    return wise_propagation_elements
+
+class PolychromaticPropagationTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.result = WisePropagator().do_polychromatic_propagation(get_parameters(), WAVELENGTHS, weights=WEIGHTS)
+
+    def test_fields(self):
+        self.assertEqual(self.result.get_fields().shape, (len(WAVELENGTHS), N_SAMPLES))
+
+        # each row is the field of a single wavelength propagation
+        for index, wavelength in enumerate(WAVELENGTHS):
+            wise_propagation_elements = build_monochromatic_beamline(wavelength)
+            computation_results = propagate(get_parameters(wise_propagation_elements, use_cache=False)).wise_computation_result
+
+            self.assertEqual(computation_results.Lambda, wavelength)
+            numpy.testing.assert_allclose(self.result.get_fields()[index], computation_results.Field, rtol=0, atol=1e-9*numpy.max(numpy.abs(computation_results.Field)))
+            numpy.testing.assert_allclose(self.result.get_abscissas(), computation_results.S, rtol=0, atol=1e-15)
+
+    def test_integrated_intensity(self):
+        weights = WEIGHTS/numpy.sum(WEIGHTS)
+
+        numpy.testing.assert_allclose(self.result.get_weights(), weights)
+        numpy.testing.assert_allclose(self.result.get_integrated_intensity(),
+                                      numpy.sum(weights[:, numpy.newaxis]*numpy.abs(self.result.get_fields())**2, axis=0))
+
+    def test_uniform_weights(self):
+        result = WisePropagator().do_polychromatic_propagation(get_parameters(), WAVELENGTHS)
+
+        numpy.testing.assert_allclose(result.get_weights(), numpy.full(len(WAVELENGTHS), 1/len(WAVELENGTHS)))
+
+    def test_length_mismatch(self):
+        self.assertRaisesRegex(ValueError, "same length: 3 != 2", WisePropagator().do_polychromatic_propagation, get_parameters(), WAVELENGTHS, weights=WEIGHTS[:2])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy
+
+from wofrywise2.beamline.wise_profile_cache import WiseProfileCache
+
+N_SAMPLES = 1000
+
+class ProfileCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_directory = os.path.join(self.directory, "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_profile(self, name, profile):
+        file_name = os.path.join(self.directory, name)
+        numpy.savetxt(file_name, profile)
+
+        return file_name
+
+    def get_cache_files(self):
+        return set(os.listdir(self.cache_directory)) if os.path.isdir(self.cache_directory) else set()
+
+    def test_edited_file_is_converted_again(self):
+        profile_cache = WiseProfileCache(self.cache_directory)
+        file_name = self.write_profile("profile.txt", numpy.linspace(0, 1, N_SAMPLES))
+
+        numpy.testing.assert_array_equal(profile_cache.load_profile(file_name), numpy.linspace(0, 1, N_SAMPLES))
+
+        # same size, new content
+        self.write_profile("profile.txt", numpy.linspace(1, 2, N_SAMPLES))
+        stat = os.stat(file_name)
+        os.utime(file_name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+
+        numpy.testing.assert_array_equal(profile_cache.load_profile(file_name), numpy.linspace(1, 2, N_SAMPLES))
+        self.assertEqual(len(self.get_cache_files()), 2)
+
+    def test_touched_file_is_not_converted_again(self):
+        profile_cache = WiseProfileCache(self.cache_directory)
+        file_name = self.write_profile("profile.txt", numpy.linspace(0, 1, N_SAMPLES))
+
+        profile_cache.load_profile(file_name)
+        os.utime(file_name, ns=(os.stat(file_name).st_atime_ns, os.stat(file_name).st_mtime_ns + 1000000))
+        profile_cache.load_profile(file_name)
+
+        self.assertEqual(len(self.get_cache_files()), 1)
+
+    def test_least_recently_used_files_are_removed(self):
+        file_names = [self.write_profile(name, numpy.full(N_SAMPLES, index, dtype=float)) for index, name in enumerate(["a.txt", "b.txt", "c.txt"])]
+
+        # room for two profiles
+        profile_cache = WiseProfileCache(self.cache_directory, max_size=int(2.5*N_SAMPLES*8))
+
+        cache_files = {}
+        for file_name in file_names[:2]:
+            previous_files = self.get_cache_files()
+            profile_cache.load_profile(file_name)
+            cache_files[file_name] = (self.get_cache_files() - previous_files).pop()
+            time.sleep(0.01)
+
+        profile_cache.load_profile(file_names[0]) # a is used again, b is the least recently used
+        time.sleep(0.01)
+        profile_cache.load_profile(file_names[2])
+
+        self.assertIn(cache_files[file_names[0]], self.get_cache_files())
+        self.assertNotIn(cache_files[file_names[1]], self.get_cache_files())
+        self.assertEqual(len(self.get_cache_files()), 2)
+        self.assertLessEqual(profile_cache.get_size(), int(2.5*N_SAMPLES*8))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from wofrywise2._test.standin_propagation import build_beamline, get_parameters, propagate, N_SAMPLES
+
+from wofrywise2.propagator.propagator1D.wise_profiling import COMPUTED, RESTORED_FROM_CACHE
+
+class PropagationProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_records(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        parameters = get_parameters(wise_propagation_elements, backend="numpy", profile=True, profile_memory=True)
+
+        profile = propagate(parameters).get_propagation_profile()
+        # a record for each computed element
+        self.assertEqual([record["name"] for record in profile.get_records()], wise_propagation_elements.get_propagation_stats()["computed_elements"])
+        self.assertEqual(profile.get_cache_hits(), 0)
+
+        for record in profile.get_records():
+            self.assertEqual(record["event"], COMPUTED, record["name"])
+            self.assertEqual(record["backend"], "numpy", record["name"])
+            self.assertEqual(record["n_samples"], N_SAMPLES, record["name"])
+            self.assertGreater(record["result_bytes"], 0, record["name"])
+            self.assertGreaterEqual(record["wall_time"], 0.0, record["name"])
+            self.assertFalse(record["peak_memory"] is None, record["name"])
+
+        self.assertFalse(profile.get_record("kb")["integration_method"] is None)
+
+        # the same elements, restored from the result cache
+        profile = propagate(parameters).get_propagation_profile()
+
+        restored_elements = wise_propagation_elements.get_propagation_stats()["restored_elements"]
+
+        self.assertEqual([(record["name"], record["event"]) for record in profile.get_records()], [(name, RESTORED_FROM_CACHE) for name in restored_elements])
+        self.assertEqual(profile.get_cache_hits(), len(restored_elements))
+        self.assertIn("detector", restored_elements)
+
+    def test_no_profile(self):
+        self.assertIsNone(propagate(get_parameters()).get_propagation_profile())
+        self.assertIsNone(propagate(get_parameters(profile=False)).get_propagation_profile())
+
+    def test_export(self):
+        profile = propagate(get_parameters(use_cache=False, profile=True)).get_propagation_profile()
+
+        file_name = os.path.join(self.directory, "profile.json")
+        profile.save_json(file_name)
+
+        with open(file_name) as file: profile_dict = json.load(file)
+
+        self.assertEqual([record["name"] for record in profile_dict["elements"]], ["pm1a", "kb", "detector"])
+        self.assertEqual(profile_dict["cache_misses"], 3)
+
+        file_name = os.path.join(self.directory, "trace.json")
+        profile.save_chrome_trace(file_name)
+
+        with open(file_name) as file: trace = json.load(file)
+
+        self.assertEqual([event["name"] for event in trace["traceEvents"]], ["propagation", "pm1a", "kb", "detector"])
+
+        for event in trace["traceEvents"]:
+            self.assertEqual(event["ph"], "X")
+            self.assertGreaterEqual(event["ts"], 0.0)
+            self.assertGreaterEqual(event["dur"], 0.0)
+
+        # the elements within the propagation
+        propagation_event = trace["traceEvents"][0]
+        for event in trace["traceEvents"][1:]:
+            self.assertLessEqual(event["ts"] + event["dur"], propagation_event["ts"] + propagation_event["dur"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from wofrywise2._test.standin_propagation import build_beamline, get_parameters, propagate, N_SAMPLES
+
+class PropagationElementsTest(unittest.TestCase):
+
+    def test_missing_element(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+
+        with self.assertRaisesRegex(ValueError, "Beamline element is None"): wise_propagation_elements.add_beamline_element(None)
+        with self.assertRaisesRegex(ValueError, "Beamline element is None"): wise_propagation_elements.insert_beamline_element(1, None)
+
+        self.assertEqual(wise_propagation_elements.get_propagation_elements_number(), 4)
+        self.assertEqual(len(wise_propagation_elements.get_wise_propagation_elements().ItemList), 4)
+
+    def test_geometry_dirty_tracking(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+
+        self.assertTrue(wise_propagation_elements.is_geometry_dirty())
+        self.assertTrue(wise_propagation_elements.refresh_positions())
+        self.assertFalse(wise_propagation_elements.is_geometry_dirty())
+        self.assertFalse(wise_propagation_elements.refresh_positions())
+
+        # the sampling does not move the elements
+        wise_propagation_elements.get_wise_propagation_element(2).ComputationSettings.NSamples = 2*N_SAMPLES
+        self.assertFalse(wise_propagation_elements.is_geometry_dirty())
+
+        wise_propagation_elements.get_wise_propagation_element(3).PositioningDirectives.Distance = 1e-3
+        self.assertTrue(wise_propagation_elements.is_geometry_dirty())
+        self.assertTrue(wise_propagation_elements.refresh_positions())
+        self.assertFalse(wise_propagation_elements.refresh_positions())
+
+        self.assertTrue(wise_propagation_elements.refresh_positions(force=True))
+
+        wise_propagation_elements.set_geometry_dirty()
+        self.assertTrue(wise_propagation_elements.refresh_positions())
+
+    def test_positions_refreshed_by_the_propagation(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        parameters = get_parameters(wise_propagation_elements)
+
+        propagation_stats = []
+        wise_propagation_elements.set_propagation_stats_hook(propagation_stats.append)
+
+        propagate(parameters)
+        propagate(parameters)
+        wise_propagation_elements.get_wise_propagation_element(1).PositioningDirectives.Distance = 48090.0
+        propagate(parameters)
+
+        self.assertEqual([stats["positions_refreshed"] for stats in propagation_stats], [True, False, True])
+        self.assertEqual(wise_propagation_elements.get_propagation_stats(), propagation_stats[-1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from wofrywise2._test.standin_propagation import build_beamline, get_fields, get_parameters, propagate, N_SAMPLES
+
+class ResultCacheTest(unittest.TestCase):
+
+    def assertSameFields(self, fields, expected_fields):
+        self.assertEqual(sorted(fields.keys()), sorted(expected_fields.keys()))
+        for name, field in fields.items(): numpy.testing.assert_array_equal(field, expected_fields[name], name)
+
+    def test_unchanged_beamline(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        parameters = get_parameters(wise_propagation_elements)
+
+        propagate(parameters)
+        fields = get_fields(wise_propagation_elements)
+
+        propagate(parameters)
+
+        self.assertEqual(wise_propagation_elements.get_propagation_stats()["restored_elements"], ["source", "pm1a", "kb", "detector"])
+        self.assertEqual(wise_propagation_elements.get_propagation_stats()["computed_elements"], [])
+        self.assertSameFields(get_fields(wise_propagation_elements), fields)
+
+    def test_detector_edit(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        parameters = get_parameters(wise_propagation_elements)
+
+        propagate(parameters)
+        fields = get_fields(wise_propagation_elements)
+
+        wise_propagation_elements.get_wise_propagation_element(3).PositioningDirectives.Distance = 1e-3
+        propagate(parameters)
+
+        self.assertEqual(wise_propagation_elements.get_propagation_stats()["restored_elements"], ["source", "pm1a", "kb"])
+        self.assertEqual(wise_propagation_elements.get_propagation_stats()["computed_elements"], ["detector"])
+
+        edited_fields = get_fields(wise_propagation_elements)
+        self.assertSameFields(dict([(name, edited_fields[name]) for name in ["pm1a", "kb"]]), dict([(name, fields[name]) for name in ["pm1a", "kb"]]))
+        self.assertFalse(numpy.array_equal(edited_fields["detector"], fields["detector"]))
+
+    def test_upstream_edit(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        parameters = get_parameters(wise_propagation_elements)
+
+        propagate(parameters)
+
+        wise_propagation_elements.get_wise_propagation_element(1).CoreOptics.L = 0.3
+        propagate(parameters)
+
+        self.assertEqual(wise_propagation_elements.get_propagation_stats()["restored_elements"], ["source"])
+        self.assertEqual(wise_propagation_elements.get_propagation_stats()["computed_elements"], ["pm1a", "kb", "detector"])
+
+        # same fields of a beamline computed from scratch with the edit
+        expected_propagation_elements = build_beamline(N_SAMPLES)
+        expected_propagation_elements.get_wise_propagation_element(1).CoreOptics.L = 0.3
+        propagate(get_parameters(expected_propagation_elements, use_cache=False))
+
+        self.assertSameFields(get_fields(wise_propagation_elements), get_fields(expected_propagation_elements))
+
+    def test_restore_from_the_store(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        wise_propagation_elements.set_result_store(directory)
+        propagate(get_parameters(wise_propagation_elements))
+
+        # a new session: the result cache is empty
+        restored_propagation_elements = build_beamline(N_SAMPLES)
+        restored_propagation_elements.set_result_store(directory)
+        propagate(get_parameters(restored_propagation_elements))
+
+        self.assertEqual(restored_propagation_elements.get_propagation_stats()["restored_elements"], ["pm1a", "kb", "detector"])
+        self.assertEqual(restored_propagation_elements.get_propagation_stats()["computed_elements"], [])
+        self.assertSameFields(get_fields(restored_propagation_elements), get_fields(wise_propagation_elements))
+
+if __name__ == "__main__":
+    unittest.main()
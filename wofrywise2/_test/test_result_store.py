@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from wofrywise2._test.standin_propagation import build_beamline, get_fields, get_parameters, propagate, N_SAMPLES
+
+class ResultStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+        # first session, with the checkpoints of pm1a, kb and detector
+        self.wise_propagation_elements = build_beamline(N_SAMPLES)
+        self.wise_propagation_elements.set_result_store(self.directory)
+        propagate(get_parameters(self.wise_propagation_elements))
+
+    def propagate_new_session(self, defocus=None):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        if not defocus is None: wise_propagation_elements.get_wise_propagation_element(3).PositioningDirectives.Distance = defocus
+        wise_propagation_elements.set_result_store(self.directory)
+
+        propagate(get_parameters(wise_propagation_elements))
+
+        return wise_propagation_elements
+
+    def test_resume_after_an_edit(self):
+        wise_propagation_elements = self.propagate_new_session(defocus=1e-3)
+
+        self.assertEqual(wise_propagation_elements.get_propagation_stats()["restored_elements"], ["pm1a", "kb"])
+        self.assertEqual(wise_propagation_elements.get_propagation_stats()["computed_elements"], ["detector"])
+
+        expected_propagation_elements = build_beamline(N_SAMPLES)
+        expected_propagation_elements.get_wise_propagation_element(3).PositioningDirectives.Distance = 1e-3
+        propagate(get_parameters(expected_propagation_elements, use_cache=False))
+
+        for name, field in get_fields(expected_propagation_elements).items():
+            numpy.testing.assert_array_equal(get_fields(wise_propagation_elements)[name], field, name)
+
+        # the new checkpoint is added to the store
+        self.assertEqual(self.propagate_new_session(defocus=1e-3).get_propagation_stats()["computed_elements"], [])
+
+    def test_resume_from_the_last_valid_checkpoint(self):
+        # a checkpoint with a missing array (e.g. the process died while writing it) is not valid
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(".json"):
+                with open(os.path.join(self.directory, file_name), "r") as file: header = json.load(file)
+
+                if header["Name"] == "detector": os.remove(os.path.join(self.directory, file_name[:-len(".json")] + ".Field.npy"))
+
+        wise_propagation_elements = self.propagate_new_session()
+
+        self.assertEqual(wise_propagation_elements.get_propagation_stats()["restored_elements"], ["pm1a", "kb"])
+        self.assertEqual(wise_propagation_elements.get_propagation_stats()["computed_elements"], ["detector"])
+        numpy.testing.assert_array_equal(get_fields(wise_propagation_elements)["detector"], get_fields(self.wise_propagation_elements)["detector"])
+
+    def test_memory_mapped_results(self):
+        wise_propagation_elements = self.propagate_new_session()
+
+        self.assertEqual(wise_propagation_elements.get_propagation_stats()["computed_elements"], [])
+
+        for name, field in get_fields(self.wise_propagation_elements).items():
+            restored_field = get_fields(wise_propagation_elements)[name]
+
+            self.assertIsInstance(restored_field, numpy.memmap)
+            numpy.testing.assert_array_equal(restored_field, field, name)
+
+if __name__ == "__main__":
+    unittest.main()
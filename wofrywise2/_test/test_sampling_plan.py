@@ -0,0 +1,81 @@
+import unittest
+
+from wofrywise2._test.standin_propagation import build_beamline, get_parameters, propagate, N_SAMPLES
+
+from wofrywise2.propagator.propagator1D.wise_backends import NumpyBackend
+
+MAX_SAMPLES = 300
+MIN_SAMPLES = 64
+
+def get_n_samples(sampling_plan):
+    return dict([(entry["name"], entry["n_samples"]) for entry in sampling_plan.get_entries()])
+
+class SamplingPlanTest(unittest.TestCase):
+
+    def test_inherited_samples(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+
+        # wiselib2 convention: pm1a is the first numerical element, kb and detector are sampled as it is
+        sampling_plan = wise_propagation_elements.compute_sampling_plan(min_samples=1)
+        required_samples = max([entry["required_samples"] for entry in sampling_plan.get_entries()])
+
+        self.assertEqual(sampling_plan.get_names(), ["pm1a", "kb", "detector"])
+        self.assertEqual(get_n_samples(sampling_plan), {"pm1a" : required_samples, "kb" : required_samples, "detector" : required_samples})
+
+        # each element is sampled for its own neighbours
+        sampling_plan = wise_propagation_elements.compute_sampling_plan(min_samples=1, inherit_sampling=False)
+
+        for entry in sampling_plan.get_entries():
+            self.assertEqual(entry["n_samples"], max(1, entry["n_samples_upstream"], entry["n_samples_downstream"]), entry["name"])
+
+        self.assertEqual(sampling_plan.get_n_samples("kb"), required_samples)
+        self.assertLess(sampling_plan.get_n_samples("detector"), required_samples)
+
+    def test_safety_factor(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+
+        entries = wise_propagation_elements.compute_sampling_plan(min_samples=1, inherit_sampling=False).get_entries()
+        double_entries = wise_propagation_elements.compute_sampling_plan(min_samples=1, safety_factor=2.0, inherit_sampling=False).get_entries()
+
+        # samples rounded up
+        for entry, double_entry in zip(entries, double_entries):
+            for key in ["n_samples_upstream", "n_samples_downstream", "n_samples"]:
+                self.assertTrue(2*entry[key] - 1 <= double_entry[key] <= 2*entry[key], entry["name"] + " " + key)
+
+        # minimum and maximum samples
+        sampling_plan = wise_propagation_elements.compute_sampling_plan(min_samples=MIN_SAMPLES, max_samples=MAX_SAMPLES, inherit_sampling=False)
+
+        self.assertEqual(get_n_samples(sampling_plan), {"pm1a" : MIN_SAMPLES, "kb" : MAX_SAMPLES, "detector" : 186})
+
+    def test_hook(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+
+        sampling_plans = []
+        def sampling_plan_hook(sampling_plan):
+            self.assertIsNone(wise_propagation_elements.get_wise_propagation_element(-1).ComputationResults.Field)
+
+            sampling_plan.set_n_samples("detector", 150)
+            sampling_plans.append(sampling_plan)
+
+        wise_propagation_elements.set_sampling_plan_hook(sampling_plan_hook)
+
+        propagate(get_parameters(wise_propagation_elements,
+                                 use_cache=False,
+                                 backend=NumpyBackend(inherit_sampling=False),
+                                 automatic_sampling=True,
+                                 sampling_min_samples=MIN_SAMPLES,
+                                 sampling_max_samples=MAX_SAMPLES))
+
+        self.assertEqual(len(sampling_plans), 1)
+        self.assertIs(wise_propagation_elements.get_sampling_plan(), sampling_plans[0])
+
+        # only the detector is changed by the hook
+        n_samples = dict([(wise_optical_element.Name, len(wise_optical_element.ComputationResults.Field))
+                          for wise_optical_element in wise_propagation_elements.get_wise_propagation_elements().ItemList if not wise_optical_element.IsSource])
+
+        self.assertEqual(n_samples, {"pm1a" : MIN_SAMPLES, "kb" : MAX_SAMPLES, "detector" : 150})
+
+        self.assertRaises(KeyError, sampling_plans[0].set_n_samples, "source", 100)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from wofrywise2._test.standin_propagation import build_beamline, get_parameters, get_fields, propagate, N_SAMPLES
+
+from wofrywise2.propagator.propagator1D import wise_snapshot
+from wofrywise2.propagator.propagator1D.wise_snapshot import save_beamline, load_beamline, save_wavefront, load_wavefront, get_snapshot_kind, BEAMLINE
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, "beamline.wise")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_reloaded_beamline_propagates(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        save_beamline(self.file_name, wise_propagation_elements)
+
+        propagate(get_parameters(wise_propagation_elements))
+
+        for mmap in (True, False):
+            reloaded_propagation_elements = load_beamline(self.file_name, mmap=mmap)
+            propagate(get_parameters(reloaded_propagation_elements))
+
+            reloaded_fields = get_fields(reloaded_propagation_elements)
+
+            self.assertEqual(get_snapshot_kind(self.file_name), BEAMLINE)
+            self.assertEqual(sorted(reloaded_fields.keys()), sorted(get_fields(wise_propagation_elements).keys()))
+            for name, field in get_fields(wise_propagation_elements).items(): numpy.testing.assert_array_equal(reloaded_fields[name], field)
+
+    def test_results(self):
+        wise_propagation_elements = build_beamline(N_SAMPLES)
+        wavefront = propagate(get_parameters(wise_propagation_elements))
+
+        save_beamline(self.file_name, wise_propagation_elements, include_results=True)
+        reloaded_fields = get_fields(load_beamline(self.file_name))
+
+        for name, field in get_fields(wise_propagation_elements).items(): numpy.testing.assert_array_equal(reloaded_fields[name], field)
+
+        save_wavefront(self.file_name, wavefront)
+        numpy.testing.assert_array_equal(load_wavefront(self.file_name).wise_computation_result.Field, wavefront.wise_computation_result.Field)
+
+        self.assertRaises(ValueError, load_beamline, self.file_name)
+
+    def test_globals_out_of_the_allowed_packages(self):
+        self.assertRaises(ValueError, wise_snapshot._get_global, "os:system")
+        self.assertRaises(ValueError, wise_snapshot._get_global, "wofrywise2.propagator.propagator1D.wise_snapshot:os.system")
+        self.assertRaises(ValueError, wise_snapshot._get_global, "wofrywise2.propagator.propagator1D.wise_snapshot:numpy.memmap")
+        self.assertRaises(ValueError, wise_snapshot._get_global, "wofrywise2.propagator.propagator1D.wise_snapshot:FORMAT_VERSION")
+
+        self.assertIs(wise_snapshot._get_global("wofrywise2.propagator.propagator1D.wise_snapshot:save_beamline"), save_beamline)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import json
+import subprocess
+import sys
+import unittest
+
+# modules imported by the modules of wofrywise2 after their dependencies (wofry, syned), in a fresh interpreter: wiselib2,
+# the kernels, the backends, the pools, the result store and the ensembles are loaded at the first use only. The time
+# budget is generous (shared and slow machines): it catches gross regressions only
+IMPORT_TIME_BUDGET = 2.0 # s
+N_RUNS = 3
+
+DEPENDENCIES = ["wofry.propagator.propagator",
+                "wofry.propagator.wavefront1D.generic_wavefront",
+                "syned.beamline.beamline_element",
+                "syned.beamline.optical_element"]
+
+MODULES = ["wofrywise2.beamline.wise_beamline_element",
+           "wofrywise2.beamline.light_sources.wise_gaussian_source",
+           "wofrywise2.beamline.optical_elements.wise_detector",
+           "wofrywise2.beamline.optical_elements.wise_elliptic_mirror",
+           "wofrywise2.beamline.optical_elements.wise_plane_mirror",
+           "wofrywise2.beamline.optical_elements.wise_spheric_mirror",
+           "wofrywise2.propagator.wavefront1D.wise_wavefront",
+           "wofrywise2.propagator.propagator1D.wise_propagator",
+           "wofrywise2.propagator.propagator1D.wise_snapshot"]
+
+# scipy and multiprocessing are already imported by wofry: only the modules added by wofrywise2 are checked
+DEFERRED_MODULES = ["wiselib2",
+                    "scipy",
+                    "numexpr",
+                    "multiprocessing",
+                    "concurrent.futures",
+                    "asyncio",
+                    "syned.beamline.shape",
+                    "wofrywise2.propagator.propagator1D.wise_backends",
+                    "wofrywise2.propagator.propagator1D.wise_huygens",
+                    "wofrywise2.propagator.propagator1D.wise_worker_pool",
+                    "wofrywise2.propagator.propagator1D.wise_result_store",
+                    "wofrywise2.propagator.propagator1D.wise_ensemble",
+                    "wofrywise2.propagator.propagator1D.wise_coherent_modes",
+                    "wofrywise2.propagator.propagator1D.wise_polychromatic",
+                    "wofrywise2.propagator.propagator1D.wise_focus_sweep"]
+
+STARTUP_SCRIPT = """
+import importlib, json, sys, time
+
+for module in %r: importlib.import_module(module)
+dependency_modules = set(sys.modules.keys())
+
+start_time = time.perf_counter()
+for module in %r: importlib.import_module(module)
+import_time = time.perf_counter() - start_time
+
+sys.stdout.write(json.dumps({"import_time" : import_time, "modules" : sorted(set(sys.modules.keys()) - dependency_modules)}))
+"""
+
+def run_startup():
+    output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT % (DEPENDENCIES, MODULES)],
+                            stdout=subprocess.PIPE, check=True, universal_newlines=True).stdout
+
+    return json.loads(output)
+
+class StartupTest(unittest.TestCase):
+
+    def test_import_time(self):
+        import_time = min(run_startup()["import_time"] for _ in range(N_RUNS))
+
+        self.assertLess(import_time, IMPORT_TIME_BUDGET)
+
+    def test_deferred_imports(self):
+        modules = run_startup()["modules"]
+
+        self.assertIn("wofrywise2.propagator.propagator1D.wise_propagator", modules)
+
+        for deferred_module in DEFERRED_MODULES:
+            self.assertFalse(any(module == deferred_module or module.startswith(deferred_module + ".") for module in modules), deferred_module)
+
+    def test_conversion_factor(self):
+        from wofrywise2.propagator.propagator1D import wise_propagator
+
+        self.assertAlmostEqual(wise_propagator.angstroms_to_eV, 12398.42, places=2)
+
+if __name__ == "__main__":
+    unittest.main()
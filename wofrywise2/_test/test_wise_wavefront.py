@@ -0,0 +1,155 @@
+import tracemalloc
+import unittest
+
+import numpy
+
+from wofrywise2._test.standin_propagation import get_parameters, propagate
+
+from wofry.propagator.wavefront1D.generic_wavefront import GenericWavefront1D
+
+from wiselib2.Fundation import ComputationResults
+
+from wofrywise2.propagator.wavefront1D.wise_wavefront import WiseWavefront, WiseLazyWavefront
+
+N_SAMPLES = 100000
+
+def get_wise_wavefront(dtype=complex):
+    computation_results = ComputationResults()
+    computation_results.Lambda = 10e-9
+    computation_results.S = numpy.linspace(-50e-6, 50e-6, N_SAMPLES)
+    computation_results.Field = numpy.exp(1j*numpy.linspace(0, 10, N_SAMPLES)).astype(dtype)
+
+    return WiseWavefront(wise_computation_results=computation_results)
+
+def get_peak_allocation(function, *args, **kwargs):
+    tracemalloc.start()
+    try:
+        result = function(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return result, peak
+
+class WiseWavefrontConversionTest(unittest.TestCase):
+
+    def test_to_generic_wavefront_shares_buffers(self):
+        wise_wavefront = get_wise_wavefront()
+        field = wise_wavefront.wise_computation_result.Field
+
+        generic_wavefront, peak = get_peak_allocation(wise_wavefront.toGenericWavefront)
+
+        self.assertIsInstance(generic_wavefront, GenericWavefront1D)
+        self.assertIs(generic_wavefront.get_complex_amplitude(), field)
+        self.assertIs(generic_wavefront.get_abscissas(), wise_wavefront.wise_computation_result.S)
+        self.assertLess(peak, field.nbytes // 10)
+
+        self.assertEqual(generic_wavefront.get_wavelength(), wise_wavefront.wise_computation_result.Lambda)
+        self.assertEqual(generic_wavefront.size(), N_SAMPLES)
+        self.assertAlmostEqual(generic_wavefront.delta(), 100e-6/(N_SAMPLES - 1))
+
+    def test_from_generic_wavefront_shares_buffers(self):
+        generic_wavefront = get_wise_wavefront().toGenericWavefront()
+        field = generic_wavefront.get_complex_amplitude()
+
+        wise_wavefront, peak = get_peak_allocation(WiseWavefront.fromGenericWavefront, generic_wavefront)
+
+        self.assertIs(wise_wavefront.wise_computation_result.Field, field)
+        self.assertIs(wise_wavefront.wise_computation_result.S, generic_wavefront.get_abscissas())
+        self.assertLess(peak, field.nbytes // 10)
+
+    def test_copy(self):
+        wise_wavefront = get_wise_wavefront()
+        field = wise_wavefront.wise_computation_result.Field
+
+        generic_wavefront = wise_wavefront.toGenericWavefront(copy=True)
+
+        self.assertFalse(numpy.shares_memory(generic_wavefront.get_complex_amplitude(), field))
+        self.assertTrue(numpy.array_equal(generic_wavefront.get_complex_amplitude(), field))
+
+        wise_wavefront = WiseWavefront.fromGenericWavefront(generic_wavefront, copy=True)
+
+        self.assertFalse(numpy.shares_memory(wise_wavefront.wise_computation_result.Field, generic_wavefront.get_complex_amplitude()))
+
+    def test_dtype_mismatch_requires_copy(self):
+        wise_wavefront = get_wise_wavefront(dtype=numpy.complex64)
+
+        self.assertRaises(ValueError, wise_wavefront.toGenericWavefront)
+
+        generic_wavefront = wise_wavefront.toGenericWavefront(copy=True)
+
+        self.assertEqual(generic_wavefront.get_complex_amplitude().dtype, numpy.complex128)
+
+    def test_exact_values(self):
+        wise_wavefront = get_wise_wavefront()
+        wise_wavefront.wise_computation_result.Field *= 1 + 1e-13
+
+        generic_wavefront = wise_wavefront.toGenericWavefront(copy=True)
+
+        numpy.testing.assert_array_equal(generic_wavefront.get_complex_amplitude(), wise_wavefront.wise_computation_result.Field)
+        numpy.testing.assert_array_equal(generic_wavefront.get_abscissas(), wise_wavefront.wise_computation_result.S)
+
+    def test_size_mismatch(self):
+        wise_wavefront = get_wise_wavefront()
+        wise_wavefront.wise_computation_result.S = wise_wavefront.wise_computation_result.S[:-1]
+
+        self.assertRaisesRegex(Exception, "same dimension", wise_wavefront.toGenericWavefront)
+
+        wise_wavefront.wise_computation_result.S = numpy.zeros(0)
+        wise_wavefront.wise_computation_result.Field = numpy.zeros(0, dtype=complex)
+
+        self.assertRaisesRegex(Exception, "0 size", wise_wavefront.toGenericWavefront)
+
+class WiseWavefrontPropagationTest(unittest.TestCase):
+
+    def assert_cached_field_unchanged(self, parameters, change_result):
+        result = propagate(parameters)
+        field = numpy.array(result.wise_computation_result.Field if isinstance(result, WiseWavefront) else result.get_complex_amplitude())
+
+        change_result(result)
+
+        repeated_result = propagate(parameters)
+
+        self.assertIn("detector", parameters.get_PropagationElements().get_propagation_stats()["restored_elements"])
+        numpy.testing.assert_array_equal(repeated_result.wise_computation_result.Field if isinstance(repeated_result, WiseWavefront) else repeated_result.get_complex_amplitude(), field)
+
+    def test_generic_wavefront_changes_do_not_alter_the_cache(self):
+        self.assert_cached_field_unchanged(get_parameters(), lambda result: result.toGenericWavefront().rescale_amplitude(10))
+
+    def test_lazy_wavefront_changes_do_not_alter_the_cache(self):
+        generic_wavefront = GenericWavefront1D.initialize_wavefront_from_range(-1e-3, 1e-3, 100, wavelength=32e-9)
+
+        def change_result(result):
+            self.assertIsInstance(result, WiseLazyWavefront)
+
+            result.rescale_amplitude(10)
+            result.add_phase_shift(1.0)
+
+        self.assert_cached_field_unchanged(get_parameters(wavefront=generic_wavefront), change_result)
+
+    def test_wise_wavefront_changes_do_not_alter_the_cache(self):
+        def change_result(result):
+            result.wise_computation_result.Field *= 10
+
+        self.assert_cached_field_unchanged(get_parameters(), change_result)
+
+    def test_cached_results_are_shared(self):
+        parameters = get_parameters()
+
+        for _ in range(2): # computed, then restored from the cache
+            result = propagate(parameters)
+            generic_wavefront = result.toGenericWavefront()
+
+            self.assertTrue(numpy.shares_memory(result.wise_computation_result.Field, generic_wavefront._electric_field_array.np_array))
+            self.assertTrue(numpy.shares_memory(result.wise_computation_result.S, generic_wavefront._electric_field_array.scale))
+
+        self.assertIn("detector", parameters.get_PropagationElements().get_propagation_stats()["restored_elements"])
+
+    def test_complex64_generic_wavefront(self):
+        generic_wavefront = GenericWavefront1D.initialize_wavefront_from_range(-1e-3, 1e-3, 100, wavelength=32e-9)
+        generic_wavefront._electric_field_array.np_array = generic_wavefront.get_complex_amplitude().astype(numpy.complex64)
+
+        self.assertIsInstance(propagate(get_parameters(wavefront=generic_wavefront)), WiseLazyWavefront)
+
+if __name__ == "__main__":
+    unittest.main()
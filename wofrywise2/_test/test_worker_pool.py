@@ -0,0 +1,39 @@
+import time
+import unittest
+
+from wofrywise2.propagator.propagator1D.wise_worker_pool import WiseWorkerPool
+
+N_WORKERS = 2
+
+def _raise_on_unpickling():
+    raise RuntimeError("Result cannot be unpickled")
+
+class UnpicklableResult(object):
+
+    def __reduce__(self):
+        return (_raise_on_unpickling, ())
+
+def get_result(value, delay):
+    time.sleep(delay)
+
+    return UnpicklableResult() if value is None else value
+
+class WorkerPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.worker_pool = WiseWorkerPool(N_WORKERS)
+
+    def tearDown(self):
+        self.worker_pool.shutdown()
+
+    def test_map(self):
+        self.assertEqual(self.worker_pool.map(get_result, range(5), [0.0]*5), list(range(5)))
+
+    def test_no_stale_results_after_a_failed_map(self):
+        # the first result cannot be unpickled while the second task is still running
+        self.assertRaises(RuntimeError, self.worker_pool.map, get_result, [None, "stale"], [0.0, 0.5])
+
+        self.assertEqual(self.worker_pool.map(get_result, range(4), [0.0]*4), list(range(4)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,12 @@
+import numpy
+
+FermiFactor = {'fel1' : 1.25, 'fel2' : 1.5}
+
+def ThetaI(Lambda, Source=''):
+    return (FermiFactor['fel1'] if Lambda >= 20e-9 else FermiFactor['fel2']) * Lambda * 1e9 * 1e-6
+
+def Waist0I(Lambda, Source=''):
+    return Lambda/numpy.pi/ThetaI(Lambda, Source)
+
+def Waist0E(Lambda, Source=''):
+    return Waist0I(Lambda, Source)/numpy.sqrt(2)
@@ -0,0 +1,220 @@
+import collections
+import copy
+
+import numpy
+
+from wofrywise2._test.wiselib2_standin import Rayman as rm
+from wofrywise2._test.wiselib2_standin import ToolLib as tl
+
+class ComputationResults(object):
+
+    def __init__(self):
+        self.Lambda = 0
+        self.NSamples = None
+        self.Field = None
+        self.X = None
+        self.Y = None
+        self.S = None
+        self.Action = None
+        self.Name = ''
+
+class PositioningDirectives(object):
+
+    def __init__(self, ReferTo='upstream', PlaceWhat='centre', PlaceWhere='centre', Distance=0, XYCentre=None, Angle=None, **kwargs):
+        self.ReferTo = ReferTo
+        self.PlaceWhat = PlaceWhat
+        self.PlaceWhere = PlaceWhere
+        self.Distance = Distance
+        self.XYCentre = XYCentre
+        self.Angle = Angle
+
+class ComputationSettingsForOpticalElement(object):
+
+    def __init__(self, NSamples=2002, Ignore=False):
+        self.NSamples = NSamples
+        self.Ignore = Ignore
+        self.UseCustomSampling = False
+        self.OversamplingFactor = 1
+
+class ComputationSettingsForBeamline(object):
+
+    def __init__(self, NPools=1):
+        self.NPools = NPools
+
+class OpticalElement(object):
+
+    def __init__(self, Element=None, Name=None, IsSource=False, PositioningDirectives=None, ComputationSettings=None, *kwargs):
+        self.CoreOptics = Element
+        self.Name = Name
+        self.IsSource = IsSource
+        self.PositioningDirectives = PositioningDirectives
+        self.ComputationSettings = ComputationSettingsForOpticalElement() if ComputationSettings is None else ComputationSettings
+        self.Results = ComputationResults()
+        self.Parent = None
+        self.Children = []
+
+    @property
+    def ComputationResults(self):
+        return self.Results
+
+    @ComputationResults.setter
+    def ComputationResults(self, value):
+        self.Results = value
+
+    @property
+    def XYCentre(self):
+        return self.CoreOptics.XYCentre
+
+    @property
+    def RayOutNominal(self):
+        return self.CoreOptics.RayOutNominal
+
+    @property
+    def DistanceFromParent(self):
+        return 0 if self.Parent is None else numpy.linalg.norm(self.XYCentre - self.Parent.XYCentre)
+
+    def GetXY(self, N):
+        return self.CoreOptics.GetXY(N)
+
+    def GetNSamples(self, Lambda):
+        return self.ComputationSettings.NSamples
+
+def PositioningDirectives_UpdatePosition(oeY, oeX):
+    Pd = oeY.PositioningDirectives
+
+    if Pd.ReferTo == 'absolute':
+        oeY.CoreOptics.SetXYAngle_Centre(Pd.XYCentre, Pd.Angle)
+    elif Pd.ReferTo in ('upstream', 'source'):
+        RayIn = oeX.CoreOptics.RayOutNominal
+
+        if Pd.PlaceWhat == 'centre' and Pd.PlaceWhere == 'centre':
+            oeY.CoreOptics.SetXYAngle_Centre(oeX.CoreOptics.XYCentre + Pd.Distance*RayIn.v, RayIn.Angle)
+        elif Pd.PlaceWhat == 'upstream focus' and Pd.PlaceWhere == 'centre':
+            oeY.CoreOptics.SetXYAngle_UpstreamFocus(oeX.XYCentre, RayIn.Angle)
+        elif Pd.PlaceWhat == 'centre' and Pd.PlaceWhere == 'downstream focus':
+            oeY.CoreOptics.SetXYAngle_Centre(oeX.CoreOptics.XYCentre + (Pd.Distance + oeX.CoreOptics.f2)*RayIn.v, RayIn.Angle)
+        else:
+            raise NotImplementedError("Positioning not available: " + Pd.PlaceWhat + " to " + Pd.PlaceWhere)
+
+class BeamlineElements(object):
+
+    # items by name, first and last appended item, as in the Tree of wiselib2
+    def __init__(self):
+        self._Items = collections.OrderedDict()
+        self._FirstItem = None
+        self._ActiveItem = None
+        self.ComputationSettings = ComputationSettingsForBeamline()
+
+    @property
+    def FirstItem(self):
+        return self._FirstItem
+
+    @property
+    def ItemList(self):
+        item_list = []
+        item = self.FirstItem
+        while not item is None:
+            item_list.append(item)
+            item = item.Children[0] if len(item.Children) > 0 else None
+
+        return item_list
+
+    @property
+    def Source(self):
+        return self.FirstItem if not self.FirstItem is None and self.FirstItem.IsSource else None
+
+    def __link(self, item_list):
+        for index, item in enumerate(item_list):
+            item.Parent = item_list[index - 1] if index > 0 else None
+            item.Children = [item_list[index + 1]] if index < len(item_list) - 1 else []
+
+        self._FirstItem = item_list[0] if len(item_list) > 0 else None
+
+    def Append(self, Item):
+        # after the last appended item
+        if self._ActiveItem is None:
+            Item.Parent = None
+            Item.Children = []
+            self._FirstItem = Item
+        else:
+            Item.Parent = self._ActiveItem
+            Item.Children = []
+            self._ActiveItem.Children = [Item]
+
+        self._Items[Item.Name] = Item
+        self._ActiveItem = Item
+
+    def Insert(self, NewItem, ExistingName=None, Mode=1):
+        item_list = self.ItemList
+        index = [item.Name for item in item_list].index(ExistingName)
+
+        item_list.insert(index + 1 if Mode == 1 else index, NewItem)
+        self.__link(item_list)
+
+        self._Items[NewItem.Name] = NewItem
+        self._ActiveItem = NewItem
+
+    def GetFromTo(self, FromItem, ToItem):
+        item_list = self.ItemList
+
+        return item_list[item_list.index(FromItem):item_list.index(ToItem) + 1]
+
+    def RefreshPositions(self):
+        for oeY in self.ItemList:
+            if not oeY.PositioningDirectives is None:
+                if oeY.PositioningDirectives.ReferTo == 'source': oeX = self.Source
+                else: oeX = oeY.Parent
+
+                PositioningDirectives_UpdatePosition(oeY, oeX)
+
+    def _MakeVirtual(self, oeY, oeX, Distance):
+        oeV = copy.deepcopy(oeY)
+        oeV.Parent = oeX
+        oeV.PositioningDirectives = PositioningDirectives(ReferTo='upstream', PlaceWhat='centre', PlaceWhere='centre', Distance=Distance)
+
+        PositioningDirectives_UpdatePosition(oeV, oeX)
+
+        return oeV
+
+    def ComputeFields(self, oeStart=None, oeEnd=None, Dummy=False, Verbose=True):
+        oeStart = self.FirstItem if oeStart is None else oeStart
+        oeList = self.GetFromTo(oeStart, self.ItemList[-1] if oeEnd is None else oeEnd)
+
+        oeLast = self.FirstItem if oeStart.Parent is None else oeStart.Parent
+
+        if oeStart == self.FirstItem and oeStart.IsSource: Lambda = self.FirstItem.CoreOptics.Lambda
+        else: Lambda = oeStart.ComputationResults.Lambda
+
+        for oeThis in oeList:
+            if oeThis.IsSource:
+                continue
+
+            oeThis.Results.Lambda = Lambda
+
+            if oeThis.ComputationSettings.Ignore:
+                continue
+
+            if oeLast.CoreOptics._IsAnalytic:
+                Action = 'Evaluating analytical function (of previous OE on THIS one)'
+                NSamples = oeThis.GetNSamples(Lambda)
+                xThis, yThis = oeThis.GetXY(NSamples)
+
+                oeThis.Results.Field = oeLast.CoreOptics.EvalField(xThis, yThis, Lambda=Lambda)
+            else:
+                Action = 'Evaluating numerical Huygens Fresnel (on oeThis)'
+                NSamples = oeThis.GetNSamples(Lambda)
+                if tl.IsArray(oeLast.Results.Field): NSamples = len(oeLast.Results.Field)
+                xThis, yThis = oeThis.CoreOptics.GetXY(NSamples)
+
+                oeThis.Results.Field = oeLast.CoreOptics.EvalField(xThis, yThis, Lambda=Lambda, E0=oeLast.Results.Field, NPools=self.ComputationSettings.NPools)
+
+            oeThis.Results.NSamples = NSamples
+            oeThis.Results.X = xThis
+            oeThis.Results.Y = yThis
+            oeThis.Results.S = rm.xy_to_s(xThis, yThis)
+            oeThis.Results.Action = Action
+            oeThis.Results.Name = oeThis.Name
+
+            oeLast = oeThis
+
+        return oeList
@@ -0,0 +1,209 @@
+import numpy
+
+from wofrywise2._test.wiselib2_standin import Rayman as rm
+
+def _versor(angle):
+    return numpy.array([numpy.cos(angle), numpy.sin(angle)])
+
+class Ray(object):
+
+    def __init__(self, XYOrigin=[0, 0], Angle=0):
+        self.XYOrigin = numpy.array(XYOrigin, dtype=float)
+        self.Angle = Angle
+
+    @property
+    def v(self):
+        return _versor(self.Angle)
+
+    @property
+    def UnitVectorAtOrigin(self):
+        return Ray([0, 0], self.Angle)
+
+class _ComputationSettings(object):
+
+    def __init__(self):
+        self.UseSmallDisplacements = False
+        self.UseFigureError = False
+        self.UseRoughness = False
+
+class _SmallDisplacements(object):
+
+    def __init__(self):
+        self.Rotation = 0.0
+        self.Long = 0.0
+        self.Trans = 0.0
+
+#================================================
+#  sources
+#================================================
+
+class SourceGaussian(object):
+    _IsAnalytic = True
+
+    def __init__(self, Lambda, Waist0, XYOrigin=[0, 0], AnglePropagation=0):
+        self.Lambda = Lambda
+        self.Waist0 = Waist0
+        self.ComputationSettings = _ComputationSettings()
+        self.SmallDisplacements = _SmallDisplacements()
+        self.SetXYAngle_Centre(XYOrigin, AnglePropagation)
+
+    def SetXYAngle_Centre(self, XYCentre, Angle, **kwargs):
+        self.XYOrigin = numpy.array(XYCentre, dtype=float)
+        self.ThetaPropagation = Angle
+        self.AnglePropagation = Angle
+
+    @property
+    def XYCentre(self):
+        return self.XYOrigin
+
+    @property
+    def RayOutNominal(self):
+        return Ray(self.XYOrigin, self.AnglePropagation)
+
+    @property
+    def RayleighRange(self):
+        return numpy.pi*self.Waist0**2/self.Lambda
+
+    def Waist(self, z):
+        return self.Waist0*numpy.sqrt(1 + (z/self.RayleighRange)**2)
+
+    def GouyPhase(self, z):
+        return numpy.arctan(z/self.RayleighRange)
+
+    def EvalField(self, x, y, Lambda=None, **kwargs):
+        k = 2*numpy.pi/self.Lambda
+        v = _versor(self.AnglePropagation)
+
+        z = (x - self.XYOrigin[0])*v[0] + (y - self.XYOrigin[1])*v[1]
+        r = -(x - self.XYOrigin[0])*v[1] + (y - self.XYOrigin[1])*v[0]
+
+        curvature = z/(z**2 + self.RayleighRange**2)
+
+        return self.Waist0/self.Waist(z)*numpy.exp(-r**2/self.Waist(z)**2)*numpy.exp(-1j*(k*z + 0.5*k*r**2*curvature - self.GouyPhase(z)))
+
+#================================================
+#  mirrors
+#================================================
+
+class MirrorPlane(object):
+    _IsAnalytic = False
+
+    def __init__(self, L=0.4, AngleGrazing=0.0, XYCentre=[0, 0], AngleIn=0.0):
+        self.L = L
+        self.AngleGrazing = AngleGrazing
+        self.ComputationSettings = _ComputationSettings()
+        self._FigureErrors = []
+        self._FigureErrorSteps = []
+        self.SetXYAngle_Centre(XYCentre, AngleIn)
+
+    def SetXYAngle_Centre(self, XYCentre, Angle, **kwargs):
+        self.XYCentre = numpy.array(XYCentre, dtype=float)
+        self.AngleIn = Angle
+
+    @property
+    def AngleTangent(self):
+        return self.AngleIn - self.AngleGrazing
+
+    @property
+    def RayOutNominal(self):
+        return Ray(self.XYCentre, self.AngleIn - 2*self.AngleGrazing)
+
+    @property
+    def FigureErrors(self):
+        return self._FigureErrors
+
+    @property
+    def FigureErrorSteps(self):
+        return self._FigureErrorSteps
+
+    def FigureErrorLoad(self, h=None, Step=1e-3, File='', AmplitudeScaling=1):
+        if h is None and File != None: h = numpy.loadtxt(File)*AmplitudeScaling
+
+        self._FigureErrors.append(h)
+        self._FigureErrorSteps.append(Step)
+
+    def GetXY(self, N, **kwargs):
+        x, y = self.GetXY_IdealMirror(N)
+
+        # the first figure error, resampled on the mirror (whose length is kept), along the normal
+        if self.ComputationSettings.UseFigureError and len(self._FigureErrors) > 0:
+            h = numpy.asarray(self._FigureErrors[0], dtype=float)
+            h = numpy.interp(numpy.linspace(0, 1, int(N)), numpy.linspace(0, 1, h.size), h - numpy.mean(h))
+            normal = _versor(self.AngleTangent + numpy.pi/2)
+
+            x, y = x + h*normal[0], y + h*normal[1]
+
+        return x, y
+
+    def GetXY_IdealMirror(self, N, **kwargs):
+        t = numpy.linspace(-0.5*self.L, 0.5*self.L, int(N))
+        v = _versor(self.AngleTangent)
+
+        return self.XYCentre[0] + t*v[0], self.XYCentre[1] + t*v[1]
+
+    def TransmissionFunction(self, x, y):
+        return 1
+
+    def EvalField(self, x1, y1, Lambda, E0, NPools=1, **kwargs):
+        x0, y0 = self.GetXY(len(E0))
+
+        return rm.HuygensIntegral_1d_MultiPool(Lambda, E0*self.TransmissionFunction(x0, y0), x0, y0, x1, y1, NPools=NPools)
+
+class Detector(MirrorPlane):
+
+    def __init__(self, L=400e-6, AngleGrazing=numpy.pi/2, **kwargs):
+        super(Detector, self).__init__(L=L, AngleGrazing=AngleGrazing, **kwargs)
+
+class MirrorElliptic(MirrorPlane):
+
+    def __init__(self, f1=98.0, f2=1.2, Alpha=0.0, L=0.4):
+        self.f1 = f1
+        self.f2 = f2
+        self.Alpha = Alpha
+
+        super(MirrorElliptic, self).__init__(L=L, AngleGrazing=Alpha)
+
+    def SetXYAngle_UpstreamFocus(self, XYF1, Angle):
+        self.SetXYAngle_Centre(numpy.array(XYF1, dtype=float) + self.f1*_versor(Angle), Angle)
+
+    @property
+    def XYF1(self):
+        return self.XYCentre - self.f1*_versor(self.AngleIn)
+
+    @property
+    def XYF2(self):
+        return self.XYCentre + self.f2*self.RayOutNominal.v
+
+    def GetXY_IdealMirror(self, N, **kwargs):
+        # arc of the ellipse around the centre, sampled along the major axis
+        u = (self.XYF2 - self.XYF1)/numpy.linalg.norm(self.XYF2 - self.XYF1)
+        w = numpy.array([-u[1], u[0]])
+        centre = 0.5*(self.XYF1 + self.XYF2)
+
+        a = 0.5*(self.f1 + self.f2)
+        b = numpy.sqrt(a**2 - (0.5*numpy.linalg.norm(self.XYF2 - self.XYF1))**2)
+
+        u_centre = numpy.dot(self.XYCentre - centre, u)
+        w_sign = numpy.sign(numpy.dot(self.XYCentre - centre, w))
+
+        u_samples = u_centre + numpy.linspace(-0.5*self.L, 0.5*self.L, int(N))*numpy.dot(_versor(self.AngleTangent), u)
+        w_samples = w_sign*b*numpy.sqrt(1 - (u_samples/a)**2)
+
+        return centre[0] + u_samples*u[0] + w_samples*w[0], centre[1] + u_samples*u[1] + w_samples*w[1]
+
+class MirrorSpheric(MirrorElliptic):
+
+    def __init__(self, f1=98.0, f2=1.2, Alpha=numpy.deg2rad(2.5), L=0.4):
+        super(MirrorSpheric, self).__init__(f1=f1, f2=f2, Alpha=Alpha, L=L)
+
+    @property
+    def Radius(self):
+        return 2*self.f1*self.f2/(self.f1 + self.f2)/numpy.sin(self.Alpha)
+
+    def GetXY_IdealMirror(self, N, **kwargs):
+        # the centre of curvature is on the side of the reflected beam
+        centre = self.XYCentre + self.Radius*_versor(self.AngleTangent - numpy.pi/2)
+
+        phi = self.AngleTangent + numpy.pi/2 - numpy.linspace(-0.5*self.L, 0.5*self.L, int(N))/self.Radius
+
+        return centre[0] + self.Radius*numpy.cos(phi), centre[1] + self.Radius*numpy.sin(phi)
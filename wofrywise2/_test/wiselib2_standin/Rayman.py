@@ -0,0 +1,32 @@
+import numpy
+
+def xy_to_s(x, y):
+    if x is None or y is None: return None
+
+    s = numpy.cumsum(numpy.sqrt(numpy.diff(x)**2 + numpy.diff(y)**2))
+
+    return numpy.append(0, s) - s[int(len(s)/2)]
+
+def HalfEnergyWidth_1d(X, UseCentreOfMass=True, Step=1, TotalEnergy=None, AlgorithmType=0):
+    X = numpy.asarray(X, dtype=float)
+    TotalEnergy = X.sum() if TotalEnergy is None else TotalEnergy
+
+    if UseCentreOfMass: iCentre = int(numpy.floor(numpy.sum(numpy.arange(len(X))*X)/X.sum()))
+    else: iCentre = int(X.argmax())
+
+    for i in range(len(X)):
+        if X[max(0, iCentre - i):iCentre + i + 1].sum() >= 0.5*TotalEnergy: return 2*i*Step, iCentre
+
+    return len(X)*Step, iCentre
+
+def HuygensIntegral_1d_MultiPool(Lambda, Ea, xa, ya, xb, yb, NPools=1, Verbose=False):
+    # direct integral of the wiselib2 kernel (HuygensIntegral_1d_Kernel), one target point at a time: a reference
+    # independent of the blocked kernels of wofrywise2
+    k = 2*numpy.pi/Lambda
+
+    Eb = numpy.zeros(len(xb), dtype=complex)
+    for i in range(len(xb)):
+        R = numpy.sqrt((xa - xb[i])**2 + (ya - yb[i])**2)
+        Eb[i] = 1./Lambda**0.5*numpy.sum(Ea/R*numpy.exp(-1j*k*R))
+
+    return Eb
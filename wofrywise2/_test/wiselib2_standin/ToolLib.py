@@ -0,0 +1,20 @@
+import numpy
+
+def FitGaussian1d(y, x=None, PlotFigure=None):
+    y = numpy.asarray(y, dtype=float)
+    x = numpy.arange(len(y)) if x is None else numpy.asarray(x, dtype=float)
+
+    x0 = numpy.sum(x*y)/numpy.sum(y)
+
+    return y.max(), x0, numpy.sqrt(numpy.sum(y*(x - x0)**2)/numpy.sum(y))
+
+def IsArray(x):
+    return isinstance(x, numpy.ndarray) and x.size > 1
+
+def RotXY(x, y, Theta=0, CentreOfRotation=numpy.array([0, 0])):
+    # rotation of the points (x, y) of Theta around CentreOfRotation
+    if Theta == 0: return numpy.array(x), numpy.array(y)
+
+    x0, y0 = CentreOfRotation
+
+    return x0 + (x - x0)*numpy.cos(Theta) - (y - y0)*numpy.sin(Theta), y0 + (x - x0)*numpy.sin(Theta) + (y - y0)*numpy.cos(Theta)
@@ -0,0 +1,26 @@
+"""
+Pure numpy stand-in of the subset of wiselib2 used by wofrywise2 (plane/elliptic mirrors, detectors, gaussian sources),
+for running tests and benchmarks where wiselib2 is not installed. The geometry is simplified: results are not
+meant to reproduce wiselib2 ones.
+
+    from wofrywise2._test import wiselib2_standin
+    wiselib2_standin.install() # before importing any wofrywise2 module
+"""
+import sys
+
+def install(force=False):
+    if not force:
+        try:
+            import wiselib2
+            return False
+        except ImportError:
+            pass
+
+    from wofrywise2._test import wiselib2_standin
+    from wofrywise2._test.wiselib2_standin import Fundation, Optics, FermiSource, Rayman, ToolLib
+
+    sys.modules["wiselib2"] = wiselib2_standin
+    for module in (Fundation, Optics, FermiSource, Rayman, ToolLib):
+        sys.modules["wiselib2." + module.__name__.split(".")[-1]] = module
+
+    return True
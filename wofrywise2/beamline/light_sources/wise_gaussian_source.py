@@ -1,12 +1,15 @@
 
 from wofrywise2.beamline.wise_optical_element import WiseOpticalElement
 
-from wiselib2.Fundation import OpticalElement, PositioningDirectives
-from wiselib2.Optics import SourceGaussian
-
 
 class WiseGaussianSource(WiseOpticalElement):
-    def __init__(self, name="Undefined", source_gaussian = SourceGaussian(Waist0=0.0, Lambda=10.0), position_directives=PositioningDirectives()):
+    def __init__(self, name="Undefined", source_gaussian = None, position_directives=None):
+        from wiselib2.Fundation import OpticalElement, PositioningDirectives
+        from wiselib2.Optics import SourceGaussian
+
+        if source_gaussian is None: source_gaussian = SourceGaussian(Waist0=0.0, Lambda=10.0)
+        if position_directives is None: position_directives = PositioningDirectives()
+
         #:TODO boundary shape must be checked, is actually useless right now
         super(WiseGaussianSource, self).__init__(name=name,
                                                  boundary_shape=None,
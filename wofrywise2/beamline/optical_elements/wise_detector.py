@@ -2,14 +2,17 @@ import numpy
 
 from wofrywise2.beamline.wise_optical_element import WiseOpticalElement
 
-from wiselib2.Fundation import OpticalElement, PositioningDirectives
-from wiselib2.Optics import Detector
-
 class WiseDetector(WiseOpticalElement):
     def __init__(self,
                  name="Undefined",
-                 detector = Detector(L=400e-6, AngleGrazing = numpy.deg2rad(90) ),
-                 position_directives=PositioningDirectives()):
+                 detector=None,
+                 position_directives=None):
+        from wiselib2.Fundation import OpticalElement, PositioningDirectives
+        from wiselib2.Optics import Detector
+
+        if detector is None: detector = Detector(L=400e-6, AngleGrazing = numpy.deg2rad(90) )
+        if position_directives is None: position_directives = PositioningDirectives()
+
         super(WiseDetector, self).__init__(name=name,
                                            boundary_shape=None,
                                            wise_optical_element = OpticalElement(Element=detector,
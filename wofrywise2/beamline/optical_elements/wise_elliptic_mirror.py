@@ -1,18 +1,21 @@
 import numpy
 
-from syned.beamline.shape import Ellipse
-
 from wofrywise2.beamline.wise_optical_element import WiseOpticalElement
 
-from wiselib2.Fundation import OpticalElement, PositioningDirectives
-from wiselib2.Optics import MirrorElliptic
-
 
 class WiseEllipticMirror(WiseOpticalElement):
     def __init__(self,
                  name="Undefined",
-                 elliptic_mirror = MirrorElliptic(f1 = 98, f2 = 1.2, Alpha = numpy.deg2rad(2.5), L = 0.4),
-                 position_directives=PositioningDirectives()):
+                 elliptic_mirror = None,
+                 position_directives=None):
+        from syned.beamline.shape import Ellipse
+
+        from wiselib2.Fundation import OpticalElement, PositioningDirectives
+        from wiselib2.Optics import MirrorElliptic
+
+        if elliptic_mirror is None: elliptic_mirror = MirrorElliptic(f1 = 98, f2 = 1.2, Alpha = numpy.deg2rad(2.5), L = 0.4)
+        if position_directives is None: position_directives = PositioningDirectives()
+
         #:TODO boundary shape must be checked, is actually useless right now
 
         max_0 = 0.0 if position_directives.XYCentre is None else position_directives.XYCentre[0]
@@ -1,14 +1,18 @@
 
-from syned.beamline.shape import Sphere
-
 from wofrywise2.beamline.wise_optical_element import WiseOpticalElement
 
-from wiselib2.Fundation import OpticalElement, PositioningDirectives
-from wiselib2.Optics import MirrorSpheric
-
 
 class WiseSphericMirror(WiseOpticalElement):
-    def __init__(self, name="Undefined", spheric_mirror = MirrorSpheric(), position_directives=PositioningDirectives()):
+    def __init__(self, name="Undefined", spheric_mirror = None, position_directives=None):
+        from syned.beamline.shape import Sphere
+
+        from wiselib2.Fundation import OpticalElement, PositioningDirectives
+        from wiselib2.Optics import MirrorSpheric
+
+        # the default mirror is built only when needed: MirrorSpheric requires the radius R in recent versions of wiselib2
+        if spheric_mirror is None: spheric_mirror = MirrorSpheric()
+        if position_directives is None: position_directives = PositioningDirectives()
+
         #:TODO boundary shape must be checked, is actually useless right now
         super(WiseSphericMirror, self).__init__(name=name,
                                                 boundary_shape=Sphere(radius=spheric_mirror.f2),
@@ -4,7 +4,9 @@ from wofrywise2.beamline.wise_optical_element import WiseOpticalElement
 
 class WiseBeamlineElement(BeamlineElement):
 
-    def __init__(self, optical_element=WiseOpticalElement()):
+    def __init__(self, optical_element=None):
+        if optical_element is None: optical_element = WiseOpticalElement()
+
         super(WiseBeamlineElement, self).__init__(optical_element=optical_element, coordinates=None)
 
 
@@ -1,8 +1,6 @@
 
 from syned.beamline.optical_element import OpticalElement as SynedOpticaElement
 
-from wiselib2.Fundation import OpticalElement
-
 
 class WiseOpticalElement(SynedOpticaElement):
 
@@ -0,0 +1,152 @@
+import collections
+import hashlib
+import os
+import tempfile
+import threading
+
+import numpy
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(tempfile.gettempdir(), "wofrywise2_profiles")
+DEFAULT_MAX_SIZE = 2**30 # bytes on disk
+DEFAULT_MAX_ENTRIES = 32 # memory maps kept open
+
+class WiseProfileCache(object):
+
+    def __init__(self, cache_directory=DEFAULT_CACHE_DIRECTORY, max_size=DEFAULT_MAX_SIZE, max_entries=DEFAULT_MAX_ENTRIES):
+        self.__cache_directory = cache_directory
+        self.__max_size = max_size
+        self.__max_entries = max_entries
+        self.__entries = collections.OrderedDict()
+        self.__content_digests = {}
+        self.__lock = threading.RLock()
+
+    def get_cache_directory(self):
+        return self.__cache_directory
+
+    def load_profile(self, file_name, amplitude_scaling=1.0):
+        key = self.__get_key(file_name, amplitude_scaling)
+
+        return self.__get_entry(key, lambda: numpy.loadtxt(file_name)*amplitude_scaling)
+
+    def load_resampled_profile(self, file_name, step, n_samples, length=None, amplitude_scaling=1.0):
+        key = self.__get_key(file_name, amplitude_scaling, step, n_samples, length)
+
+        return self.__get_entry(key, lambda: resample_profile(self.load_profile(file_name, amplitude_scaling), step, n_samples, length))
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+            if os.path.isdir(self.__cache_directory):
+                for cache_file in self.__get_cache_files(): os.remove(cache_file)
+
+    def get_size(self):
+        with self.__lock:
+            return sum(os.path.getsize(cache_file) for cache_file in self.__get_cache_files())
+
+    # cache files are named after path and content of the profile file, and the loading arguments: the content is
+    # hashed once per modification time and size of the file
+    def __get_key(self, file_name, *arguments):
+        file_name = os.path.abspath(file_name)
+        stat = os.stat(file_name)
+
+        with self.__lock:
+            content_digest = self.__content_digests.get(file_name, None)
+
+            if content_digest is None or content_digest[0] != (stat.st_mtime_ns, stat.st_size):
+                content_digest = ((stat.st_mtime_ns, stat.st_size), _get_file_digest(file_name))
+                self.__content_digests[file_name] = content_digest
+
+        return hashlib.sha1(repr((file_name, content_digest[1]) + arguments).encode("utf-8")).hexdigest()
+
+    def __get_entry(self, key, compute_profile):
+        with self.__lock:
+            cache_file = os.path.join(self.__cache_directory, key + ".npy")
+
+            if key in self.__entries:
+                self.__entries.move_to_end(key)
+
+                # the modification time of the files orders the removals of __store
+                try:
+                    os.utime(cache_file)
+                except OSError: # removed by another cache on the same directory
+                    pass
+
+                return self.__entries[key]
+
+            if os.path.exists(cache_file):
+                os.utime(cache_file)
+            else:
+                self.__store(cache_file, numpy.ascontiguousarray(compute_profile(), dtype=float))
+
+            profile = numpy.load(cache_file, mmap_mode="r")
+
+            self.__entries[key] = profile
+            while len(self.__entries) > self.__max_entries: self.__entries.popitem(last=False)
+
+            return profile
+
+    def __store(self, cache_file, profile):
+        if not os.path.isdir(self.__cache_directory): os.makedirs(self.__cache_directory)
+
+        temporary_file = cache_file + "." + str(os.getpid()) + ".tmp"
+        with open(temporary_file, "wb") as file: numpy.save(file, profile)
+        os.replace(temporary_file, cache_file)
+
+        # least recently used files are removed first
+        cache_files = sorted(self.__get_cache_files(), key=os.path.getmtime)
+        size = sum(os.path.getsize(file) for file in cache_files)
+
+        for file in cache_files:
+            if size <= self.__max_size or file == cache_file: break
+
+            size -= os.path.getsize(file)
+            try:
+                os.remove(file)
+            except OSError: # still mapped by someone else
+                pass
+
+    def __get_cache_files(self):
+        return [os.path.join(self.__cache_directory, file) for file in os.listdir(self.__cache_directory) if file.endswith(".npy")]
+
+def _get_file_digest(file_name):
+    digest = hashlib.sha1()
+
+    with open(file_name, "rb") as file:
+        for block in iter(lambda: file.read(2**20), b""): digest.update(block)
+
+    return digest.hexdigest()
+
+def resample_profile(profile, step, n_samples, length=None):
+    # as Rayman.FastResample1d, over the central portion of the profile of the given length
+    n_profile = len(profile)
+    n_length = n_profile if length is None else length/step
+
+    if n_length > n_profile: raise ValueError("Length of the profile (" + str(n_profile*step) + ") is shorter than " + str(length))
+
+    centre = 0.5*(n_profile - 1)
+
+    return numpy.interp(numpy.linspace(centre - 0.5*(n_length - 1), centre + 0.5*(n_length - 1), n_samples),
+                        numpy.arange(n_profile),
+                        profile - numpy.mean(profile))
+
+_default_profile_cache = None
+
+def get_default_profile_cache():
+    global _default_profile_cache
+
+    if _default_profile_cache is None: _default_profile_cache = WiseProfileCache()
+
+    return _default_profile_cache
+
+def figure_error_load(mirror, File, Step=1e-3, AmplitudeScaling=1, NSamples=None, L=None, profile_cache=None):
+    # same as mirror.FigureErrorLoad(File=File, Step=Step, AmplitudeScaling=AmplitudeScaling), through the binary cache.
+    # If NSamples is given, the profile is stored already resampled for the computation (with NSamples samples on length L)
+    if profile_cache is None: profile_cache = get_default_profile_cache()
+
+    if NSamples is None:
+        mirror.FigureErrorLoad(h=profile_cache.load_profile(File, AmplitudeScaling), Step=Step)
+    else:
+        h = profile_cache.load_resampled_profile(File, Step, NSamples, L, AmplitudeScaling)
+
+        mirror.FigureErrorLoad(h=h, Step=(len(profile_cache.load_profile(File, AmplitudeScaling))*Step if L is None else L)/NSamples)
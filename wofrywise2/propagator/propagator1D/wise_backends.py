@@ -0,0 +1,299 @@
+import threading
+import warnings
+
+import numpy
+
+from wofrywise2.propagator.propagator1D.wise_free_space import free_space_integral_1d, get_free_space_method, ANALYTIC, DIRECT, DEFAULT_PHASE_TOLERANCE
+from wofrywise2.propagator.propagator1D.wise_huygens import huygens_integral_1d, huygens_integral_1d_on_threads, get_block_size, DEFAULT_BLOCK_SIZE
+from wofrywise2.propagator.propagator1D.wise_result_cache import get_fingerprint
+from wofrywise2.propagator.propagator1D.wise_worker_pool import get_worker_state
+
+# The backends compute the fields of a section of the beamline, with the same conventions of
+# Fundation.BeamlineElements.ComputeFields: they are selected by the "backend" additional parameter
+# of the propagation (a name or an instance).
+
+class WiseBackend(object):
+
+    NAME = None
+
+    def get_name(self):
+        return self.NAME
+
+    def get_fingerprint(self):
+        # results of different backends are not mixed in the result caches
+        return self.NAME
+
+    def is_inheriting_sampling(self):
+        # wiselib2 convention: an element downstream of a numerical one is sampled as it is
+        return True
+
+    def set_max_memory(self, max_memory):
+        # the wiselib2 kernel integrates one target point at a time: its memory is linear in the samples
+        if not max_memory is None: _warn_ignored(self, "max_memory")
+
+    def set_free_space_fast_path(self, free_space_fast_path):
+        # the wiselib2 kernel always computes the direct integral
+        pass
+
+    def set_worker_pool(self, worker_pool):
+        if not worker_pool is None: _warn_ignored(self, "the worker pool")
+
+    def set_thread_pool(self, thread_pool, n_threads):
+        if not thread_pool is None: _warn_ignored(self, "the executor \"threads\"")
+
+    def set_block_callback(self, block_callback=None):
+        # block_callback(element name, done, total) after each block of target points of the integrals: the wiselib2
+        # kernel cannot be interrupted, so it is not called
+        if not block_callback is None: _warn_ignored(self, "the block callback")
+
+    def get_n_workers(self):
+        return 1
+
+    def get_worker_busy_time(self):
+        # seconds spent by the worker processes, None when the work is done in this process
+        return None
+
+    def get_integration_methods(self):
+        # element name -> method of the last computation of its field (see wise_free_space), when known
+        return {}
+
+    def compute_fields(self, beamline, oeStart=None, oeEnd=None):
+        raise NotImplementedError()
+
+class Wiselib2Backend(WiseBackend):
+
+    NAME = "wiselib2"
+
+    def get_fingerprint(self):
+        # reference results: the fingerprints are the ones of the plain chain
+        return ""
+
+    def set_worker_pool(self, worker_pool):
+        # wiselib2 uses its own pools (NPools)
+        pass
+
+    def compute_fields(self, beamline, oeStart=None, oeEnd=None):
+        return beamline.ComputeFields(oeStart=oeStart, oeEnd=oeEnd, Verbose=False)
+
+class NumpyBackend(WiseBackend):
+    """
+    Blocked and vectorized numpy implementation of the 1D Huygens-Fresnel integral between consecutive elements:
+    the geometry (positions and sampling of plane, elliptic, spheric mirrors and detectors) and the analytic
+    sources are still evaluated by wiselib2.
+
+    With inherit_sampling=False every element keeps its own number of samples (e.g. from a sampling plan),
+    instead of the one of the upstream element.
+
+    With free_space_fast_path=True the segments between straight, uniform and parallel samplings (e.g. detector to
+    detector) are integrated by FFT, within phase_tolerance (rad): the others by the direct integral.
+    """
+
+    NAME = "numpy"
+
+    def __init__(self, block_size=DEFAULT_BLOCK_SIZE, inherit_sampling=True, free_space_fast_path=True, phase_tolerance=DEFAULT_PHASE_TOLERANCE):
+        self.__block_size = block_size
+        self.__inherit_sampling = inherit_sampling
+        self.__free_space_fast_path = free_space_fast_path
+        self.__phase_tolerance = phase_tolerance
+        self.__integration_methods = {}
+        self.__worker_pool = None
+        self.__thread_pool = None
+        self.__n_threads = 1
+        self.__block_callback = None
+
+    def get_block_size(self):
+        return self.__block_size
+
+    def set_max_memory(self, max_memory):
+        self.__block_size = get_block_size(max_memory)
+
+    def is_using_free_space_fast_path(self):
+        return self.__free_space_fast_path
+
+    def set_free_space_fast_path(self, free_space_fast_path):
+        self.__free_space_fast_path = free_space_fast_path
+
+    def set_worker_pool(self, worker_pool):
+        self.__worker_pool = worker_pool
+
+    def set_thread_pool(self, thread_pool, n_threads):
+        self.__thread_pool = thread_pool
+        self.__n_threads = n_threads
+
+    def set_block_callback(self, block_callback=None):
+        self.__block_callback = block_callback
+
+    def get_n_workers(self):
+        if not self.__thread_pool is None: return self.__n_threads
+        elif not self.__worker_pool is None: return self.__worker_pool.get_n_workers()
+        else: return 1
+
+    def get_worker_busy_time(self):
+        return None if self.__worker_pool is None else self.__worker_pool.get_busy_time()
+
+    def get_integration_methods(self):
+        return dict(self.__integration_methods)
+
+    def __getstate__(self):
+        # worker and thread pools belong to the calling process
+        state = self.__dict__.copy()
+        state["_NumpyBackend__worker_pool"] = None
+        state["_NumpyBackend__thread_pool"] = None
+        state["_NumpyBackend__n_threads"] = 1
+        state["_NumpyBackend__block_callback"] = None
+
+        return state
+
+    def get_fingerprint(self):
+        fingerprint = self.NAME if self.__inherit_sampling else self.NAME + ":element_sampling"
+
+        # the Fresnel fast path is exact within the phase tolerance only
+        return fingerprint + ":free_space=" + repr(self.__phase_tolerance) if self.__free_space_fast_path else fingerprint
+
+    def is_inheriting_sampling(self):
+        return self.__inherit_sampling
+
+    def compute_fields(self, beamline, oeStart=None, oeEnd=None):
+        from wiselib2 import Rayman as rm
+        from wiselib2 import ToolLib as tl
+
+        item_list = beamline.ItemList
+
+        oeStart = beamline.FirstItem if oeStart is None else oeStart
+        oeEnd = item_list[-1] if oeEnd is None else oeEnd
+        oeList = beamline.GetFromTo(oeStart, oeEnd)
+
+        oeLast = beamline.FirstItem if oeStart.Parent is None else oeStart.Parent
+
+        if oeStart == beamline.FirstItem and oeStart.IsSource: Lambda = oeStart.CoreOptics.Lambda
+        else: Lambda = oeStart.ComputationResults.Lambda
+
+        # path and number of the ignored elements after the last computed one
+        total_path = 0
+        n_ignored = 0
+
+        for oeThis in oeList:
+            if oeThis.IsSource: continue
+
+            oeThis.ComputationResults.Lambda = Lambda
+
+            if oeThis.ComputationSettings.Ignore:
+                total_path += oeThis.DistanceFromParent
+                n_ignored += 1
+                continue
+
+            if oeLast.CoreOptics._IsAnalytic:
+                Action = 'Evaluating analytical function (of previous OE on THIS one)'
+                method = ANALYTIC
+
+                # ignored elements are bridged by a virtual copy of this one, placed at the whole distance
+                if n_ignored > 0: oeV = beamline._MakeVirtual(oeThis, oeLast, total_path + oeThis.DistanceFromParent)
+                else: oeV = oeThis
+
+                NSamples = oeV.GetNSamples(Lambda)
+                xV, yV = oeV.GetXY(NSamples)
+
+                Field = oeLast.CoreOptics.EvalField(xV, yV, Lambda=Lambda)
+                xThis, yThis = oeThis.GetXY(NSamples)
+            else:
+                E0 = oeLast.ComputationResults.Field
+
+                NSamples = oeThis.GetNSamples(Lambda)
+                if self.__inherit_sampling and tl.IsArray(E0): NSamples = len(E0)
+
+                xThis, yThis = oeThis.CoreOptics.GetXY(NSamples)
+
+                # the upstream field is integrated on its own samples
+                if self.__inherit_sampling or oeLast.ComputationResults.X is None: xLast, yLast = oeLast.CoreOptics.GetXY(len(E0))
+                else: xLast, yLast = oeLast.ComputationResults.X, oeLast.ComputationResults.Y
+
+                E0 = E0*oeLast.CoreOptics.TransmissionFunction(xLast, yLast)
+
+                callback = None if self.__block_callback is None else _get_block_progress(self.__block_callback, oeThis.Name, len(xThis))
+
+                # the FFT is faster than the direct integral on any number of threads or workers
+                if self.__free_space_fast_path: method = get_free_space_method(Lambda, xLast, yLast, xThis, yThis, phase_tolerance=self.__phase_tolerance)
+                else: method = DIRECT
+
+                if method != DIRECT:
+                    Field, method = free_space_integral_1d(Lambda, E0, xLast, yLast, xThis, yThis, phase_tolerance=self.__phase_tolerance, block_size=self.__block_size, callback=callback)
+                elif not self.__thread_pool is None and self.__n_threads > 1:
+                    Field = huygens_integral_1d_on_threads(Lambda, E0, xLast, yLast, xThis, yThis, self.__thread_pool, self.__n_threads, block_size=self.__block_size, callback=callback)
+                elif not self.__worker_pool is None and self.__worker_pool.get_n_workers() > 1:
+                    # the blocks are computed by the workers: the progress is reported at the end
+                    Field = self.__huygens_integral_1d_on_workers(Lambda, E0, xLast, yLast, xThis, yThis)
+                    if not callback is None: callback(len(xThis))
+                else:
+                    Field = huygens_integral_1d(Lambda, E0, xLast, yLast, xThis, yThis, block_size=self.__block_size, callback=callback)
+
+                if method == DIRECT: Action = 'Evaluating numerical Huygens Fresnel (on oeThis)'
+                else: Action = 'Evaluating numerical Huygens Fresnel by FFT (' + method + ', on oeThis)'
+
+            computation_results = oeThis.ComputationResults
+            computation_results.Field = Field
+            computation_results.NSamples = NSamples
+            computation_results.X = xThis
+            computation_results.Y = yThis
+            computation_results.S = rm.xy_to_s(xThis, yThis)
+            computation_results.Action = Action
+            computation_results.Lambda = Lambda
+            computation_results.Name = oeThis.Name
+
+            self.__integration_methods[oeThis.Name] = method
+
+            oeLast = oeThis
+            total_path = 0
+            n_ignored = 0
+
+        return oeList
+
+    def __huygens_integral_1d_on_workers(self, wavelength, field, xa, ya, xb, yb):
+        n_workers = self.__worker_pool.get_n_workers()
+
+        # the upstream field is shipped to the workers only when it changes (e.g. not when only the detector moves)
+        self.__worker_pool.update_state("upstream_field", get_fingerprint(wavelength, field, xa, ya), (wavelength, field, xa, ya))
+
+        # the memory of the temporary matrices is shared among the workers
+        indexes = numpy.array_split(numpy.arange(len(xb)), n_workers)
+
+        return numpy.concatenate(self.__worker_pool.map(_integrate_upstream_field,
+                                                        [xb[index] for index in indexes],
+                                                        [yb[index] for index in indexes],
+                                                        [max(1, self.__block_size // n_workers)]*n_workers))
+
+def _warn_ignored(backend, option):
+    warnings.warn("The " + str(backend.get_name()) + " backend ignores " + option + " (see the numpy backend)", stacklevel=3)
+
+def _get_block_progress(block_callback, name, total):
+    # the blocks may be completed by several threads
+    lock = threading.Lock()
+    done = [0]
+
+    def callback(n_points):
+        with lock:
+            done[0] += n_points
+            progress = done[0]
+
+        block_callback(name, progress, total)
+
+    return callback
+
+def _integrate_upstream_field(xb, yb, block_size):
+    wavelength, field, xa, ya = get_worker_state("upstream_field")
+
+    return huygens_integral_1d(wavelength, field, xa, ya, xb, yb, block_size=block_size)
+
+_backends = {Wiselib2Backend.NAME : Wiselib2Backend,
+             NumpyBackend.NAME    : NumpyBackend}
+
+def register_backend(name, backend_class):
+    _backends[name] = backend_class
+
+def get_backend_names():
+    return sorted(_backends.keys())
+
+def get_backend(backend=None):
+    if backend is None: return Wiselib2Backend()
+    elif isinstance(backend, WiseBackend): return backend
+    elif backend in _backends: return _backends[backend]()
+    else: raise ValueError("Backend not available: " + str(backend) + " (available: " + ", ".join(get_backend_names()) + ")")
@@ -0,0 +1,162 @@
+import copy
+
+import numpy
+
+from wofrywise2.propagator.propagator1D.wise_field_stack import compute_field_stack
+from wofrywise2.propagator.propagator1D.wise_huygens import DEFAULT_BLOCK_SIZE
+
+# Partially coherent sources as an incoherent sum of coherent modes: I = sum_n w_n |E_n|^2. The modes are propagated
+# in batches through the same positions and samples and only the (weighted) intensity is accumulated.
+
+class WiseCoherentModes(object):
+
+    def get_n_modes(self):
+        raise NotImplementedError()
+
+    def get_weights(self):
+        raise NotImplementedError()
+
+    def evaluate(self, wise_optical_element, x, y, indexes):
+        # fields of the modes (one row per index) emitted by the source element, on the lab coordinates (x, y)
+        raise NotImplementedError()
+
+class WiseGaussianSchellModes(WiseCoherentModes):
+    """
+    Coherent modes of a Gaussian-Schell model source (Starikov and Wolf, JOSA 72, 1982): Hermite-Gaussian beams with
+    the position and wavelength of the Gaussian source of the beamline. sigma is the rms size of the intensity at the
+    waist and coherence_length the rms width of the degree of coherence: for coherence_length >> sigma the first mode
+    is the Gaussian source with Waist0 = 2*sigma.
+    """
+
+    def __init__(self, sigma, coherence_length, n_modes=50):
+        self.__sigma = sigma
+        self.__coherence_length = coherence_length
+        self.__n_modes = n_modes
+
+    def get_sigma(self):
+        return self.__sigma
+
+    def get_coherence_length(self):
+        return self.__coherence_length
+
+    def get_n_modes(self):
+        return self.__n_modes
+
+    def get_waist(self):
+        # waist of the modes (field)
+        return 1/numpy.sqrt(self.__get_c())
+
+    def get_weights(self):
+        # eigenvalues of the cross spectral density exp(-(x1^2 + x2^2)/(4 sigma^2)) exp(-(x1 - x2)^2/(2 coherence_length^2)),
+        # for modes of amplitude 1 on axis: the intensity at the waist is exp(-x^2/(2 sigma^2)), as the one of the Gaussian source
+        a = 1/(4*self.__sigma**2)
+        b = 1/(2*self.__coherence_length**2)
+        c = self.__get_c()
+
+        return numpy.sqrt(2*c/(a + b + c))*(b/(a + b + c))**numpy.arange(self.__n_modes)
+
+    def __get_c(self):
+        a = 1/(4*self.__sigma**2)
+        b = 1/(2*self.__coherence_length**2)
+
+        return numpy.sqrt(a**2 + 2*a*b)
+
+    def evaluate(self, wise_optical_element, x, y, indexes):
+        indexes = numpy.atleast_1d(indexes)
+
+        # Gaussian beam of the waist of the modes, same conventions of SourceGaussian.EvalField
+        core_optics = copy.copy(wise_optical_element.CoreOptics)
+        core_optics.Waist0 = self.get_waist()
+
+        gaussian = core_optics.EvalField(x, y, Lambda=core_optics.Lambda)
+
+        z, r = _get_source_coordinates(core_optics, x, y)
+
+        hermite_functions = _get_hermite_functions(numpy.sqrt(2)*r/core_optics.Waist(z), indexes.max())
+
+        return hermite_functions[indexes]*gaussian*numpy.exp(1j*numpy.outer(indexes, core_optics.GouyPhase(z)))
+
+class WiseCoherentModesResult(object):
+
+    def __init__(self, wavelength, weights, abscissas, intensity, x, y):
+        self.__wavelength = wavelength
+        self.__weights = weights
+        self.__abscissas = abscissas
+        self.__intensity = intensity
+        self.__x = x
+        self.__y = y
+
+    def get_wavelength(self):
+        return self.__wavelength
+
+    def get_weights(self):
+        return self.__weights
+
+    def get_n_modes(self):
+        return len(self.__weights)
+
+    def get_abscissas(self):
+        return self.__abscissas
+
+    def get_intensity(self):
+        return self.__intensity
+
+    def get_x(self):
+        return self.__x
+
+    def get_y(self):
+        return self.__y
+
+def _get_source_coordinates(core_optics, x, y):
+    # (distance from the waist, transverse coordinate) as in SourceGaussian.EvalField_XYLab
+    from wiselib2 import ToolLib as tl
+
+    if core_optics.ComputationSettings.UseSmallDisplacements: delta_theta = core_optics.SmallDisplacements.Rotation
+    else: delta_theta = 0
+
+    origin = core_optics.XYOrigin
+    z, r = tl.RotXY(x, y, CentreOfRotation=origin, Theta=-core_optics.ThetaPropagation - delta_theta)
+
+    return z - origin[0], r - origin[1]
+
+def _get_hermite_functions(u, n_max):
+    # H_n(u) exp(-u^2/2)/sqrt(2^n n!) by the (stable) recurrence of the normalized Hermite functions:
+    # the Gaussian factor exp(-u^2/2) is removed, since it is the one of the beam
+    u = numpy.asarray(u, dtype=float)
+
+    hermite_functions = numpy.empty((int(n_max) + 1, u.size))
+    hermite_functions[0] = 1.0
+    if n_max > 0: hermite_functions[1] = numpy.sqrt(2)*u
+
+    for n in range(1, int(n_max)):
+        hermite_functions[n+1] = numpy.sqrt(2/(n + 1))*u*hermite_functions[n] - numpy.sqrt(n/(n + 1))*hermite_functions[n-1]
+
+    return hermite_functions
+
+def compute_coherent_mode_intensity(beamline, oeEnd, coherent_modes, batch_size=None, block_size=DEFAULT_BLOCK_SIZE, inherit_sampling=True):
+    # the positions must be up to date: each batch of modes shares the kernel of the integrals, only the fields
+    # of the current batch are kept in memory
+    weights = numpy.asarray(coherent_modes.get_weights(), dtype=float)
+    wavelength = beamline.FirstItem.CoreOptics.Lambda
+
+    n_modes = coherent_modes.get_n_modes()
+    if batch_size is None: batch_size = n_modes
+
+    intensity = None
+    for start in range(0, n_modes, batch_size):
+        indexes = numpy.arange(start, min(start + batch_size, n_modes))
+
+        field_stack = compute_field_stack(beamline,
+                                          oeEnd,
+                                          numpy.full(indexes.size, wavelength),
+                                          source_fields=lambda source, x, y, wavelengths, indexes=indexes: coherent_modes.evaluate(source, x, y, indexes),
+                                          sampling_wavelength=wavelength,
+                                          block_size=block_size,
+                                          inherit_sampling=inherit_sampling)
+
+        batch_intensity = numpy.dot(weights[indexes], numpy.abs(field_stack.get_fields())**2)
+
+        if intensity is None: intensity = batch_intensity
+        else: intensity += batch_intensity
+
+    return WiseCoherentModesResult(wavelength, weights, field_stack.get_abscissas(), intensity, field_stack.get_x(), field_stack.get_y())
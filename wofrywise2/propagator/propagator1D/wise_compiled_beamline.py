@@ -0,0 +1,100 @@
+from collections import OrderedDict
+
+from wofrywise2.propagator.propagator1D.wise_result_cache import get_fingerprint, get_optical_element_fingerprint
+
+# A beamline built in one pass from a list of WiseBeamlineElement: the names are checked once, the parent/child links
+# of the elements and the items of the wiselib2 tree are set once (Tree.Append inserts and prints at each element),
+# the positions are solved once by the first propagation and the lookups by name and index are dictionaries. The
+# structure cannot be changed after the compilation: a new compiled beamline is built instead. As in Fundation, an
+# optical element belongs to one beamline only (the parent/child links are stored in the element).
+
+class WiseCompiledBeamline(object):
+
+    def __init__(self, beamline_elements=[]):
+        from wiselib2 import Fundation
+
+        beamline_elements = tuple(beamline_elements)
+        wise_optical_elements = tuple([beamline_element.get_optical_element().wise_optical_element for beamline_element in beamline_elements])
+
+        indexes = {}
+        for index, wise_optical_element in enumerate(wise_optical_elements):
+            if wise_optical_element.Name in indexes: raise ValueError("Duplicate element name: " + str(wise_optical_element.Name))
+
+            indexes[wise_optical_element.Name] = index
+
+        # linear chain: the links left by a previous beamline are replaced
+        for index, wise_optical_element in enumerate(wise_optical_elements):
+            wise_optical_element.Parent = wise_optical_elements[index - 1] if index > 0 else None
+            wise_optical_element.Children = [wise_optical_elements[index + 1]] if index < len(wise_optical_elements) - 1 else []
+
+        # as after an Append of each element
+        wise_propagation_elements = Fundation.BeamlineElements()
+        wise_propagation_elements._Items = OrderedDict([(wise_optical_element.Name, wise_optical_element) for wise_optical_element in wise_optical_elements])
+        if len(wise_optical_elements) > 0:
+            wise_propagation_elements._FirstItem = wise_optical_elements[0]
+            wise_propagation_elements._ActiveItem = wise_optical_elements[-1]
+
+        self.__beamline_elements = beamline_elements
+        self.__wise_optical_elements = wise_optical_elements
+        self.__indexes = indexes
+        self.__wise_propagation_elements = wise_propagation_elements
+
+    def __len__(self):
+        return len(self.__beamline_elements)
+
+    def __eq__(self, other):
+        return isinstance(other, WiseCompiledBeamline) and self.get_hash() == other.get_hash()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.get_hash())
+
+    def get_hash(self):
+        # current content of the elements (positions included): computed at each request, since the elements can be
+        # edited after the compilation
+        return get_fingerprint(tuple([get_optical_element_fingerprint(wise_optical_element) for wise_optical_element in self.__wise_optical_elements]))
+
+    def get_element_hash(self, key):
+        return get_optical_element_fingerprint(self.get_wise_optical_element(key))
+
+    def get_names(self):
+        return [wise_optical_element.Name for wise_optical_element in self.__wise_optical_elements]
+
+    def has_element(self, name):
+        return name in self.__indexes
+
+    def get_index(self, key):
+        # key: name or index
+        if isinstance(key, str):
+            if not key in self.__indexes: raise ValueError("Element not found: " + key)
+
+            return self.__indexes[key]
+        else:
+            return range(len(self.__beamline_elements))[key]
+
+    def get_beamline_elements(self):
+        return self.__beamline_elements
+
+    def get_beamline_element(self, key):
+        return self.__beamline_elements[self.get_index(key)]
+
+    def get_wise_optical_elements(self):
+        return self.__wise_optical_elements
+
+    def get_wise_optical_element(self, key):
+        return self.__wise_optical_elements[self.get_index(key)]
+
+    def get_parent(self, key):
+        index = self.get_index(key)
+
+        return self.__wise_optical_elements[index - 1] if index > 0 else None
+
+    def get_child(self, key):
+        index = self.get_index(key)
+
+        return self.__wise_optical_elements[index + 1] if index < len(self.__wise_optical_elements) - 1 else None
+
+    def get_wise_propagation_elements(self):
+        return self.__wise_propagation_elements
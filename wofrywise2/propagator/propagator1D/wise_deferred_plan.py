@@ -0,0 +1,53 @@
+# Deferred execution of PropagationMode.WHOLE_BEAMLINE: the propagations that do not compute register their last
+# element and the wavefront they return, which is filled by the next computing propagation of the beamline. That
+# propagation covers all the registered elements at once.
+
+class WiseDeferredPlan(object):
+
+    def __init__(self):
+        self.__outputs = []
+
+    def register(self, wise_optical_element, wise_wavefront, lazy_wavefront=None):
+        self.__outputs.append((wise_optical_element, wise_wavefront, lazy_wavefront))
+
+    def is_empty(self):
+        return len(self.__outputs) == 0
+
+    def get_registered_elements(self):
+        names = []
+        for wise_optical_element, _, _ in self.__outputs:
+            if not wise_optical_element.Name in names: names.append(wise_optical_element.Name)
+
+        return names
+
+    def get_span(self, beamline, oeStart, oeEnd):
+        # the smallest section of the beamline including oeStart -> oeEnd and the registered elements still in it
+        item_list = beamline.ItemList
+        indexes = [item_list.index(oeStart), item_list.index(oeEnd)] + \
+                  [item_list.index(wise_optical_element) for wise_optical_element, _, _ in self.__outputs if wise_optical_element in item_list]
+
+        return item_list[min(indexes)], item_list[max(indexes)]
+
+    def fill(self, beamline):
+        # the wavefronts of the computed elements are filled, the others stay registered (e.g. elements out of the span)
+        item_list = beamline.ItemList
+
+        filled = []
+        pending = []
+        for wise_optical_element, wise_wavefront, lazy_wavefront in self.__outputs:
+            computation_results = wise_optical_element.ComputationResults
+
+            if wise_optical_element in item_list and not computation_results is None and not computation_results.Field is None:
+                wise_wavefront.wise_computation_result = computation_results
+                if not lazy_wavefront is None: lazy_wavefront.reset(wise_wavefront)
+
+                filled.append(wise_wavefront if lazy_wavefront is None else lazy_wavefront)
+            elif wise_optical_element in item_list:
+                pending.append((wise_optical_element, wise_wavefront, lazy_wavefront))
+
+        self.__outputs = pending
+
+        return filled
+
+    def clear(self):
+        self.__outputs = []
@@ -0,0 +1,231 @@
+import os
+
+import numpy
+
+from wofrywise2.beamline.wise_profile_cache import figure_error_load
+
+# Monte Carlo of figure errors. A realization is a dictionary {element name : figure error}, the figure error being
+# (h, step) or (file name, step[, amplitude scaling]): it replaces the figure errors of the named elements. The
+# statistics of the results are updated one realization at a time, with a memory independent of their number.
+
+DEFAULT_PERCENTILES = (5, 50, 95)
+
+def apply_figure_errors(wise_propagation_elements, realization):
+    wise_optical_elements = dict([(wise_optical_element.Name, wise_optical_element)
+                                  for wise_optical_element in wise_propagation_elements.get_wise_propagation_elements().ItemList])
+
+    for name, figure_error in realization.items():
+        if not name in wise_optical_elements: raise ValueError("Element not found: " + str(name))
+
+        core_optics = wise_optical_elements[name].CoreOptics
+
+        del core_optics.FigureErrors[:]
+        del core_optics.FigureErrorSteps[:]
+
+        if isinstance(figure_error[0], str):
+            figure_error_load(core_optics, figure_error[0], Step=figure_error[1], AmplitudeScaling=figure_error[2] if len(figure_error) > 2 else 1)
+        else:
+            core_optics.FigureErrorLoad(h=numpy.asarray(figure_error[0], dtype=float), Step=figure_error[1])
+
+        core_optics.ComputationSettings.UseFigureError = True
+
+def figure_errors_from_files(element_name, file_names, step, amplitude_scaling=1):
+    # files are read where the realization is computed (through the profile cache)
+    for file_name in file_names:
+        yield {element_name : (file_name, step, amplitude_scaling)}
+
+def figure_errors_from_psd(element_name, psd, length, n_samples, n_realizations, seed=None):
+    # Gaussian random profiles of one-sided power spectral density psd(f) (m^3, f in 1/m), on length (m) with n_samples:
+    # the variance of the heights is the integral of the psd from 1/length to the Nyquist frequency
+    random_state = numpy.random.RandomState(seed)
+
+    frequencies = numpy.arange(n_samples//2 + 1)/length
+    amplitudes = numpy.zeros(frequencies.size)
+    amplitudes[1:n_samples//2] = numpy.sqrt(2*numpy.asarray(psd(frequencies[1:n_samples//2]), dtype=float)/length)
+
+    for _ in range(n_realizations):
+        coefficients = (random_state.standard_normal(frequencies.size) + 1j*random_state.standard_normal(frequencies.size))/numpy.sqrt(2)
+
+        yield {element_name : (numpy.fft.irfft(0.5*n_samples*amplitudes*coefficients, n=n_samples), length/n_samples)}
+
+def combine_figure_errors(*realizations_list):
+    # e.g. independent realizations of several mirrors
+    for realizations in zip(*realizations_list):
+        realization = {}
+        for item in realizations: realization.update(item)
+
+        yield realization
+
+class _P2Quantile(object):
+    # P-square estimator of a quantile (Jain and Chlamtac, Comm. ACM 28, 1985), for each element of the added arrays
+
+    def __init__(self, p):
+        self.__p = p
+        self.__first_values = []
+        self.__heights = None
+        self.__positions = None
+        self.__desired_positions = numpy.array([0, 2*p, 4*p, 2 + 2*p, 4])
+        self.__increments = numpy.array([0, p/2, p, (1 + p)/2, 1])
+
+    def add(self, value):
+        if self.__heights is None:
+            self.__first_values.append(numpy.array(value, dtype=float))
+
+            if len(self.__first_values) == 5:
+                self.__heights = numpy.sort(numpy.array(self.__first_values), axis=0)
+                self.__positions = numpy.ones(self.__heights.shape)*numpy.arange(5).reshape((5,) + (1,)*(self.__heights.ndim - 1))
+                self.__first_values = None
+
+            return
+
+        heights, positions = self.__heights, self.__positions
+
+        # markers above the cell of the value are shifted
+        cell = numpy.sum(value >= heights[1:4], axis=0)
+        heights[0] = numpy.minimum(heights[0], value)
+        heights[4] = numpy.maximum(heights[4], value)
+
+        for marker in range(1, 5): positions[marker] += marker > cell
+
+        self.__desired_positions += self.__increments
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            for marker in range(1, 4):
+                delta = self.__desired_positions[marker] - positions[marker]
+                is_moving = ((delta >= 1) & (positions[marker+1] - positions[marker] > 1)) | \
+                            ((delta <= -1) & (positions[marker-1] - positions[marker] < -1))
+
+                if not numpy.any(is_moving): continue
+
+                sign = numpy.sign(delta)
+
+                parabolic = heights[marker] + sign/(positions[marker+1] - positions[marker-1])* \
+                            ((positions[marker] - positions[marker-1] + sign)*(heights[marker+1] - heights[marker])/(positions[marker+1] - positions[marker]) +
+                             (positions[marker+1] - positions[marker] - sign)*(heights[marker] - heights[marker-1])/(positions[marker] - positions[marker-1]))
+
+                neighbour_heights = numpy.where(sign > 0, heights[marker+1], heights[marker-1])
+                neighbour_positions = numpy.where(sign > 0, positions[marker+1], positions[marker-1])
+                linear = heights[marker] + sign*(neighbour_heights - heights[marker])/(neighbour_positions - positions[marker])
+
+                height = numpy.where((heights[marker-1] < parabolic) & (parabolic < heights[marker+1]), parabolic, linear)
+
+                heights[marker] = numpy.where(is_moving, height, heights[marker])
+                positions[marker] = numpy.where(is_moving, positions[marker] + sign, positions[marker])
+
+    def get_value(self):
+        if not self.__heights is None: return self.__heights[2].copy()
+        elif len(self.__first_values) > 0: return numpy.percentile(numpy.array(self.__first_values), 100*self.__p, axis=0)
+        else: return None
+
+class WiseRunningStatistics(object):
+    """
+    Mean, variance (Welford), extrema and percentiles (P-square estimates) of a sequence of scalars or arrays.
+    """
+
+    def __init__(self, percentiles=DEFAULT_PERCENTILES):
+        self.__percentiles = tuple(percentiles)
+        self.__count = 0
+        self.__mean = None
+        self.__m2 = None
+        self.__minimum = None
+        self.__maximum = None
+        self.__quantiles = [_P2Quantile(percentile/100) for percentile in self.__percentiles]
+
+    def add(self, value):
+        value = numpy.array(value, dtype=float)
+
+        self.__count += 1
+
+        if self.__mean is None:
+            self.__mean = value.copy()
+            self.__m2 = numpy.zeros(value.shape)
+            self.__minimum = value.copy()
+            self.__maximum = value.copy()
+        else:
+            delta = value - self.__mean
+            self.__mean += delta/self.__count
+            self.__m2 += delta*(value - self.__mean)
+
+            numpy.minimum(self.__minimum, value, out=self.__minimum)
+            numpy.maximum(self.__maximum, value, out=self.__maximum)
+
+        for quantile in self.__quantiles: quantile.add(value)
+
+    def get_count(self):
+        return self.__count
+
+    def get_mean(self):
+        return None if self.__mean is None else self.__mean.copy()[()]
+
+    def get_variance(self):
+        if self.__count < 2: return None if self.__mean is None else numpy.zeros(self.__mean.shape)[()]
+
+        return (self.__m2/(self.__count - 1))[()]
+
+    def get_std(self):
+        variance = self.get_variance()
+
+        return None if variance is None else numpy.sqrt(variance)
+
+    def get_minimum(self):
+        return None if self.__minimum is None else self.__minimum.copy()[()]
+
+    def get_maximum(self):
+        return None if self.__maximum is None else self.__maximum.copy()[()]
+
+    def get_percentiles(self):
+        return self.__percentiles
+
+    def get_percentile(self, percentile):
+        if not percentile in self.__percentiles: raise ValueError("Percentile not computed: " + str(percentile) + " (computed: " + str(self.__percentiles) + ")")
+
+        value = self.__quantiles[self.__percentiles.index(percentile)].get_value()
+
+        return None if value is None else numpy.asarray(value)[()]
+
+class WiseEnsembleResult(object):
+
+    def __init__(self, percentiles=DEFAULT_PERCENTILES):
+        self.__abscissas = None
+        self.__intensity_statistics = WiseRunningStatistics(percentiles)
+        self.__hew_statistics = WiseRunningStatistics(percentiles)
+        self.__sigma_statistics = WiseRunningStatistics(percentiles)
+        self.__realization_files = []
+
+    def add_realization(self, abscissas, intensity, hew, sigma):
+        # the intensities are accumulated on the abscissas of the first realization
+        if self.__abscissas is None: self.__abscissas = numpy.array(abscissas)
+        elif abscissas.shape != self.__abscissas.shape or not numpy.array_equal(abscissas, self.__abscissas):
+            intensity = numpy.interp(self.__abscissas, abscissas, intensity, left=0.0, right=0.0)
+
+        self.__intensity_statistics.add(intensity)
+        self.__hew_statistics.add(hew)
+        self.__sigma_statistics.add(sigma)
+
+    def add_realization_file(self, file_name):
+        self.__realization_files.append(file_name)
+
+    def get_n_realizations(self):
+        return self.__intensity_statistics.get_count()
+
+    def get_abscissas(self):
+        return self.__abscissas
+
+    def get_intensity_statistics(self):
+        return self.__intensity_statistics
+
+    def get_hew_statistics(self):
+        return self.__hew_statistics
+
+    def get_sigma_statistics(self):
+        return self.__sigma_statistics
+
+    def get_realization_files(self):
+        return list(self.__realization_files)
+
+def save_realization(output_directory, index, abscissas, intensity, hew, sigma):
+    file_name = os.path.join(output_directory, "realization_%06d.npz" % index)
+
+    numpy.savez(file_name, abscissas=abscissas, intensity=intensity, hew=hew, sigma=sigma)
+
+    return file_name
@@ -0,0 +1,103 @@
+import copy
+
+import numpy
+
+from wofrywise2.propagator.propagator1D.wise_huygens import huygens_integral_1d_stack, DEFAULT_BLOCK_SIZE
+
+# Propagation of a stack of fields (several wavelengths or coherent modes) from the source to an element, with the
+# conventions of Fundation.BeamlineElements.ComputeFields: positions and samples of the elements are evaluated once
+# for the whole stack, the computation results of the elements are left untouched.
+
+class WiseFieldStack(object):
+
+    def __init__(self, wavelengths, fields, x, y):
+        self.__wavelengths = wavelengths
+        self.__fields = fields
+        self.__x = x
+        self.__y = y
+
+    def get_wavelengths(self):
+        return self.__wavelengths
+
+    def get_fields(self):
+        return self.__fields
+
+    def get_x(self):
+        return self.__x
+
+    def get_y(self):
+        return self.__y
+
+    def get_abscissas(self):
+        from wiselib2 import Rayman as rm
+
+        return rm.xy_to_s(self.__x, self.__y)
+
+def evaluate_source_fields(wise_optical_element, x, y, wavelengths):
+    # the analytic source is evaluated at each wavelength, with all the other parameters unchanged (e.g. the waist)
+    core_optics = copy.copy(wise_optical_element.CoreOptics)
+
+    fields = numpy.empty((len(wavelengths), len(x)), dtype=complex)
+    for index, wavelength in enumerate(wavelengths):
+        if hasattr(core_optics, "Lambda"): core_optics.Lambda = wavelength
+
+        fields[index] = core_optics.EvalField(x, y, Lambda=wavelength)
+
+    return fields
+
+def compute_field_stack(beamline, oeEnd, wavelengths, source_fields=evaluate_source_fields, sampling_wavelength=None, block_size=DEFAULT_BLOCK_SIZE, inherit_sampling=True):
+    # source_fields(source, x, y, wavelengths) gives the rows of the stack on the first computed element.
+    # The samples are the ones of sampling_wavelength (default: the shortest one, which is the most demanding)
+    wavelengths = numpy.atleast_1d(numpy.asarray(wavelengths, dtype=float))
+    if sampling_wavelength is None: sampling_wavelength = wavelengths.min()
+
+    oeSource = beamline.FirstItem
+    if oeSource is None or not oeSource.IsSource or not oeSource.CoreOptics._IsAnalytic:
+        raise ValueError("Field stacks are propagated from an analytic source")
+
+    oeLast = oeSource
+    fields = None
+    xLast = yLast = None
+
+    # path and number of the ignored elements after the last computed one
+    total_path = 0
+    n_ignored = 0
+
+    for oeThis in beamline.GetFromTo(oeSource, oeEnd):
+        if oeThis.IsSource: continue
+
+        if oeThis.ComputationSettings.Ignore:
+            total_path += oeThis.DistanceFromParent
+            n_ignored += 1
+            continue
+
+        if oeLast.CoreOptics._IsAnalytic:
+            if n_ignored > 0: oeV = beamline._MakeVirtual(oeThis, oeLast, total_path + oeThis.DistanceFromParent)
+            else: oeV = oeThis
+
+            NSamples = oeV.GetNSamples(sampling_wavelength)
+            xV, yV = oeV.GetXY(NSamples)
+
+            fields = source_fields(oeLast, xV, yV, wavelengths)
+            xThis, yThis = oeThis.GetXY(NSamples)
+        else:
+            NSamples = oeThis.GetNSamples(sampling_wavelength)
+            if inherit_sampling: NSamples = fields.shape[1]
+
+            xThis, yThis = oeThis.CoreOptics.GetXY(NSamples)
+
+            if inherit_sampling: xLast, yLast = oeLast.CoreOptics.GetXY(fields.shape[1])
+
+            fields = huygens_integral_1d_stack(wavelengths,
+                                               fields*oeLast.CoreOptics.TransmissionFunction(xLast, yLast),
+                                               xLast, yLast, xThis, yThis,
+                                               block_size=block_size)
+
+        xLast, yLast = xThis, yThis
+        oeLast = oeThis
+        total_path = 0
+        n_ignored = 0
+
+    if fields is None: raise ValueError("No field computed up to " + oeEnd.Name)
+
+    return WiseFieldStack(wavelengths, fields, xLast, yLast)
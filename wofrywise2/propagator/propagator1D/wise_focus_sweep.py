@@ -0,0 +1,101 @@
+import numpy
+
+from wofrywise2.propagator.propagator1D.wise_huygens import huygens_integral_1d, DEFAULT_BLOCK_SIZE
+
+class WiseFocusSweepResult(object):
+
+    def __init__(self, defocus_list, abscissas, fields, hew_list, sigma_list, xy_centres):
+        self.__defocus_list = defocus_list
+        self.__abscissas = abscissas
+        self.__fields = fields
+        self.__hew_list = hew_list
+        self.__sigma_list = sigma_list
+        self.__xy_centres = xy_centres
+
+    def get_defocus_list(self):
+        return self.__defocus_list
+
+    def get_abscissas(self):
+        return self.__abscissas
+
+    def get_fields(self):
+        return self.__fields
+
+    def get_intensities(self):
+        return numpy.abs(self.__fields)**2
+
+    def get_hew_list(self):
+        return self.__hew_list
+
+    def get_sigma_list(self):
+        return self.__sigma_list
+
+    def get_xy_centres(self):
+        return self.__xy_centres
+
+def compute_focus_sweep(wise_optical_element, defocus_list, detector_size=50e-6, angle_in_nominal=numpy.deg2rad(90), n_samples=None, block_size=DEFAULT_BLOCK_SIZE):
+    # same geometry of Fundation.FocusSweep: detectors at defocus_list distances from the downstream focus,
+    # the field on the focussing element is propagated to all of them with a single blocked integral
+    from wiselib2 import Fundation, Optics
+    from wiselib2 import Rayman as rm
+
+    computation_results = wise_optical_element.ComputationResults
+
+    if computation_results is None or computation_results.Field is None:
+        raise ValueError("Field on " + wise_optical_element.Name + " has not been computed")
+
+    defocus_list = numpy.atleast_1d(numpy.asarray(defocus_list, dtype=float))
+    if n_samples is None: n_samples = computation_results.NSamples
+
+    # the detector is only placed with respect to the focussing element, which is left untouched
+    detector = Fundation.OpticalElement(Optics.Detector(L=detector_size, AngleGrazing=angle_in_nominal),
+                                        PositioningDirectives=Fundation.PositioningDirectives(ReferTo='upstream',
+                                                                                              PlaceWhat='centre',
+                                                                                              PlaceWhere='downstream focus',
+                                                                                              Distance=0),
+                                        Name='detector')
+
+    x = numpy.empty((defocus_list.size, n_samples))
+    y = numpy.empty((defocus_list.size, n_samples))
+    xy_centres = numpy.empty((defocus_list.size, 2))
+
+    for index, defocus in enumerate(defocus_list):
+        detector.PositioningDirectives.Distance = defocus
+        Fundation.PositioningDirectives_UpdatePosition(detector, wise_optical_element)
+
+        x[index], y[index] = detector.CoreOptics.GetXY(n_samples)
+        xy_centres[index] = detector.CoreOptics.XYCentre
+
+    # the field leaving the focussing element includes its figure errors, as in the propagation
+    fields = huygens_integral_1d(computation_results.Lambda,
+                                 computation_results.Field*wise_optical_element.CoreOptics.TransmissionFunction(computation_results.X, computation_results.Y),
+                                 computation_results.X,
+                                 computation_results.Y,
+                                 x, y,
+                                 block_size=block_size).reshape(x.shape)
+
+    abscissas = numpy.empty(x.shape)
+    hew_list = numpy.zeros(defocus_list.size)
+    sigma_list = numpy.zeros(defocus_list.size)
+
+    for index in range(defocus_list.size):
+        abscissas[index] = rm.xy_to_s(x[index], y[index])
+        hew_list[index], sigma_list[index] = get_hew_and_sigma(fields[index], abscissas[index])
+
+    return WiseFocusSweepResult(defocus_list, abscissas, fields, hew_list, sigma_list, xy_centres)
+
+def get_hew_and_sigma(field, abscissas):
+    from wiselib2 import Rayman as rm
+    from wiselib2 import ToolLib as tl
+
+    intensity = numpy.abs(field)**2
+    intensity = intensity/max(intensity)
+
+    hew, _ = rm.HalfEnergyWidth_1d(intensity, Step=numpy.mean(numpy.diff(abscissas)))
+
+    try:
+        _, _, sigma = tl.FitGaussian1d(intensity, abscissas)
+    except Exception:
+        sigma = numpy.nan
+
+    return hew, sigma
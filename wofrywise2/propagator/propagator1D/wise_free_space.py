@@ -0,0 +1,142 @@
+import numpy
+
+from wofrywise2.propagator.propagator1D.wise_huygens import huygens_integral_1d, DEFAULT_BLOCK_SIZE
+
+# Free-space segments between straight, uniformly sampled and parallel elements (e.g. detector to detector, or a plane
+# mirror to a detector at normal incidence): the distance between two samples depends only on the difference of their
+# indexes, and the Huygens sum of wise_huygens becomes a (Toeplitz) convolution, computed by FFT in O((N+M) log(N+M)).
+#
+# CONVOLUTION: same step on both elements, exact kernel.
+# FRESNEL: different steps, paraxial kernel: the products of the indexes are expanded as in the chirp z transform
+#          (Bluestein), valid when the neglected terms of the distances are within the phase tolerance.
+# DIRECT: the O(N*M) sum of wise_huygens (curved elements, tilted planes, small segments).
+#
+# The fast paths evaluate the same discrete sum on the same samples as the direct one, so they do not add sampling
+# conditions of their own: the positions must only be straight, uniform and parallel within the phase tolerance.
+
+ANALYTIC = "analytic"
+DIRECT = "direct"
+CONVOLUTION = "convolution"
+FRESNEL = "fresnel"
+
+# phase error (rad) allowed to the geometry and to the Fresnel approximation
+DEFAULT_PHASE_TOLERANCE = 1e-3
+
+# below this number of (target, source) couples the direct sum is as fast as the FFT
+DEFAULT_MIN_COUPLES = 2**16
+
+# the positions are not known better than their rounding
+_ROUNDING_ERROR = 8*numpy.finfo(float).eps
+
+def get_free_space_method(wavelength, xa, ya, xb, yb, phase_tolerance=DEFAULT_PHASE_TOLERANCE, min_couples=DEFAULT_MIN_COUPLES):
+    return _get_segment(wavelength, xa, ya, xb, yb, phase_tolerance, min_couples)[0]
+
+def free_space_integral_1d(wavelength, field, xa, ya, xb, yb, phase_tolerance=DEFAULT_PHASE_TOLERANCE, min_couples=DEFAULT_MIN_COUPLES, block_size=DEFAULT_BLOCK_SIZE, callback=None):
+    # field on (xb, yb) and method used: same conventions of huygens_integral_1d
+    field = numpy.ravel(field)
+    xa, ya = numpy.ravel(xa), numpy.ravel(ya)
+    xb, yb = numpy.ravel(xb), numpy.ravel(yb)
+
+    method, segment = _get_segment(wavelength, xa, ya, xb, yb, phase_tolerance, min_couples)
+
+    if method == DIRECT: return huygens_integral_1d(wavelength, field, xa, ya, xb, yb, block_size=block_size, callback=callback), method
+
+    step_a, step_b, offset, is_reversed = segment
+    k = 2*numpy.pi/wavelength
+    indexes = numpy.arange(-(xa.size - 1), xb.size)
+
+    if method == CONVOLUTION:
+        # exact distances, D + (j - i) step
+        distance = numpy.hypot(offset[0] + indexes*step_a[0], offset[1] + indexes*step_a[1])
+
+        output = _toeplitz_product(numpy.exp(-1j*k*distance)/distance, field, xb.size)
+    else:
+        # coordinates along the elements (u = i ha, v = v0 + j hb) and distance z between them:
+        # r ~ |z| + (v - u)^2/(2|z|), and 2 u v = 2 v0 ha i + beta (i^2 + j^2 - (j - i)^2)/(2a)
+        direction = step_a/numpy.hypot(*step_a)
+        ha = numpy.hypot(*step_a)
+        hb = numpy.dot(direction, step_b)
+        v0 = numpy.dot(direction, offset)
+        z = abs(_cross(direction, offset))
+
+        a = k/(2*z)
+        beta = 2*a*ha*hb
+        i = numpy.arange(xa.size)
+        j = numpy.arange(xb.size)
+        u = i*ha
+        v = v0 + j*hb
+
+        source = field*numpy.exp(-1j*(a*u**2 - 2*a*v0*u - 0.5*beta*i**2))
+        output = _toeplitz_product(numpy.exp(-0.5j*beta*indexes**2), source, xb.size)
+        output *= numpy.exp(-1j*(k*z + a*v**2 - 0.5*beta*j**2))/z
+
+    output /= numpy.sqrt(wavelength)
+
+    if not callback is None: callback(xb.size)
+
+    return (output[::-1] if is_reversed else output), method
+
+def _get_segment(wavelength, xa, ya, xb, yb, phase_tolerance, min_couples):
+    # (method, (step on a, step on b, first b - first a, b reversed)) of the segment a -> b
+    if xa.size < 2 or xb.size < 2 or xa.size*xb.size < min_couples: return DIRECT, None
+
+    k = 2*numpy.pi/wavelength
+    tolerance = phase_tolerance/k + _ROUNDING_ERROR*max(numpy.max(numpy.abs(xa)), numpy.max(numpy.abs(ya)), numpy.max(numpy.abs(xb)), numpy.max(numpy.abs(yb)))
+
+    line_a = _get_line(xa, ya, tolerance)
+    line_b = _get_line(xb, yb, tolerance)
+
+    if line_a is None or line_b is None: return DIRECT, None
+
+    (origin_a, step_a), (origin_b, step_b) = line_a, line_b
+
+    # the samples of b are taken in the direction of the ones of a
+    is_reversed = numpy.dot(step_a, step_b) < 0
+    if is_reversed: origin_b, step_b = origin_b + (xb.size - 1)*step_b, -step_b
+
+    offset = origin_b - origin_a
+    direction = step_a/numpy.hypot(*step_a)
+
+    # parallel elements: the distance between them changes less than the tolerance along b
+    if abs(_cross(direction, step_b))*(xb.size - 1) > tolerance: return DIRECT, None
+
+    segment = (step_a, step_b, offset, is_reversed)
+
+    if numpy.hypot(*(step_b - step_a))*(xb.size - 1) <= tolerance: return CONVOLUTION, segment
+
+    z = abs(_cross(direction, offset))
+    if z <= tolerance: return DIRECT, None
+
+    # largest distance along the elements, and neglected terms of the paraxial distance (phase) and of 1/r (amplitude)
+    v0 = numpy.dot(direction, offset)
+    extent_a = (xa.size - 1)*numpy.hypot(*step_a)
+    extent_b = (xb.size - 1)*numpy.dot(direction, step_b)
+    rho = max(abs(v0), abs(v0 + extent_b), abs(v0 - extent_a), abs(v0 + extent_b - extent_a))
+
+    if k*rho**4/(8*z**3) <= phase_tolerance and rho**2/(2*z**2) <= phase_tolerance: return FRESNEL, segment
+    else: return DIRECT, None
+
+def _get_line(x, y, tolerance):
+    # origin and step of samples uniformly spaced on a straight line (within the tolerance), None otherwise
+    origin = numpy.array([x[0], y[0]])
+    step = (numpy.array([x[-1], y[-1]]) - origin)/(x.size - 1)
+
+    if not numpy.any(step): return None
+
+    indexes = numpy.arange(x.size)
+    deviation = numpy.max(numpy.hypot(x - (origin[0] + indexes*step[0]), y - (origin[1] + indexes*step[1])))
+
+    return (origin, step) if deviation <= tolerance else None
+
+def _cross(a, b):
+    # z component of the cross product of two vectors of the plane
+    return a[0]*b[1] - a[1]*b[0]
+
+def _toeplitz_product(kernel, field, n_targets):
+    # output[j] = sum_i kernel[j - i + n_sources - 1] field[i], for j < n_targets: linear convolution by FFT
+    n_sources = field.size
+    size = 1 << (kernel.size + n_sources - 2).bit_length()
+
+    product = numpy.fft.ifft(numpy.fft.fft(kernel, size)*numpy.fft.fft(field, size))
+
+    return product[n_sources - 1 : n_sources - 1 + n_targets]
@@ -0,0 +1,119 @@
+import numpy
+
+try:
+    import numexpr # optional: multithreaded exponentials
+except ImportError:
+    numexpr = None
+
+# number of (target, source) couples evaluated at once: bounds the size of the temporary matrices
+DEFAULT_BLOCK_SIZE = 2**21
+
+# bytes of the temporary matrices per (target, source) couple: two float and one complex buffers
+BYTES_PER_COUPLE = 32
+
+def get_block_size(max_memory):
+    return max(1, int(max_memory // BYTES_PER_COUPLE))
+
+def huygens_integral_1d(wavelength, field, xa, ya, xb, yb, block_size=DEFAULT_BLOCK_SIZE, output=None, use_numexpr=True, callback=None):
+    # callback(n_points) is called after each block of target points (e.g. progress, or an exception to interrupt)
+    field = numpy.ravel(field)
+    xa, ya = numpy.ravel(xa), numpy.ravel(ya)
+    xb, yb = numpy.ravel(xb), numpy.ravel(yb)
+
+    if output is None: output = numpy.empty(xb.size, dtype=complex)
+
+    k = 2*numpy.pi/wavelength
+    block_rows = max(1, min(xb.size, int(block_size // max(1, xa.size))))
+
+    # the temporary matrices are allocated once and reused by all the blocks
+    distance_buffer = numpy.empty((block_rows, xa.size))
+    square_buffer = numpy.empty((block_rows, xa.size))
+    kernel_buffer = numpy.empty((block_rows, xa.size), dtype=complex)
+
+    for start in range(0, xb.size, block_rows):
+        end = min(start + block_rows, xb.size)
+
+        # same rounding of the (long) distances as the wiselib2 kernel: the phases are very sensitive to it
+        distance = numpy.subtract(xa, xb[start:end, numpy.newaxis], out=distance_buffer[:end-start])
+        numpy.square(distance, out=distance)
+        square = numpy.subtract(ya, yb[start:end, numpy.newaxis], out=square_buffer[:end-start])
+        numpy.square(square, out=square)
+        distance += square
+        numpy.sqrt(distance, out=distance)
+
+        kernel = numpy.multiply(distance, -1j*k, out=kernel_buffer[:end-start])
+        if use_numexpr and not numexpr is None:
+            numexpr.evaluate("exp(kernel)/distance", local_dict={"kernel" : kernel, "distance" : distance}, out=kernel)
+        else:
+            numpy.exp(kernel, out=kernel)
+            kernel /= distance
+
+        numpy.dot(kernel, field, out=output[start:end])
+
+        if not callback is None: callback(end - start)
+
+    output /= numpy.sqrt(wavelength)
+
+    return output
+
+def huygens_integral_1d_on_threads(wavelength, field, xa, ya, xb, yb, thread_pool, n_threads, block_size=DEFAULT_BLOCK_SIZE, output=None, callback=None):
+    # numpy releases the GIL in the ufuncs and in the BLAS reductions: the threads share the fields and write
+    # their blocks of target points in the same output. numexpr serializes its calls, so it is not used here.
+    xb, yb = numpy.ravel(xb), numpy.ravel(yb)
+
+    if output is None: output = numpy.empty(xb.size, dtype=complex)
+
+    bounds = numpy.linspace(0, xb.size, n_threads + 1).astype(int)
+
+    futures = [thread_pool.submit(huygens_integral_1d, wavelength, field, xa, ya, xb[start:end], yb[start:end],
+                                  block_size=max(1, block_size // n_threads), output=output[start:end], use_numexpr=False, callback=callback)
+               for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+    for future in futures: future.result()
+
+    return output
+
+def huygens_integral_1d_stack(wavelengths, fields, xa, ya, xb, yb, block_size=DEFAULT_BLOCK_SIZE, output=None, use_numexpr=True):
+    # a stack of fields (one row per wavelength or mode) on the same samples: the distances of each block are computed
+    # once for all the rows, the kernel once per wavelength and applied to all the rows sharing it (matrix product)
+    wavelengths = numpy.ravel(wavelengths)
+    fields = numpy.atleast_2d(fields)
+    xa, ya = numpy.ravel(xa), numpy.ravel(ya)
+    xb, yb = numpy.ravel(xb), numpy.ravel(yb)
+
+    if output is None: output = numpy.empty((fields.shape[0], xb.size), dtype=complex)
+
+    unique_wavelengths, rows_of_wavelength = numpy.unique(wavelengths, return_inverse=True)
+    rows_list = [numpy.flatnonzero(rows_of_wavelength == index) for index in range(unique_wavelengths.size)]
+
+    block_rows = max(1, min(xb.size, int(block_size // max(1, xa.size))))
+
+    distance_buffer = numpy.empty((block_rows, xa.size))
+    square_buffer = numpy.empty((block_rows, xa.size))
+    kernel_buffer = numpy.empty((block_rows, xa.size), dtype=complex)
+
+    for start in range(0, xb.size, block_rows):
+        end = min(start + block_rows, xb.size)
+
+        distance = numpy.subtract(xa, xb[start:end, numpy.newaxis], out=distance_buffer[:end-start])
+        numpy.square(distance, out=distance)
+        square = numpy.subtract(ya, yb[start:end, numpy.newaxis], out=square_buffer[:end-start])
+        numpy.square(square, out=square)
+        distance += square
+        numpy.sqrt(distance, out=distance)
+
+        for wavelength, rows in zip(unique_wavelengths, rows_list):
+            k = 2*numpy.pi/wavelength
+            kernel = numpy.multiply(distance, -1j*k, out=kernel_buffer[:end-start])
+            if use_numexpr and not numexpr is None:
+                numexpr.evaluate("exp(kernel)/distance", local_dict={"kernel" : kernel, "distance" : distance}, out=kernel)
+            else:
+                numpy.exp(kernel, out=kernel)
+                kernel /= distance
+
+            if rows.size == 1: output[rows[0], start:end] = numpy.dot(kernel, fields[rows[0]])
+            else: output[rows, start:end] = numpy.dot(fields[rows], kernel.T)
+
+    output /= numpy.sqrt(wavelengths)[:, numpy.newaxis]
+
+    return output
@@ -0,0 +1,69 @@
+import numpy
+
+from wofrywise2.propagator.propagator1D.wise_field_stack import compute_field_stack
+from wofrywise2.propagator.propagator1D.wise_huygens import DEFAULT_BLOCK_SIZE
+
+class WisePolychromaticResult(object):
+
+    def __init__(self, wavelengths, weights, abscissas, fields, x, y):
+        self.__wavelengths = wavelengths
+        self.__weights = weights
+        self.__abscissas = abscissas
+        self.__fields = fields
+        self.__x = x
+        self.__y = y
+
+    def get_wavelengths(self):
+        return self.__wavelengths
+
+    def get_weights(self):
+        return self.__weights
+
+    def get_abscissas(self):
+        return self.__abscissas
+
+    def get_fields(self):
+        # wavelength x position
+        return self.__fields
+
+    def get_intensities(self):
+        return numpy.abs(self.__fields)**2
+
+    def get_integrated_intensity(self):
+        # incoherent sum over the spectrum
+        return numpy.dot(self.__weights, self.get_intensities())
+
+    def get_computation_results(self, index):
+        from wiselib2.Fundation import ComputationResults
+
+        computation_results = ComputationResults()
+        computation_results.Lambda = self.__wavelengths[index]
+        computation_results.Field = self.__fields[index]
+        computation_results.NSamples = self.__fields.shape[1]
+        computation_results.X = self.__x
+        computation_results.Y = self.__y
+        computation_results.S = self.__abscissas
+
+        return computation_results
+
+def compute_polychromatic_fields(beamline, oeEnd, wavelengths, weights=None, block_size=DEFAULT_BLOCK_SIZE, inherit_sampling=True):
+    # the positions must be up to date: all the wavelengths share the samples of the shortest one
+    wavelengths = numpy.atleast_1d(numpy.asarray(wavelengths, dtype=float))
+
+    # the weights are normalized to 1 (default: uniform spectrum)
+    if weights is None: weights = numpy.ones(wavelengths.size)
+    else: weights = numpy.atleast_1d(numpy.asarray(weights, dtype=float))
+
+    if weights.shape != wavelengths.shape: raise ValueError("Wavelengths and weights must have the same length: " + str(wavelengths.size) + " != " + str(weights.size))
+    if not numpy.sum(weights) > 0: raise ValueError("The sum of the weights must be positive")
+
+    weights = weights/numpy.sum(weights)
+
+    field_stack = compute_field_stack(beamline, oeEnd, wavelengths, block_size=block_size, inherit_sampling=inherit_sampling)
+
+    return WisePolychromaticResult(wavelengths,
+                                   weights,
+                                   field_stack.get_abscissas(),
+                                   field_stack.get_fields(),
+                                   field_stack.get_x(),
+                                   field_stack.get_y())
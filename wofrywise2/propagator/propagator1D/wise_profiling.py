@@ -0,0 +1,193 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy
+
+try:
+    import resource # not available on Windows
+except ImportError:
+    resource = None
+
+# Per element record of a propagation, enabled by the "profile" additional parameter and attached to the returned
+# wavefront. When "profile_memory" is set as well, the allocations are traced (tracemalloc): this slows down the
+# python code of the computation, so it is not done by default.
+
+COMPUTED = "computed"
+RESTORED_FROM_CACHE = "restored_from_cache"
+RESTORED_FROM_STORE = "restored_from_store"
+
+_ARRAY_ATTRIBUTES = ("X", "Y", "S", "Field")
+
+def _get_max_rss():
+    if resource is None: return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return max_rss if sys.platform == "darwin" else max_rss*1024 # bytes on macOS, kilobytes elsewhere
+
+def _get_result_bytes(computation_results):
+    return int(sum([getattr(computation_results, attribute).nbytes for attribute in _ARRAY_ATTRIBUTES
+                    if isinstance(getattr(computation_results, attribute, None), numpy.ndarray)]))
+
+def _get_n_samples(computation_results):
+    field = getattr(computation_results, "Field", None)
+
+    if isinstance(field, numpy.ndarray): return int(field.size)
+    elif not getattr(computation_results, "NSamples", None) is None: return int(computation_results.NSamples)
+    else: return 0
+
+class WisePropagationProfile(object):
+
+    def __init__(self, trace_memory=False):
+        self.__trace_memory = trace_memory
+        self.__records = []
+        self.__start_time = time.perf_counter()
+        self.__wall_time = None
+        self.__started_tracing = False
+
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracing = True
+
+    def is_tracing_memory(self):
+        return self.__trace_memory
+
+    def start_element(self, backend=None):
+        if self.__trace_memory:
+            # peak and allocations are measured element by element
+            if hasattr(tracemalloc, "reset_peak"): tracemalloc.reset_peak()
+            else: tracemalloc.clear_traces()
+
+            traced_memory = tracemalloc.get_traced_memory()[0]
+        else:
+            traced_memory = None
+
+        busy_time = None if backend is None else backend.get_worker_busy_time()
+
+        return time.perf_counter(), time.process_time(), traced_memory, busy_time
+
+    def stop_element(self, measure, wise_optical_element, event=COMPUTED, backend=None, n_elements=1):
+        start_time, start_process_time, start_traced_memory, start_busy_time = measure
+
+        wall_time = time.perf_counter() - start_time
+        cpu_time = time.process_time() - start_process_time
+
+        if self.__trace_memory:
+            traced_memory, peak_memory = tracemalloc.get_traced_memory()
+            bytes_allocated = max(0, traced_memory - start_traced_memory)
+        else:
+            peak_memory = None
+            bytes_allocated = None
+
+        # utilization of the workers: busy time of the processes of a pool, or CPU time of this process (threads)
+        n_workers = 1 if backend is None else backend.get_n_workers()
+        busy_time = None if backend is None else backend.get_worker_busy_time()
+
+        if event != COMPUTED or wall_time <= 0: worker_utilization = None
+        elif busy_time is None or start_busy_time is None or busy_time == start_busy_time: worker_utilization = min(1.0, cpu_time/(wall_time*n_workers))
+        else: worker_utilization = min(1.0, (busy_time - start_busy_time)/(wall_time*n_workers))
+
+        computation_results = wise_optical_element.ComputationResults
+
+        self.__records.append({"name" : wise_optical_element.Name,
+                               "event" : event,
+                               "cache_hit" : event != COMPUTED,
+                               "start" : start_time - self.__start_time,
+                               "wall_time" : wall_time,
+                               "cpu_time" : cpu_time,
+                               "n_elements" : n_elements,
+                               "n_samples" : _get_n_samples(computation_results),
+                               "result_bytes" : _get_result_bytes(computation_results),
+                               "bytes_allocated" : bytes_allocated,
+                               "peak_memory" : peak_memory,
+                               "max_rss" : _get_max_rss(),
+                               "backend" : None if backend is None else backend.get_name(),
+                               "integration_method" : None if backend is None or event != COMPUTED else backend.get_integration_methods().get(wise_optical_element.Name),
+                               "n_workers" : n_workers,
+                               "worker_utilization" : worker_utilization})
+
+    def stop(self):
+        if self.__wall_time is None:
+            self.__wall_time = time.perf_counter() - self.__start_time
+
+            if self.__started_tracing:
+                tracemalloc.stop()
+                self.__started_tracing = False
+
+    def get_wall_time(self):
+        return time.perf_counter() - self.__start_time if self.__wall_time is None else self.__wall_time
+
+    def get_records(self):
+        return [dict(record) for record in self.__records]
+
+    def get_record(self, name):
+        # the last record of the element
+        for record in reversed(self.__records):
+            if record["name"] == name: return dict(record)
+
+        raise KeyError(name)
+
+    def get_cache_hits(self):
+        return len([record for record in self.__records if record["cache_hit"]])
+
+    def get_cache_misses(self):
+        return len([record for record in self.__records if not record["cache_hit"]])
+
+    def to_dict(self):
+        return {"wall_time" : self.get_wall_time(),
+                "cache_hits" : self.get_cache_hits(),
+                "cache_misses" : self.get_cache_misses(),
+                "elements" : self.get_records()}
+
+    def to_json(self, indent=None):
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_chrome_trace(self):
+        # Trace Event Format (chrome://tracing, Perfetto): complete events, times in microseconds
+        pid = os.getpid()
+
+        trace_events = [{"name" : "propagation", "cat" : "wise", "ph" : "X", "pid" : pid, "tid" : 0,
+                         "ts" : 0.0, "dur" : self.get_wall_time()*1e6,
+                         "args" : {"cache_hits" : self.get_cache_hits(), "cache_misses" : self.get_cache_misses()}}]
+
+        for record in self.__records:
+            trace_events.append({"name" : record["name"], "cat" : record["event"], "ph" : "X", "pid" : pid, "tid" : 1,
+                                 "ts" : record["start"]*1e6, "dur" : record["wall_time"]*1e6,
+                                 "args" : dict([(key, value) for key, value in record.items() if not key in ("name", "start", "wall_time")])})
+
+            if not record["peak_memory"] is None:
+                trace_events.append({"name" : "peak_memory", "ph" : "C", "pid" : pid, "tid" : 1,
+                                     "ts" : record["start"]*1e6, "args" : {"bytes" : record["peak_memory"]}})
+
+        return {"traceEvents" : trace_events, "displayTimeUnit" : "ms"}
+
+    def save_json(self, file_name, indent=2):
+        with open(file_name, "w") as file: file.write(self.to_json(indent=indent))
+
+    def save_chrome_trace(self, file_name):
+        with open(file_name, "w") as file: json.dump(self.to_chrome_trace(), file)
+
+    def __str__(self):
+        text = "Propagation profile (wall time = %.4f s, cache hits = %d)\n" % (self.get_wall_time(), self.get_cache_hits())
+        text += "%-20s %-20s %-12s %10s %10s %12s %12s %8s\n" % ("element", "event", "method", "wall [s]", "samples", "result [B]", "peak [B]", "util.")
+
+        for record in self.__records:
+            text += "%-20s %-20s %-12s %10.4f %10d %12d %12s %8s\n" % (record["name"],
+                                                                     record["event"],
+                                                                     "-" if record["integration_method"] is None else record["integration_method"],
+                                                                     record["wall_time"],
+                                                                     record["n_samples"],
+                                                                     record["result_bytes"],
+                                                                     "-" if record["peak_memory"] is None else str(record["peak_memory"]),
+                                                                     "-" if record["worker_utilization"] is None else "%.2f" % record["worker_utilization"])
+        return text
+
+    def __getstate__(self):
+        # the profile travels back from the worker processes, the tracing belongs to the process that started it
+        state = self.__dict__.copy()
+        state["_WisePropagationProfile__started_tracing"] = False
+
+        return state
@@ -1,57 +1,247 @@
+import copy
+import itertools
+import os
+import threading
 import numpy
 
-import scipy.constants as codata
-angstroms_to_eV = codata.h*codata.c/codata.e*1e10
-
 from wofry.propagator.wavefront1D.generic_wavefront import GenericWavefront1D
 from wofry.propagator.propagator import Propagator1D, PropagationParameters, PropagationElements, PropagationManager, PropagationMode
 
-from wofrywise2.propagator.wavefront1D.wise_wavefront import WiseWavefront
-from wofrywise2.beamline.wise_beamline_element import WiseBeamlineElement
+from wofrywise2.propagator.wavefront1D.wise_wavefront import WiseWavefront, WiseLazyWavefront, can_share_arrays
+from wofrywise2.propagator.propagator1D.wise_compiled_beamline import WiseCompiledBeamline
+from wofrywise2.propagator.propagator1D.wise_deferred_plan import WiseDeferredPlan
+from wofrywise2.propagator.propagator1D.wise_profiling import WisePropagationProfile, COMPUTED, RESTORED_FROM_CACHE, RESTORED_FROM_STORE
+from wofrywise2.propagator.propagator1D.wise_sampling import compute_sampling_plan, apply_sampling_plan, DEFAULT_SAFETY_FACTOR, DEFAULT_MIN_SAMPLES
+from wofrywise2.propagator.propagator1D.wise_result_cache import WiseResultCache, get_chain_fingerprints, get_geometry_fingerprint, is_cacheable
 
-from wiselib2 import Fundation, Optics
+# the kernels (numexpr), the backends, the worker pools (multiprocessing), the result store and the ensembles are
+# imported at their first use, as wiselib2
 
 WISE_APPLICATION = "WISEr"
 
+def __getattr__(name):
+    # scipy.constants is imported at the first use of the conversion factor
+    if name == "angstroms_to_eV":
+        import scipy.constants as codata
+
+        return codata.h*codata.c/codata.e*1e10
+
+    raise AttributeError("module " + repr(__name__) + " has no attribute " + repr(name))
+
+class WisePropagationCancelled(Exception):
+    pass
+
 class WisePropagationElements(PropagationElements):
 
     __wise_propagation_elements = None
+    __result_cache = None
+    __result_store = None
+    __geometry_dirty = True
+    __geometry_fingerprint = None
+    __propagation_stats = None
+    __propagation_stats_hook = None
+    __sampling_plan = None
+    __sampling_plan_hook = None
+    __deferred_plan = None
+    __compiled_beamline = None
 
     def __init__(self):
+        from wiselib2 import Fundation
+
         super(WisePropagationElements, self).__init__()
 
         self.__wise_propagation_elements = Fundation.BeamlineElements()
+        self.__result_cache = WiseResultCache()
+        self.__propagation_stats = {}
+
+    def add_beamline_element(self, beamline_element=None):
+        if beamline_element is None: raise ValueError("Beamline element is None")
 
-    def add_beamline_element(self, beamline_element=WiseBeamlineElement()):
         super(WisePropagationElements, self).add_beamline_element(beamline_element)
 
         self.__wise_propagation_elements.Append(beamline_element.get_optical_element().wise_optical_element)
+        self.__compiled_beamline = None
+        self.set_geometry_dirty()
+
+    def insert_beamline_element(self, index, new_element=None, mode=PropagationElements.INSERT_BEFORE):
+        if new_element is None: raise ValueError("Beamline element is None")
 
-    def insert_beamline_element(self, index, new_element=WiseBeamlineElement(), mode=PropagationElements.INSERT_BEFORE):
         super(WisePropagationElements, self).insert_beamline_element(index, new_element, mode)
 
         self.__wise_propagation_elements.Insert(new_element.get_optical_element().wise_optical_element,
                                                 ExistingName=self.get_wise_propagation_element(index).Name,
                                                 Mode=mode+1)
-
+        self.__compiled_beamline = None
+        self.set_geometry_dirty()
 
     def add_beamline_elements(self, beamline_elements=[]):
         for beamline_element in beamline_elements:
             self.add_beamline_element(beamline_element)
 
+    def set_compiled_beamline(self, compiled_beamline):
+        # the elements are replaced by the ones of the compiled beamline, sharing its wiselib2 tree
+        self.__clear_propagation_elements()
+
+        for beamline_element in compiled_beamline.get_beamline_elements():
+            super(WisePropagationElements, self).add_beamline_element(beamline_element)
+
+        self.__wise_propagation_elements = compiled_beamline.get_wise_propagation_elements()
+        self.__compiled_beamline = compiled_beamline
+        if not self.__deferred_plan is None: self.__deferred_plan.clear()
+        self.set_geometry_dirty()
+
+    def __clear_propagation_elements(self):
+        # PropagationElements has no removal: its lists are emptied in place
+        del self.get_propagation_elements()[:]
+        del self.get_propagation_elements_parameters()[:]
+
+    def get_compiled_beamline(self):
+        # None after any change of the structure
+        return self.__compiled_beamline
+
+    def compile(self):
+        if self.__compiled_beamline is None:
+            self.set_compiled_beamline(WiseCompiledBeamline(self.get_propagation_elements()))
+
+        return self.__compiled_beamline
+
     def get_wise_propagation_element(self, index):
         return self.get_propagation_element(index).get_optical_element().wise_optical_element
 
     def get_wise_propagation_elements(self):
         return self.__wise_propagation_elements
 
+    def get_result_cache(self):
+        return self.__result_cache
+
+    def clear_result_cache(self):
+        self.__result_cache.clear()
+
+    def get_result_store(self):
+        return self.__result_store
+
+    def set_result_store(self, result_store=None):
+        # a directory name is accepted as well
+        if isinstance(result_store, str):
+            from wofrywise2.propagator.propagator1D.wise_result_store import WiseResultStore
+
+            result_store = WiseResultStore(result_store)
+
+        self.__result_store = result_store
+
+    def set_geometry_dirty(self):
+        self.__geometry_dirty = True
+
+    def is_geometry_dirty(self):
+        return self.__geometry_dirty or \
+               self.__geometry_fingerprint != get_geometry_fingerprint(self.__wise_propagation_elements.ItemList)
+
+    def refresh_positions(self, force=False):
+        # edits of the positioning directives are detected by comparing the geometry with the one of the last solve
+        geometry_fingerprint = get_geometry_fingerprint(self.__wise_propagation_elements.ItemList)
+
+        if force or self.__geometry_dirty or self.__geometry_fingerprint != geometry_fingerprint:
+            self.__wise_propagation_elements.RefreshPositions()
+
+            self.__geometry_fingerprint = get_geometry_fingerprint(self.__wise_propagation_elements.ItemList)
+            self.__geometry_dirty = False
+
+            return True
+        else:
+            return False
+
+    def get_propagation_stats(self):
+        return dict(self.__propagation_stats)
+
+    def set_propagation_stats(self, propagation_stats):
+        self.__propagation_stats = dict(propagation_stats)
+
+        if not self.__propagation_stats_hook is None: self.__propagation_stats_hook(self.get_propagation_stats())
+
+    def set_propagation_stats_hook(self, propagation_stats_hook=None):
+        self.__propagation_stats_hook = propagation_stats_hook
+
+    def compute_sampling_plan(self, wavelength=None, safety_factor=DEFAULT_SAFETY_FACTOR, min_samples=DEFAULT_MIN_SAMPLES, max_samples=None, inherit_sampling=True):
+        # distances are the ones of the current positions
+        self.refresh_positions()
+
+        return compute_sampling_plan(self.__wise_propagation_elements,
+                                     wavelength=wavelength,
+                                     safety_factor=safety_factor,
+                                     min_samples=min_samples,
+                                     max_samples=max_samples,
+                                     inherit_sampling=inherit_sampling)
+
+    def apply_sampling_plan(self, sampling_plan):
+        # the plan is reported before any field is computed with it: the hook can change the samples of the elements
+        if not self.__sampling_plan_hook is None: self.__sampling_plan_hook(sampling_plan)
+
+        apply_sampling_plan(self.__wise_propagation_elements, sampling_plan)
+
+        self.__sampling_plan = sampling_plan
+
+    def get_sampling_plan(self):
+        return self.__sampling_plan
+
+    def set_sampling_plan_hook(self, sampling_plan_hook=None):
+        self.__sampling_plan_hook = sampling_plan_hook
+
+    def get_deferred_plan(self):
+        if self.__deferred_plan is None: self.__deferred_plan = WiseDeferredPlan()
+
+        return self.__deferred_plan
+
+    def __getstate__(self):
+        # the hooks belong to the calling process
+        state = self.__dict__.copy()
+        state["_WisePropagationElements__propagation_stats_hook"] = None
+        state["_WisePropagationElements__sampling_plan_hook"] = None
+        state["_WisePropagationElements__deferred_plan"] = None # the registered wavefronts belong to the calling process
+
+        return state
+
 class WisePropagator(Propagator1D):
 
     HANDLER_NAME = "WISE2_PROPAGATOR"
 
+    __worker_pools = None
+    __thread_pools = None
+
     def get_handler_name(self):
         return self.HANDLER_NAME
 
+    def get_worker_pool(self, n_workers=None):
+        # pools are started on first use and reused by the following propagations
+        from wofrywise2.propagator.propagator1D.wise_worker_pool import WiseWorkerPool
+
+        if self.__worker_pools is None: self.__worker_pools = {}
+
+        n_workers = max(1, int(n_workers or os.cpu_count() or 1))
+        if not n_workers in self.__worker_pools: self.__worker_pools[n_workers] = WiseWorkerPool(n_workers)
+
+        return self.__worker_pools[n_workers]
+
+    def get_thread_pool(self, n_threads=None):
+        from concurrent.futures import ThreadPoolExecutor
+
+        if self.__thread_pools is None: self.__thread_pools = {}
+
+        n_threads = max(1, int(n_threads or os.cpu_count() or 1))
+        if not n_threads in self.__thread_pools: self.__thread_pools[n_threads] = ThreadPoolExecutor(max_workers=n_threads, thread_name_prefix="WiseThread")
+
+        return self.__thread_pools[n_threads]
+
+    def shutdown_worker_pools(self):
+        if not self.__worker_pools is None:
+            for worker_pool in self.__worker_pools.values(): worker_pool.shutdown()
+
+            self.__worker_pools = None
+
+        if not self.__thread_pools is None:
+            for thread_pool in self.__thread_pools.values(): thread_pool.shutdown()
+
+            self.__thread_pools = None
+
     def do_propagation(self, parameters=PropagationParameters()):
         wavefront = parameters.get_wavefront()
 
@@ -63,8 +253,11 @@ class WisePropagator(Propagator1D):
         if not is_generic_wavefront and not wavefront is None:
             if not isinstance(wavefront, WiseWavefront): raise ValueError("Wavefront cannot be managed by this propagator")
 
-        if is_generic_wavefront:
-            wavefront = WiseWavefront.fromGenericWavefront(wavefront)
+        if isinstance(wavefront, WiseLazyWavefront):
+            wavefront = wavefront.get_wise_wavefront()
+        elif is_generic_wavefront:
+            # fields of other types (e.g. complex64) are converted instead of shared
+            wavefront = WiseWavefront.fromGenericWavefront(wavefront, copy=not can_share_arrays(wavefront))
 
         wise_propagation_elements = parameters.get_PropagationElements()
 
@@ -76,19 +269,648 @@ class WisePropagator(Propagator1D):
         oeEnd = optical_element_end.wise_optical_element
         oeStart = wise_propagation_elements.get_wise_propagation_element(-2 if parameters.get_additional_parameter("single_propagation") else 0)
 
-        if PropagationManager.Instance().get_propagation_mode(WISE_APPLICATION) == PropagationMode.STEP_BY_STEP or parameters.get_additional_parameter("is_full_propagator"):
-            beamline.RefreshPositions()
-            beamline.ComputeFields(oeStart=oeStart, oeEnd=oeEnd, Verbose=False)
+        if self.__is_computing(parameters):
+            profile = _get_profile(parameters)
+
+            try:
+                self.__compute_deferred_plan(parameters, oeStart, oeEnd, profile)
+            finally:
+                if not profile is None: profile.stop()
 
             result = WiseWavefront(wise_computation_results=oeEnd.ComputationResults)
+            result.set_propagation_profile(profile)
         elif PropagationManager.Instance().get_propagation_mode(WISE_APPLICATION) == PropagationMode.WHOLE_BEAMLINE:
-            result = wavefront
+            # nothing is computed: the returned wavefront (the input one, until then) is filled by the next computing
+            # propagation of the beamline, or by do_deferred_propagation
+            result = WiseWavefront(wise_computation_results=None if wavefront is None else wavefront.wise_computation_result)
+
+            if is_generic_wavefront:
+                lazy_wavefront = WiseLazyWavefront(result)
+                wise_propagation_elements.get_deferred_plan().register(oeEnd, result, lazy_wavefront)
+
+                return lazy_wavefront
+            else:
+                wise_propagation_elements.get_deferred_plan().register(oeEnd, result)
         else:
             result = None
 
         if is_generic_wavefront:
-            return None if result is None else result.toGenericWavefront()
+            return None if result is None else WiseLazyWavefront(result)
         else:
             return result
 
+    def do_deferred_propagation(self, parameters=PropagationParameters()):
+        # computes the elements registered in the deferred plan of the beamline (whatever the propagation mode), in a
+        # single pass, and returns the filled wavefronts
+        wise_propagation_elements = parameters.get_PropagationElements()
+
+        beamline = wise_propagation_elements.get_wise_propagation_elements()
+        beamline.ComputationSettings.NPools = int(parameters.get_additional_parameter("NPools"))
+
+        if wise_propagation_elements.get_deferred_plan().is_empty(): return []
+
+        oeEnd = wise_propagation_elements.get_wise_propagation_element(-1)
+        oeStart = wise_propagation_elements.get_wise_propagation_element(-2 if parameters.get_additional_parameter("single_propagation") else 0)
+
+        return self.__compute_deferred_plan(parameters, oeStart, oeEnd)
+
+    def __compute_deferred_plan(self, parameters, oeStart, oeEnd, profile=None):
+        wise_propagation_elements = parameters.get_PropagationElements()
+        beamline = wise_propagation_elements.get_wise_propagation_elements()
+        deferred_plan = wise_propagation_elements.get_deferred_plan()
+
+        _plan_sampling(parameters)
+
+        oeStart, oeEnd = self.__get_span(wise_propagation_elements, oeStart, oeEnd)
+
+        self.compute_fields(wise_propagation_elements, oeStart, oeEnd, use_cache=self.__is_using_cache(parameters), backend=self.__get_backend(parameters), profile=profile)
+
+        return [] if deferred_plan.is_empty() else deferred_plan.fill(beamline)
+
+    def __get_span(self, wise_propagation_elements, oeStart, oeEnd):
+        # the computation covers the elements registered in the deferred plan as well
+        deferred_plan = wise_propagation_elements.get_deferred_plan()
+
+        if deferred_plan.is_empty(): return oeStart, oeEnd
+        else: return deferred_plan.get_span(wise_propagation_elements.get_wise_propagation_elements(), oeStart, oeEnd)
+
+    def iter_propagation(self, parameters=PropagationParameters(), block_callback=None, profile=None):
+        # as do_propagation (computing), yielding (beamline element, WiseWavefront) for each element as soon as its field is
+        # available (computed or restored from the caches): closing the generator stops the propagation after that element,
+        # the deferred plan is filled only at the end. block_callback(element name, done, total) is called by the numpy
+        # backend after each block of target points
+        wise_propagation_elements = parameters.get_PropagationElements()
+
+        beamline = wise_propagation_elements.get_wise_propagation_elements()
+        beamline.ComputationSettings.NPools = int(parameters.get_additional_parameter("NPools"))
+
+        oeEnd = wise_propagation_elements.get_wise_propagation_element(-1)
+        oeStart = wise_propagation_elements.get_wise_propagation_element(-2 if parameters.get_additional_parameter("single_propagation") else 0)
+
+        _plan_sampling(parameters)
+
+        oeStart, oeEnd = self.__get_span(wise_propagation_elements, oeStart, oeEnd)
+
+        beamline_elements = dict([(id(beamline_element.get_optical_element().wise_optical_element), beamline_element)
+                                  for beamline_element in wise_propagation_elements.get_propagation_elements()])
+
+        backend = self.__get_backend(parameters)
+
+        if not block_callback is None:
+            backend = copy.copy(backend)
+            backend.set_block_callback(block_callback)
+
+        for wise_optical_element in self.iter_compute_fields(wise_propagation_elements, oeStart, oeEnd, use_cache=self.__is_using_cache(parameters), backend=backend, profile=profile):
+            if wise_optical_element.IsSource or wise_optical_element.ComputationSettings.Ignore or wise_optical_element.ComputationResults.Field is None: continue
+
+            yield beamline_elements.get(id(wise_optical_element), None), WiseWavefront(wise_computation_results=wise_optical_element.ComputationResults)
+
+        if not wise_propagation_elements.get_deferred_plan().is_empty(): wise_propagation_elements.get_deferred_plan().fill(beamline)
+
+    async def iter_propagation_async(self, parameters=PropagationParameters(), progress_callback=None, profile=None):
+        # iter_propagation in a thread of the executor of the event loop, which is never blocked. progress_callback(progress)
+        # is called in the event loop, progress being {"event" : "block" or "element", "element" : name, "done", "total"}.
+        # Cancelling the task (or closing the iteration) stops the propagation at the next element or block of points
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def report(progress):
+            if not progress_callback is None: loop.call_soon_threadsafe(progress_callback, progress)
+
+        def block_callback(name, done, total):
+            if cancelled.is_set(): raise WisePropagationCancelled()
+
+            report({"event" : "block", "element" : name, "done" : done, "total" : total})
+
+        def run():
+            try:
+                wise_propagation_elements = parameters.get_PropagationElements()
+                oeStart = wise_propagation_elements.get_wise_propagation_element(-2 if parameters.get_additional_parameter("single_propagation") else 0)
+                oeEnd = wise_propagation_elements.get_wise_propagation_element(-1)
+                oeStart, oeEnd = self.__get_span(wise_propagation_elements, oeStart, oeEnd)
+
+                total = len([oe for oe in wise_propagation_elements.get_wise_propagation_elements().GetFromTo(oeStart, oeEnd)
+                             if not (oe.IsSource or oe.ComputationSettings.Ignore)])
+
+                for done, (beamline_element, wavefront) in enumerate(self.iter_propagation(parameters, block_callback=block_callback, profile=profile)):
+                    loop.call_soon_threadsafe(queue.put_nowait, (True, (beamline_element, wavefront)))
+                    report({"event" : "element", "element" : wavefront.wise_computation_result.Name, "done" : done + 1, "total" : total})
+
+                    if cancelled.is_set(): raise WisePropagationCancelled()
+            except BaseException as exception:
+                loop.call_soon_threadsafe(queue.put_nowait, (False, exception))
+            else:
+                loop.call_soon_threadsafe(queue.put_nowait, (False, None))
+
+        future = loop.run_in_executor(None, run)
+
+        try:
+            while True:
+                success, item = await queue.get()
+
+                if success: yield item
+                elif item is None: break
+                else: raise item
+        finally:
+            # the beamline is left to the caller only when the computation is over
+            if not future.done():
+                cancelled.set()
+                await asyncio.wait([future])
+
+    async def do_propagation_async(self, parameters=PropagationParameters(), progress_callback=None):
+        # as do_propagation, see iter_propagation_async
+        if not self.__is_computing(parameters): return self.do_propagation(parameters)
+
+        wavefront = parameters.get_wavefront()
+        if not wavefront is None and not isinstance(wavefront, (GenericWavefront1D, WiseWavefront)): raise ValueError("Wavefront cannot be managed by this propagator")
+
+        profile = _get_profile(parameters)
+
+        try:
+            async for _ in self.iter_propagation_async(parameters, progress_callback=progress_callback, profile=profile): pass
+        finally:
+            if not profile is None: profile.stop()
+
+        result = WiseWavefront(wise_computation_results=parameters.get_PropagationElements().get_wise_propagation_element(-1).ComputationResults)
+        result.set_propagation_profile(profile)
+
+        return WiseLazyWavefront(result) if isinstance(wavefront, GenericWavefront1D) else result
+
+    def compute_fields(self, wise_propagation_elements, oeStart, oeEnd, use_cache=True, backend=None, profile=None):
+        # the elements are computed one by one only when profiled
+        for _ in self.iter_compute_fields(wise_propagation_elements, oeStart, oeEnd, use_cache=use_cache, backend=backend, profile=profile, by_element=not profile is None): pass
+
+    def iter_compute_fields(self, wise_propagation_elements, oeStart, oeEnd, use_cache=True, backend=None, profile=None, by_element=True):
+        # yields the elements (from oeStart to oeEnd) as soon as their computation results are available: the
+        # propagation stats and the result cache are updated only when the iteration is completed
+        from wofrywise2.propagator.propagator1D.wise_backends import get_backend
+
+        beamline = wise_propagation_elements.get_wise_propagation_elements()
+        backend = get_backend(backend)
+
+        positions_refreshed = wise_propagation_elements.refresh_positions()
+
+        if use_cache:
+            restored_elements, computed_elements = yield from self.__compute_fields_with_cache(wise_propagation_elements, oeStart, oeEnd, backend, profile)
+        else:
+            item_list = beamline.GetFromTo(oeStart, oeEnd)
+
+            if by_element:
+                for index, _ in self.__compute_segments(beamline, item_list, 0, backend, profile): yield item_list[index]
+            else:
+                backend.compute_fields(beamline, oeStart, oeEnd)
+                yield oeEnd
+
+            restored_elements = []
+            computed_elements = [oe.Name for oe in beamline.GetFromTo(oeStart, oeEnd) if not (oe.IsSource or oe.ComputationSettings.Ignore)]
+
+        # method of the integral of each computed element (direct, FFT, analytic source), when the backend reports it
+        integration_methods = backend.get_integration_methods()
+
+        wise_propagation_elements.set_propagation_stats({"positions_refreshed" : positions_refreshed,
+                                                         "restored_elements" : restored_elements,
+                                                         "computed_elements" : computed_elements,
+                                                         "integration_methods" : dict([(name, integration_methods[name]) for name in computed_elements if name in integration_methods])})
+
+    def do_focus_sweep(self, parameters=PropagationParameters(), defocus_list=[], detector_size=50e-6, angle_in_nominal=numpy.deg2rad(90), n_samples=None, block_size=None):
+        # block_size: default DEFAULT_BLOCK_SIZE of wise_huygens
+        from wofrywise2.propagator.propagator1D.wise_focus_sweep import compute_focus_sweep
+
+        wise_propagation_elements = parameters.get_PropagationElements()
+
+        beamline = wise_propagation_elements.get_wise_propagation_elements()
+        beamline.ComputationSettings.NPools = int(parameters.get_additional_parameter("NPools"))
+
+        # the field is computed up to the focussing element (the last one) only once
+        oeFocussing = wise_propagation_elements.get_wise_propagation_element(-1)
+        oeStart = wise_propagation_elements.get_wise_propagation_element(-2 if parameters.get_additional_parameter("single_propagation") else 0)
+
+        _plan_sampling(parameters)
+
+        self.compute_fields(wise_propagation_elements, oeStart, oeFocussing, use_cache=self.__is_using_cache(parameters), backend=self.__get_backend(parameters))
+
+        # "max_memory" (bytes) bounds the temporary matrices of the integral
+        if parameters.has_additional_parameter("max_memory") or block_size is None: block_size = _get_block_size(parameters)
+
+        return compute_focus_sweep(oeFocussing,
+                                   defocus_list,
+                                   detector_size=detector_size,
+                                   angle_in_nominal=angle_in_nominal,
+                                   n_samples=n_samples,
+                                   block_size=block_size)
+
+    def do_polychromatic_propagation(self, parameters=PropagationParameters(), wavelengths=[], weights=None):
+        # all the wavelengths are propagated in one pass, from the source to the last element, with the same positions
+        # and samples (the ones of the shortest wavelength): the result is a wavelength x position stack of fields
+        from wofrywise2.propagator.propagator1D.wise_polychromatic import compute_polychromatic_fields
+
+        wise_propagation_elements = parameters.get_PropagationElements()
+
+        beamline = wise_propagation_elements.get_wise_propagation_elements()
+        oeEnd = wise_propagation_elements.get_wise_propagation_element(-1)
+
+        wise_propagation_elements.refresh_positions()
+
+        _plan_sampling(parameters, wavelength=numpy.min(wavelengths))
+
+        block_size = _get_block_size(parameters)
+
+        return compute_polychromatic_fields(beamline,
+                                            oeEnd,
+                                            wavelengths,
+                                            weights=weights,
+                                            block_size=block_size,
+                                            inherit_sampling=_get_backend(parameters).is_inheriting_sampling())
+
+    def do_coherent_mode_propagation(self, parameters=PropagationParameters(), coherent_modes=None, batch_size=None):
+        # partially coherent propagation from the source to the last element: the modes (e.g. WiseGaussianSchellModes)
+        # are propagated batch_size at a time (default: all together) and only the detector intensity is kept
+        from wofrywise2.propagator.propagator1D.wise_coherent_modes import compute_coherent_mode_intensity
+
+        wise_propagation_elements = parameters.get_PropagationElements()
+
+        beamline = wise_propagation_elements.get_wise_propagation_elements()
+        oeEnd = wise_propagation_elements.get_wise_propagation_element(-1)
+
+        wise_propagation_elements.refresh_positions()
+
+        _plan_sampling(parameters)
+
+        block_size = _get_block_size(parameters)
+
+        return compute_coherent_mode_intensity(beamline,
+                                               oeEnd,
+                                               coherent_modes,
+                                               batch_size=batch_size,
+                                               block_size=block_size,
+                                               inherit_sampling=_get_backend(parameters).is_inheriting_sampling())
+
+    def do_ensemble_propagation(self, parameters=PropagationParameters(), realizations=[], percentiles=None, max_workers=None, output_directory=None, chunk_size=None):
+        # Monte Carlo of figure errors: each process (the workers of the pool, or this one) keeps its own copy of the
+        # beamline, whose figure errors are replaced by the ones of each realization (the unchanged upstream elements
+        # are restored from its result cache). Realizations are drawn chunk_size at a time from the iterable and
+        # the results are saved in output_directory only if given. percentiles: default DEFAULT_PERCENTILES of wise_ensemble
+        from wofrywise2.propagator.propagator1D.wise_ensemble import WiseEnsembleResult, save_realization, DEFAULT_PERCENTILES
+        from wofrywise2.propagator.propagator1D.wise_worker_pool import is_worker_process
+
+        if percentiles is None: percentiles = DEFAULT_PERCENTILES
+
+        propagation_mode = PropagationManager.Instance().get_propagation_mode(WISE_APPLICATION)
+
+        if max_workers == 1 or is_worker_process(): worker_pool = None
+        else: worker_pool = self.get_worker_pool(max_workers)
+
+        parameters = copy.deepcopy(parameters)
+
+        if worker_pool is None:
+            if chunk_size is None: chunk_size = 1
+        else:
+            if chunk_size is None: chunk_size = 4*worker_pool.get_n_workers()
+
+            worker_pool.update_state("ensemble_parameters", None, parameters)
+
+        if not output_directory is None and not os.path.isdir(output_directory): os.makedirs(output_directory)
+
+        result = WiseEnsembleResult(percentiles)
+
+        try:
+            realizations = iter(realizations)
+            while True:
+                chunk = list(itertools.islice(realizations, chunk_size))
+                if len(chunk) == 0: break
+
+                if worker_pool is None: outputs = [_run_ensemble_realization(propagation_mode, parameters, realization) for realization in chunk]
+                else: outputs = worker_pool.map(_run_ensemble_job, [propagation_mode]*len(chunk), chunk)
+
+                for output in outputs:
+                    if not output_directory is None:
+                        result.add_realization_file(save_realization(output_directory, result.get_n_realizations(), *output))
+
+                    result.add_realization(*output)
+        finally:
+            if not worker_pool is None: worker_pool.remove_state("ensemble_parameters")
+
+        return result
+
+    def do_batch_propagation(self, list_of_parameters=[], max_workers=None):
+        from wofrywise2.propagator.propagator1D.wise_worker_pool import is_worker_process
+
+        list_of_parameters = list(list_of_parameters)
+        propagation_mode = PropagationManager.Instance().get_propagation_mode(WISE_APPLICATION)
+
+        if max_workers == 1 or is_worker_process(): worker_pool = None
+        else: worker_pool = self.get_worker_pool(max_workers)
+
+        positions_refreshed = [self.__is_computing(parameters) and parameters.get_PropagationElements().refresh_positions()
+                               for parameters in list_of_parameters]
+
+        # the shared sections are found with the planned sampling
+        for parameters in list_of_parameters:
+            if self.__is_computing(parameters): _plan_sampling(parameters)
+
+        # beamline sections shared by several variants are computed once and seeded in the result cache of each of them
+        for prefix_jobs in self.__get_prefix_jobs(list_of_parameters):
+            prefix_outputs = self.__map(worker_pool, _run_batch_job, [propagation_mode]*len(prefix_jobs),
+                                                                     [list_of_parameters[job[0][0]] for job in prefix_jobs],
+                                                                     [job[1] for job in prefix_jobs])
+
+            for (indexes, end_index, fingerprints), (_, computation_results_list, _) in zip(prefix_jobs, prefix_outputs):
+                for index in indexes:
+                    wise_propagation_elements = list_of_parameters[index].get_PropagationElements()
+                    item_list = wise_propagation_elements.get_wise_propagation_elements().ItemList
+
+                    for element_index in range(end_index + 1):
+                        wise_propagation_elements.get_result_cache().set_computation_results(item_list[element_index].Name,
+                                                                                             fingerprints[element_index],
+                                                                                             computation_results_list[element_index])
+
+        outputs = self.__map(worker_pool, _run_batch_job, [propagation_mode]*len(list_of_parameters), list_of_parameters)
+
+        results = []
+        for parameters, refreshed, (result, computation_results_list, propagation_stats) in zip(list_of_parameters, positions_refreshed, outputs):
+            if self.__is_computing(parameters):
+                propagation_stats["positions_refreshed"] = refreshed or propagation_stats["positions_refreshed"]
+
+                self.__update_from_batch_job(parameters, computation_results_list, propagation_stats)
+
+            results.append(result)
+
+        return results
+
+    def __get_prefix_jobs(self, list_of_parameters):
+        chains = {}
+        for index, parameters in enumerate(list_of_parameters):
+            if self.__is_computing(parameters) and self.__is_using_cache(parameters) and not parameters.get_additional_parameter("single_propagation"):
+                wise_propagation_elements = parameters.get_PropagationElements()
+                beamline = wise_propagation_elements.get_wise_propagation_elements()
+                item_list = beamline.GetFromTo(beamline.FirstItem, wise_propagation_elements.get_wise_propagation_element(-1))
+
+                chains[index] = (item_list, get_chain_fingerprints(item_list, _get_backend(parameters).get_fingerprint()))
+
+        # a shared section can end on any computed element preceded by cacheable elements only
+        members = {}
+        for index, (item_list, fingerprints) in chains.items():
+            for element_index, wise_optical_element in enumerate(item_list):
+                if not is_cacheable(wise_optical_element): break
+
+                if not (wise_optical_element.IsSource or wise_optical_element.ComputationSettings.Ignore):
+                    members.setdefault((element_index, fingerprints[element_index]), []).append(index)
+
+        # a section is computed only where the variants sharing it branch off
+        branch_points = {}
+        for index, (item_list, fingerprints) in chains.items():
+            shared_sections = [key for key in members.keys() if len(members[key]) > 1 and index in members[key]]
+
+            for key in sorted(shared_sections):
+                branch_points[tuple(members[key])] = key
+
+        jobs = {}
+        for indexes, (end_index, _) in branch_points.items():
+            item_list, fingerprints = chains[indexes[0]]
+
+            if not all(list_of_parameters[index].get_PropagationElements().get_result_cache().has_computation_results(item_list[end_index].Name, fingerprints[end_index])
+                       for index in indexes):
+                level = len([other for other in branch_points.keys() if set(indexes) < set(other)])
+
+                jobs.setdefault(level, []).append((list(indexes), end_index, fingerprints))
+
+        return [jobs[level] for level in sorted(jobs.keys())]
+
+    def __update_from_batch_job(self, parameters, computation_results_list, propagation_stats):
+        wise_propagation_elements = parameters.get_PropagationElements()
+        result_cache = wise_propagation_elements.get_result_cache()
+
+        beamline = wise_propagation_elements.get_wise_propagation_elements()
+        item_list = beamline.GetFromTo(beamline.FirstItem, wise_propagation_elements.get_wise_propagation_element(-1))
+        fingerprints = get_chain_fingerprints(item_list, _get_backend(parameters).get_fingerprint())
+
+        for wise_optical_element, fingerprint, computation_results in zip(item_list, fingerprints, computation_results_list):
+            wise_optical_element.ComputationResults = computation_results
+
+            if self.__is_using_cache(parameters) and is_cacheable(wise_optical_element):
+                result_cache.set_computation_results(wise_optical_element.Name, fingerprint, computation_results)
+
+        wise_propagation_elements.set_propagation_stats(propagation_stats)
+
+    def __is_computing(self, parameters):
+        return PropagationManager.Instance().get_propagation_mode(WISE_APPLICATION) == PropagationMode.STEP_BY_STEP or \
+               parameters.get_additional_parameter("is_full_propagator")
+
+    def __is_using_cache(self, parameters):
+        return not parameters.has_additional_parameter("use_cache") or parameters.get_additional_parameter("use_cache")
+
+    def __get_backend(self, parameters):
+        from wofrywise2.propagator.propagator1D.wise_worker_pool import is_worker_process
+
+        backend = _get_backend(parameters)
+
+        # the integrals of a propagation are shared among the threads or the processes of a persistent pool (not inside the workers)
+        n_pools = int(parameters.get_additional_parameter("NPools")) if parameters.has_additional_parameter("NPools") else 1
+        executor = parameters.get_additional_parameter("executor") if parameters.has_additional_parameter("executor") else "processes"
+
+        if not executor in ("threads", "processes"): raise ValueError("Executor not available: " + str(executor) + " (available: threads, processes)")
+
+        if n_pools > 1 and not is_worker_process():
+            backend = copy.copy(backend)
+
+            if executor == "threads": backend.set_thread_pool(self.get_thread_pool(n_pools), n_pools)
+            else: backend.set_worker_pool(self.get_worker_pool(n_pools))
+
+        return backend
+
+    def __map(self, worker_pool, function, *iterables):
+        if worker_pool is None: return list(map(function, *iterables))
+        else: return worker_pool.map(function, *iterables)
+
+    def __compute_segments(self, beamline, item_list, start_index, backend, profile=None):
+        # the computation goes on segment by segment, each one ending on a computed element: the index of the end
+        # of each segment is yielded as soon as it is computed
+        segment_start_index = start_index
+        for index in range(start_index, len(item_list)):
+            is_computed = not (item_list[index].IsSource or item_list[index].ComputationSettings.Ignore)
+
+            if is_computed or index == len(item_list) - 1:
+                oeSegmentStart = item_list[segment_start_index]
+                if segment_start_index > 0: oeSegmentStart.ComputationResults.Lambda = item_list[segment_start_index-1].ComputationResults.Lambda
+
+                if profile is None:
+                    backend.compute_fields(beamline, oeSegmentStart, item_list[index])
+                else:
+                    measure = profile.start_element(backend)
+                    backend.compute_fields(beamline, oeSegmentStart, item_list[index])
+                    profile.stop_element(measure, item_list[index], COMPUTED, backend, n_elements=index - segment_start_index + 1)
+
+                yield index, is_computed
+
+                segment_start_index = index + 1
+
+    def __restore_computation_results(self, cache, wise_optical_element, fingerprint, event, profile=None):
+        if profile is None: return cache.restore_computation_results(wise_optical_element, fingerprint)
+
+        measure = profile.start_element()
+        restored = cache.restore_computation_results(wise_optical_element, fingerprint)
+        if restored: profile.stop_element(measure, wise_optical_element, event)
+
+        return restored
+
+    def __compute_fields_with_cache(self, wise_propagation_elements, oeStart, oeEnd, backend, profile=None):
+        beamline = wise_propagation_elements.get_wise_propagation_elements()
+        result_cache = wise_propagation_elements.get_result_cache()
+        result_store = wise_propagation_elements.get_result_store()
+
+        item_list = beamline.GetFromTo(beamline.FirstItem, oeEnd)
+        fingerprints = get_chain_fingerprints(item_list, backend.get_fingerprint())
+
+        # upstream elements whose state did not change since their last computation are not recomputed
+        restored_elements = []
+        computed_elements = []
+        restart_index = None
+        for index in range(item_list.index(oeStart), len(item_list)):
+            if not is_cacheable(item_list[index]) or \
+                    not self.__restore_computation_results(result_cache, item_list[index], fingerprints[index], RESTORED_FROM_CACHE, profile):
+                restart_index = index
+                break
+            else:
+                restored_elements.append(item_list[index].Name)
+
+                yield item_list[index]
+
+        # checkpoints are valid as long as all the upstream elements are cacheable
+        checkpoint_indexes = range(len(item_list))
+        for index in checkpoint_indexes:
+            if not is_cacheable(item_list[index]):
+                checkpoint_indexes = range(index)
+                break
+
+        if not restart_index is None and not result_store is None:
+            resume_index = None
+            for index in range(restart_index, len(item_list)):
+                if index in checkpoint_indexes and result_store.has_computation_results(item_list[index].Name, fingerprints[index]):
+                    resume_index = index
+
+            if not resume_index is None:
+                for index in range(restart_index, resume_index + 1):
+                    if self.__restore_computation_results(result_store, item_list[index], fingerprints[index], RESTORED_FROM_STORE, profile):
+                        restored_elements.append(item_list[index].Name)
+
+                        yield item_list[index]
+
+                if resume_index == len(item_list) - 1: restart_index = None
+                else: restart_index = resume_index + 1
+
+        if not restart_index is None:
+            # the field is propagated from the last computed element: sources and ignored elements are skipped backwards
+            while restart_index > 0 and (item_list[restart_index-1].IsSource or item_list[restart_index-1].ComputationSettings.Ignore):
+                restart_index -= 1
+
+            for index, is_computed in self.__compute_segments(beamline, item_list, restart_index, backend, profile):
+                if is_computed and not result_store is None and index in checkpoint_indexes:
+                    result_store.set_computation_results(item_list[index].Name, fingerprints[index], item_list[index].ComputationResults)
+
+                yield item_list[index]
+
+            # the source and the ignored elements may be restored as well, but have no field of their own to compute
+            computed_elements = [wise_optical_element.Name for wise_optical_element in item_list[restart_index:]
+                                 if not (wise_optical_element.IsSource or wise_optical_element.ComputationSettings.Ignore)]
+
+        # some kernels update their own state during the computation (e.g. the mirror length from the figure error)
+        fingerprints = get_chain_fingerprints(item_list, backend.get_fingerprint())
+
+        for index in range(item_list.index(oeStart), len(item_list)):
+            if is_cacheable(item_list[index]):
+                result_cache.set_computation_results(item_list[index].Name, fingerprints[index], item_list[index].ComputationResults)
+            else:
+                result_cache.remove_computation_results(item_list[index].Name)
+
+        return restored_elements, computed_elements
+
+def _run_batch_job(propagation_mode, parameters, end_index=None):
+    # worker processes do not share the propagation manager of the calling process
+    PropagationManager.Instance().set_propagation_mode(WISE_APPLICATION, propagation_mode)
+
+    propagator = WisePropagator()
+    wise_propagation_elements = parameters.get_PropagationElements()
+    beamline = wise_propagation_elements.get_wise_propagation_elements()
+
+    if end_index is None:
+        result = propagator.do_propagation(parameters)
+        oeEnd = wise_propagation_elements.get_wise_propagation_element(-1)
+    else:
+        beamline.ComputationSettings.NPools = int(parameters.get_additional_parameter("NPools"))
+        _plan_sampling(parameters)
+
+        oeEnd = beamline.GetFromTo(beamline.FirstItem, wise_propagation_elements.get_wise_propagation_element(-1))[end_index]
+        propagator.compute_fields(wise_propagation_elements, beamline.FirstItem, oeEnd, backend=_get_backend(parameters))
+        result = None
+
+    return result, \
+           [wise_optical_element.ComputationResults for wise_optical_element in beamline.GetFromTo(beamline.FirstItem, oeEnd)], \
+           wise_propagation_elements.get_propagation_stats()
+
+def _run_ensemble_realization(propagation_mode, parameters, realization):
+    from wofrywise2.propagator.propagator1D.wise_ensemble import apply_figure_errors
+    from wofrywise2.propagator.propagator1D.wise_focus_sweep import get_hew_and_sigma
+
+    PropagationManager.Instance().set_propagation_mode(WISE_APPLICATION, propagation_mode)
+
+    apply_figure_errors(parameters.get_PropagationElements(), realization)
+
+    result = WisePropagator().do_propagation(parameters)
+    if isinstance(result, WiseLazyWavefront): result = result.get_wise_wavefront()
+
+    computation_results = result.wise_computation_result
+    hew, sigma = get_hew_and_sigma(computation_results.Field, computation_results.S)
+
+    return computation_results.S, numpy.abs(computation_results.Field)**2, hew, sigma
+
+def _run_ensemble_job(propagation_mode, realization):
+    # the beamline has been shipped once to the worker, the figure errors of the realizations replace each other
+    from wofrywise2.propagator.propagator1D.wise_worker_pool import get_worker_state
+
+    return _run_ensemble_realization(propagation_mode, get_worker_state("ensemble_parameters"), realization)
+
+def _get_backend(parameters):
+    from wofrywise2.propagator.propagator1D.wise_backends import get_backend
+
+    if parameters.has_additional_parameter("backend"): backend = get_backend(parameters.get_additional_parameter("backend"))
+    else: backend = get_backend()
+
+    # "max_memory" (bytes) bounds the temporary matrices of the integrals, "free_space_fast_path" (default True) enables
+    # the FFT integrals of the free-space segments: the backend instance of the caller is left untouched
+    if parameters.has_additional_parameter("max_memory") or parameters.has_additional_parameter("free_space_fast_path"):
+        backend = copy.copy(backend)
+
+        if parameters.has_additional_parameter("max_memory"): backend.set_max_memory(parameters.get_additional_parameter("max_memory"))
+        if parameters.has_additional_parameter("free_space_fast_path"): backend.set_free_space_fast_path(parameters.get_additional_parameter("free_space_fast_path"))
+
+    return backend
+
+def _get_block_size(parameters):
+    from wofrywise2.propagator.propagator1D.wise_huygens import get_block_size, DEFAULT_BLOCK_SIZE
+
+    return get_block_size(parameters.get_additional_parameter("max_memory")) if parameters.has_additional_parameter("max_memory") else DEFAULT_BLOCK_SIZE
+
+def _get_profile(parameters):
+    # "profile" attaches a per element record to the result, "profile_memory" traces the allocations as well
+    if parameters.has_additional_parameter("profile") and parameters.get_additional_parameter("profile"):
+        return WisePropagationProfile(trace_memory=parameters.has_additional_parameter("profile_memory") and parameters.get_additional_parameter("profile_memory"))
+    else:
+        return None
+
+def _plan_sampling(parameters, wavelength=None):
+    # "automatic_sampling" replaces the NSamples of the elements with the ones of a sampling plan
+    if parameters.has_additional_parameter("automatic_sampling") and parameters.get_additional_parameter("automatic_sampling"):
+        wise_propagation_elements = parameters.get_PropagationElements()
+
+        def get_parameter(name, default):
+            return parameters.get_additional_parameter(name) if parameters.has_additional_parameter(name) else default
 
+        sampling_plan = wise_propagation_elements.compute_sampling_plan(wavelength=wavelength,
+                                                                        safety_factor=get_parameter("sampling_safety_factor", DEFAULT_SAFETY_FACTOR),
+                                                                        min_samples=get_parameter("sampling_min_samples", DEFAULT_MIN_SAMPLES),
+                                                                        max_samples=get_parameter("sampling_max_samples", None),
+                                                                        inherit_sampling=_get_backend(parameters).is_inheriting_sampling())
+        wise_propagation_elements.apply_sampling_plan(sampling_plan)
@@ -0,0 +1,148 @@
+import copy
+import hashlib
+
+import numpy
+
+# tree links and computation outputs are not part of the state of an optical element
+_EXCLUDED_ATTRIBUTES = ("Parent", "Children", "Results", "RayIn", "RayOut")
+
+def get_fingerprint(*objects, **kwargs):
+    include_arrays = kwargs.get("include_arrays", True)
+
+    digest = hashlib.sha1()
+    for obj in objects: _update_digest(digest, obj, set(), include_arrays)
+
+    return digest.hexdigest()
+
+def get_optical_element_fingerprint(wise_optical_element):
+    return get_fingerprint(wise_optical_element.Name,
+                           wise_optical_element.IsSource,
+                           wise_optical_element.CoreOptics,
+                           wise_optical_element.PositioningDirectives,
+                           wise_optical_element.ComputationSettings)
+
+def get_chain_fingerprints(wise_optical_elements, upstream_fingerprint=""):
+    fingerprints = []
+
+    for wise_optical_element in wise_optical_elements:
+        upstream_fingerprint = get_fingerprint(upstream_fingerprint, get_optical_element_fingerprint(wise_optical_element))
+        fingerprints.append(upstream_fingerprint)
+
+    return fingerprints
+
+def get_geometry_fingerprint(wise_optical_elements):
+    # array data of the kernels (figure errors, sampled profiles) do not move the optical elements
+    return get_fingerprint([(wise_optical_element.Name,
+                             wise_optical_element.PositioningDirectives,
+                             get_fingerprint(wise_optical_element.CoreOptics, include_arrays=False))
+                            for wise_optical_element in wise_optical_elements])
+
+def is_cacheable(wise_optical_element):
+    # a new roughness profile is generated at every computation
+    try:
+        return not wise_optical_element.CoreOptics.ComputationSettings.UseRoughness
+    except AttributeError:
+        return True
+
+def _update_digest(digest, obj, visited, include_arrays):
+    if obj is None or isinstance(obj, (bool, int, float, complex, str, bytes)):
+        digest.update((type(obj).__name__ + ":" + repr(obj)).encode("utf-8"))
+    elif isinstance(obj, numpy.generic):
+        _update_digest(digest, obj.item(), visited, include_arrays)
+    elif isinstance(obj, numpy.ndarray):
+        if not include_arrays: return
+
+        digest.update(("ndarray:" + str(obj.dtype) + str(obj.shape)).encode("utf-8"))
+        if obj.dtype.hasobject:
+            _update_digest(digest, obj.tolist(), visited, include_arrays)
+        else:
+            digest.update(numpy.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, type) or callable(obj):
+        digest.update(("callable:" + getattr(obj, "__module__", "") + "." + getattr(obj, "__qualname__", repr(type(obj)))).encode("utf-8"))
+    elif id(obj) in visited:
+        digest.update(b"cycle")
+    else:
+        visited.add(id(obj))
+
+        if isinstance(obj, (list, tuple, set, frozenset)):
+            digest.update((type(obj).__name__ + ":" + str(len(obj))).encode("utf-8"))
+            for item in (sorted(obj, key=repr) if isinstance(obj, (set, frozenset)) else obj):
+                _update_digest(digest, item, visited, include_arrays)
+        elif isinstance(obj, dict):
+            digest.update(("dict:" + str(len(obj))).encode("utf-8"))
+            for key in sorted(obj.keys(), key=repr):
+                _update_digest(digest, key, visited, include_arrays)
+                _update_digest(digest, obj[key], visited, include_arrays)
+        elif hasattr(obj, "__dict__"):
+            digest.update(("object:" + type(obj).__module__ + "." + type(obj).__qualname__).encode("utf-8"))
+            attributes = vars(obj)
+            for key in sorted(attributes.keys()):
+                if not key in _EXCLUDED_ATTRIBUTES:
+                    digest.update(key.encode("utf-8"))
+                    _update_digest(digest, attributes[key], visited, include_arrays)
+        else:
+            digest.update(repr(obj).encode("utf-8"))
+
+
+class WiseResultCache(object):
+
+    def __init__(self):
+        self.__entries = {}
+
+    def get_computation_results(self, name, fingerprint):
+        entry = self.__entries.get(name, None)
+
+        if entry is None or entry[0] != fingerprint: return None
+        else: return _copy_computation_results(entry[1], writeable=True)
+
+    def set_computation_results(self, name, fingerprint, computation_results):
+        # the cache keeps its own read-only copy of the arrays: the ones of the optical element stay writable and are
+        # shared with the wavefronts returned by the propagation, that can be changed in place
+        self.__entries[name] = (fingerprint, _copy_computation_results(computation_results, writeable=False))
+
+    def restore_computation_results(self, wise_optical_element, fingerprint):
+        entry = self.__entries.get(wise_optical_element.Name, None)
+
+        if entry is None or entry[0] != fingerprint: return False
+
+        # the results of the optical element are kept (and so shared with the returned wavefronts) if not changed
+        computation_results = wise_optical_element.ComputationResults
+        if computation_results is None or computation_results.Lambda != entry[1].Lambda or not _has_same_arrays(computation_results, entry[1]):
+            wise_optical_element.ComputationResults = _copy_computation_results(entry[1], writeable=True)
+
+        return True
+
+    def has_computation_results(self, name, fingerprint):
+        entry = self.__entries.get(name, None)
+
+        return not entry is None and entry[0] == fingerprint
+
+    def remove_computation_results(self, name):
+        self.__entries.pop(name, None)
+
+    def clear(self):
+        self.__entries.clear()
+
+    def get_size(self):
+        return len(self.__entries)
+
+def _copy_computation_results(computation_results, writeable):
+    computation_results = copy.copy(computation_results)
+
+    for name, value in vars(computation_results).items():
+        if isinstance(value, numpy.ndarray):
+            value = numpy.array(value)
+            value.flags.writeable = writeable
+
+            setattr(computation_results, name, value)
+
+    return computation_results
+
+def _has_same_arrays(computation_results, cached_computation_results):
+    for name, cached_value in vars(cached_computation_results).items():
+        if isinstance(cached_value, numpy.ndarray):
+            value = getattr(computation_results, name, None)
+
+            if not isinstance(value, numpy.ndarray) or value.shape != cached_value.shape or not numpy.array_equal(value, cached_value): return False
+
+    return True
@@ -0,0 +1,101 @@
+import json
+import os
+
+import numpy
+
+_ARRAY_ATTRIBUTES = ("X", "Y", "S", "Field")
+_SCALAR_ATTRIBUTES = ("Name", "Lambda", "NSamples", "Action")
+
+# persistent checkpoints of the computation results, identified by the fingerprint of the beamline up to each element:
+# arrays are stored as .npy files and loaded back as (copy on write) memory maps
+class WiseResultStore(object):
+
+    def __init__(self, directory):
+        self.__directory = directory
+
+        if not os.path.isdir(directory): os.makedirs(directory)
+
+    def get_directory(self):
+        return self.__directory
+
+    def has_computation_results(self, name, fingerprint):
+        header = self.__load_header(fingerprint)
+
+        return not header is None and header["Name"] == name and \
+               all(os.path.exists(self.__get_array_file(fingerprint, attribute)) for attribute in header["arrays"])
+
+    def get_computation_results(self, name, fingerprint):
+        header = self.__load_header(fingerprint)
+
+        if header is None or header["Name"] != name: return None
+
+        from wiselib2.Fundation import ComputationResults
+
+        computation_results = ComputationResults()
+
+        try:
+            for attribute in _SCALAR_ATTRIBUTES:
+                setattr(computation_results, attribute, header[attribute])
+            for attribute in header["arrays"]:
+                setattr(computation_results, attribute, numpy.load(self.__get_array_file(fingerprint, attribute), mmap_mode="c"))
+        except (OSError, ValueError): # incomplete or corrupted checkpoint
+            return None
+
+        return computation_results
+
+    def set_computation_results(self, name, fingerprint, computation_results):
+        header = {"Name" : name, "arrays" : []}
+
+        for attribute in _SCALAR_ATTRIBUTES[1:]:
+            value = getattr(computation_results, attribute)
+            header[attribute] = value.item() if isinstance(value, numpy.generic) else value
+
+        for attribute in _ARRAY_ATTRIBUTES:
+            value = getattr(computation_results, attribute)
+
+            if isinstance(value, numpy.ndarray):
+                self.__write(self.__get_array_file(fingerprint, attribute), lambda file: numpy.save(file, value))
+                header["arrays"].append(attribute)
+            else:
+                header[attribute] = value
+
+        # the header is written last: a checkpoint is valid only when all its arrays are on disk
+        self.__write(self.__get_header_file(fingerprint), lambda file: file.write(json.dumps(header).encode("utf-8")))
+
+    def restore_computation_results(self, wise_optical_element, fingerprint):
+        computation_results = self.get_computation_results(wise_optical_element.Name, fingerprint)
+
+        if computation_results is None: return False
+
+        wise_optical_element.ComputationResults = computation_results
+
+        return True
+
+    def remove_computation_results(self, fingerprint):
+        for attribute in _ARRAY_ATTRIBUTES:
+            if os.path.exists(self.__get_array_file(fingerprint, attribute)): os.remove(self.__get_array_file(fingerprint, attribute))
+
+        if os.path.exists(self.__get_header_file(fingerprint)): os.remove(self.__get_header_file(fingerprint))
+
+    def clear(self):
+        for file_name in os.listdir(self.__directory):
+            if file_name.endswith(".json") or file_name.endswith(".npy"): os.remove(os.path.join(self.__directory, file_name))
+
+    def __load_header(self, fingerprint):
+        try:
+            with open(self.__get_header_file(fingerprint), "r") as file: return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def __get_header_file(self, fingerprint):
+        return os.path.join(self.__directory, fingerprint + ".json")
+
+    def __get_array_file(self, fingerprint, attribute):
+        return os.path.join(self.__directory, fingerprint + "." + attribute + ".npy")
+
+    def __write(self, file_name, write_function):
+        temporary_file = file_name + "." + str(os.getpid()) + ".tmp"
+
+        with open(temporary_file, "wb") as file: write_function(file)
+
+        os.replace(temporary_file, file_name)
@@ -0,0 +1,157 @@
+import numpy
+
+DEFAULT_SAFETY_FACTOR = 1.0
+DEFAULT_MIN_SAMPLES = 256
+
+# Sampling criterion of the Huygens-Fresnel propagation between two elements at distance z: the phase of the kernel
+# exp(-ikR) changes along the element 0 at most by k*(L0 + L1)/(2*z), hence (Nyquist) N0 = L0*(L0 + L1)/(lambda*z),
+# L0 and L1 being the lengths of the two elements projected on the plane normal to the beam (L*sin(grazing angle)).
+# The same bound holds for the field arriving on element 1, so each element must satisfy the criterion towards both
+# its upstream and its downstream computed elements. An analytic source is a point (L1 = 0). The bound does not rely
+# on the focussing of the incoming field, which is not known before the computation.
+
+def get_grazing_angle(core_optics):
+    for attribute in ("AngleGrazingNominal", "AngleGrazing"):
+        angle = getattr(core_optics, attribute, None)
+        if not angle is None: return angle
+
+    return numpy.pi/2
+
+def get_projected_length(wise_optical_element):
+    return wise_optical_element.CoreOptics.L*abs(numpy.sin(get_grazing_angle(wise_optical_element.CoreOptics)))
+
+def get_n_samples(wavelength, distance, projected_length, projected_length_other, safety_factor=DEFAULT_SAFETY_FACTOR):
+    if distance <= 0: return 0
+
+    return int(numpy.ceil(safety_factor*projected_length*(projected_length + projected_length_other)/(wavelength*distance)))
+
+class WiseSamplingPlan(object):
+
+    def __init__(self, wavelength, safety_factor, entries):
+        self.__wavelength = wavelength
+        self.__safety_factor = safety_factor
+        self.__entries = entries
+
+    def get_wavelength(self):
+        return self.__wavelength
+
+    def get_safety_factor(self):
+        return self.__safety_factor
+
+    def get_entries(self):
+        return [dict(entry) for entry in self.__entries]
+
+    def get_names(self):
+        return [entry["name"] for entry in self.__entries]
+
+    def get_n_samples(self, name):
+        for entry in self.__entries:
+            if entry["name"] == name: return entry["n_samples"]
+
+        raise KeyError(name)
+
+    def set_n_samples(self, name, n_samples):
+        # e.g. by the sampling plan hook, before the plan is applied
+        for entry in self.__entries:
+            if entry["name"] == name:
+                entry["n_samples"] = int(n_samples)
+                return
+
+        raise KeyError(name)
+
+    def get_total_samples(self):
+        return sum([entry["n_samples"] for entry in self.__entries])
+
+    def __str__(self):
+        text = "Sampling plan (wavelength = %g m, safety factor = %g)\n" % (self.__wavelength, self.__safety_factor)
+        text += "%-20s %10s %10s %12s %12s %10s %10s %10s\n" % ("element", "L [m]", "grazing", "z up [m]", "z down [m]", "N up", "N down", "N")
+
+        for entry in self.__entries:
+            text += "%-20s %10.4g %10.4g %12.6g %12.6g %10d %10d %10d\n" % (entry["name"],
+                                                                          entry["length"],
+                                                                          entry["grazing_angle"],
+                                                                          numpy.nan if entry["upstream_distance"] is None else entry["upstream_distance"],
+                                                                          numpy.nan if entry["downstream_distance"] is None else entry["downstream_distance"],
+                                                                          entry["n_samples_upstream"],
+                                                                          entry["n_samples_downstream"],
+                                                                          entry["n_samples"])
+        return text
+
+def compute_sampling_plan(beamline, wavelength=None, safety_factor=DEFAULT_SAFETY_FACTOR, min_samples=DEFAULT_MIN_SAMPLES, max_samples=None, inherit_sampling=True):
+    # the positions of the elements must be up to date
+    if wavelength is None:
+        if beamline.FirstItem is None or not beamline.FirstItem.IsSource: raise ValueError("Wavelength must be specified for beamlines without source")
+
+        wavelength = beamline.FirstItem.CoreOptics.Lambda
+
+    # ignored elements are skipped: their distances are summed up
+    computed = []
+    distances = []
+    distance = 0.0
+    for wise_optical_element in beamline.ItemList:
+        if not wise_optical_element.Parent is None: distance += wise_optical_element.DistanceFromParent
+
+        if wise_optical_element.IsSource or not wise_optical_element.ComputationSettings.Ignore:
+            computed.append(wise_optical_element)
+            distances.append(distance)
+            distance = 0.0
+
+    entries = []
+    section_starts = []
+    for index, wise_optical_element in enumerate(computed):
+        if wise_optical_element.IsSource: continue
+
+        projected_length = get_projected_length(wise_optical_element)
+
+        upstream = computed[index-1] if index > 0 else None
+        upstream_distance = distances[index] if index > 0 else None
+
+        if upstream is None:
+            n_samples_upstream = 0
+        elif upstream.CoreOptics._IsAnalytic:
+            n_samples_upstream = get_n_samples(wavelength, upstream_distance, projected_length, 0.0, safety_factor)
+        else:
+            n_samples_upstream = get_n_samples(wavelength, upstream_distance, projected_length, get_projected_length(upstream), safety_factor)
+
+        if index < len(computed) - 1:
+            downstream_distance = distances[index+1]
+            n_samples_downstream = get_n_samples(wavelength, downstream_distance, projected_length, get_projected_length(computed[index+1]), safety_factor)
+        else:
+            downstream_distance = None
+            n_samples_downstream = 0
+
+        n_samples = max(min_samples, n_samples_upstream, n_samples_downstream)
+        if not max_samples is None: n_samples = min(n_samples, max_samples)
+
+        entries.append({"name" : wise_optical_element.Name,
+                        "length" : wise_optical_element.CoreOptics.L,
+                        "grazing_angle" : get_grazing_angle(wise_optical_element.CoreOptics),
+                        "upstream_distance" : upstream_distance,
+                        "downstream_distance" : downstream_distance,
+                        "n_samples_upstream" : n_samples_upstream,
+                        "n_samples_downstream" : n_samples_downstream,
+                        "required_samples" : n_samples,
+                        "n_samples" : n_samples})
+        section_starts.append(upstream is None or upstream.CoreOptics._IsAnalytic)
+
+    # with the wiselib2 convention, the elements downstream of a numerical one are sampled as it is:
+    # the first element of each numerical section is sampled for the whole section
+    if inherit_sampling:
+        sections = []
+        for entry, is_section_start in zip(entries, section_starts):
+            if is_section_start or len(sections) == 0: sections.append([entry])
+            else: sections[-1].append(entry)
+
+        for section in sections:
+            n_samples = max([entry["required_samples"] for entry in section])
+            for entry in section: entry["n_samples"] = n_samples
+
+    return WiseSamplingPlan(wavelength, safety_factor, entries)
+
+def apply_sampling_plan(beamline, sampling_plan):
+    names = sampling_plan.get_names()
+
+    for wise_optical_element in beamline.ItemList:
+        if wise_optical_element.Name in names:
+            wise_optical_element.ComputationSettings.UseCustomSampling = True
+            wise_optical_element.ComputationSettings.NSamples = sampling_plan.get_n_samples(wise_optical_element.Name)
@@ -0,0 +1,215 @@
+import importlib
+import json
+import os
+import struct
+import types
+
+import numpy
+
+from wofrywise2.propagator.propagator1D.wise_compiled_beamline import WiseCompiledBeamline
+from wofrywise2.propagator.propagator1D.wise_propagator import WisePropagationElements
+from wofrywise2.propagator.wavefront1D.wise_wavefront import WiseWavefront
+
+# Snapshots of beamlines and wavefronts: a JSON header with the attributes of the objects (optical kernels, positioning
+# directives, computation settings) and a data section with their arrays, as raw little endian blocks aligned to
+# 64 bytes. On load the file is mapped once in memory (copy on write) and the arrays are views of it.
+#
+# File layout: magic (8 bytes), format version (uint32), reserved (uint32), header length (uint64), header, padding,
+# data section. Array offsets in the header are relative to the data section.
+
+FORMAT_VERSION = 1
+
+BEAMLINE = "beamline"
+WAVEFRONT = "wavefront"
+
+_MAGIC = b"WISE2SNP"
+_PREAMBLE = struct.Struct("<8sIIQ")
+_ALIGNMENT = 64
+
+# objects are rebuilt only from the classes and functions of these packages
+_ALLOWED_PACKAGES = ("wiselib2", "wofrywise2", "wofry", "syned")
+
+# links of the wiselib2 tree, rebuilt from the order of the elements
+_TREE_ATTRIBUTES = ("Parent", "Children")
+
+def save_beamline(file_name, wise_propagation_elements, include_results=False):
+    # the computation results of the elements (S, Field, ...) are saved with include_results
+    excluded_attributes = _TREE_ATTRIBUTES if include_results else _TREE_ATTRIBUTES + ("Results",)
+
+    _save(file_name, BEAMLINE, list(wise_propagation_elements.get_propagation_elements()), excluded_attributes)
+
+def load_beamline(file_name, mmap=True):
+    from wiselib2.Fundation import ComputationResults
+
+    beamline_elements = _load(file_name, BEAMLINE, mmap)
+
+    for beamline_element in beamline_elements:
+        wise_optical_element = beamline_element.get_optical_element().wise_optical_element
+        if not hasattr(wise_optical_element, "Results"): wise_optical_element.Results = ComputationResults()
+
+    wise_propagation_elements = WisePropagationElements()
+    wise_propagation_elements.set_compiled_beamline(WiseCompiledBeamline(beamline_elements))
+
+    return wise_propagation_elements
+
+def save_wavefront(file_name, wise_wavefront):
+    _save(file_name, WAVEFRONT, wise_wavefront.wise_computation_result)
+
+def load_wavefront(file_name, mmap=True):
+    return WiseWavefront(wise_computation_results=_load(file_name, WAVEFRONT, mmap))
+
+def get_snapshot_kind(file_name):
+    with open(file_name, "rb") as file: return _read_header(file)[0]["kind"]
+
+def _save(file_name, kind, content, excluded_attributes=()):
+    arrays = []
+    header = {"version" : FORMAT_VERSION,
+              "kind" : kind,
+              "content" : _encode(content, {}, arrays, excluded_attributes),
+              "arrays" : []}
+
+    offset = 0
+    for array in arrays:
+        header["arrays"].append({"dtype" : array.dtype.str, "shape" : list(array.shape), "offset" : offset})
+        offset += _get_padded_size(array.nbytes)
+
+    header = json.dumps(header).encode("utf-8")
+
+    temporary_file = file_name + "." + str(os.getpid()) + ".tmp"
+
+    with open(temporary_file, "wb") as file:
+        file.write(_PREAMBLE.pack(_MAGIC, FORMAT_VERSION, 0, len(header)))
+        file.write(header)
+        file.write(b"\0"*(_get_padded_size(file.tell()) - file.tell()))
+
+        for array in arrays:
+            file.write(array.tobytes())
+            file.write(b"\0"*(_get_padded_size(array.nbytes) - array.nbytes))
+
+    os.replace(temporary_file, file_name)
+
+def _load(file_name, kind, mmap):
+    with open(file_name, "rb") as file:
+        header, data_offset = _read_header(file)
+
+        if header["kind"] != kind: raise ValueError("Not a " + kind + " snapshot: " + file_name + " (" + header["kind"] + ")")
+
+        if mmap:
+            if os.path.getsize(file_name) > data_offset: data = numpy.memmap(file, dtype=numpy.uint8, mode="c", offset=data_offset)
+            else: data = numpy.zeros(0, dtype=numpy.uint8)
+        else:
+            file.seek(data_offset)
+            data = numpy.frombuffer(bytearray(file.read()), dtype=numpy.uint8)
+
+    arrays = [data[item["offset"] : item["offset"] + _get_nbytes(item)].view(numpy.dtype(item["dtype"])).reshape(item["shape"])
+              for item in header["arrays"]]
+
+    return _decode(header["content"], {}, arrays)
+
+def _read_header(file):
+    preamble = file.read(_PREAMBLE.size)
+    if len(preamble) < _PREAMBLE.size: raise ValueError("Not a WISE snapshot")
+
+    magic, version, _, header_length = _PREAMBLE.unpack(preamble)
+
+    if magic != _MAGIC: raise ValueError("Not a WISE snapshot")
+    if version > FORMAT_VERSION: raise ValueError("Unsupported snapshot version: " + str(version) + " (supported: " + str(FORMAT_VERSION) + ")")
+
+    header = json.loads(file.read(header_length).decode("utf-8"))
+
+    return header, _get_padded_size(_PREAMBLE.size + header_length)
+
+def _get_padded_size(size):
+    return -(-size//_ALIGNMENT)*_ALIGNMENT
+
+def _get_nbytes(item):
+    return numpy.dtype(item["dtype"]).itemsize*int(numpy.prod(item["shape"]))
+
+def _encode(obj, memo, arrays, excluded_attributes):
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    elif isinstance(obj, complex):
+        return {"complex" : [obj.real, obj.imag]}
+    elif isinstance(obj, numpy.generic):
+        return _encode(obj.item(), memo, arrays, excluded_attributes)
+    elif isinstance(obj, numpy.ndarray):
+        if obj.dtype.hasobject: raise ValueError("Arrays of objects cannot be saved")
+
+        arrays.append(numpy.ascontiguousarray(obj, dtype=obj.dtype.newbyteorder("<")))
+
+        return {"array" : len(arrays) - 1}
+    elif isinstance(obj, (type, types.FunctionType, types.BuiltinFunctionType)):
+        # classes (types of the elements) and module functions (e.g. PSD of the roughness) are saved by name
+        return {"global" : _get_global_name(obj)}
+    elif id(obj) in memo:
+        return {"reference" : memo[id(obj)]}
+    elif isinstance(obj, list):
+        return [_encode(item, memo, arrays, excluded_attributes) for item in obj]
+    elif isinstance(obj, tuple):
+        return {"tuple" : [_encode(item, memo, arrays, excluded_attributes) for item in obj]}
+    elif isinstance(obj, dict):
+        return {"dict" : [[_encode(key, memo, arrays, excluded_attributes), _encode(value, memo, arrays, excluded_attributes)] for key, value in obj.items()]}
+    elif hasattr(obj, "__dict__"):
+        # shared objects are saved once, the later occurrences are references to it
+        memo[id(obj)] = len(memo)
+
+        return {"object" : _get_global_name(type(obj)),
+                "id" : memo[id(obj)],
+                "state" : dict([(key, _encode(value, memo, arrays, excluded_attributes))
+                                for key, value in vars(obj).items() if not key in excluded_attributes])}
+    else:
+        raise ValueError("Object cannot be saved: " + repr(type(obj)))
+
+def _decode(value, objects, arrays):
+    if not isinstance(value, (list, dict)):
+        return value
+    elif isinstance(value, list):
+        return [_decode(item, objects, arrays) for item in value]
+    elif "array" in value:
+        return arrays[value["array"]]
+    elif "object" in value:
+        cls = _get_global(value["object"])
+
+        obj = cls.__new__(cls)
+        objects[value["id"]] = obj # before the state, which can refer to it
+
+        for key, item in value["state"].items(): obj.__dict__[key] = _decode(item, objects, arrays)
+
+        return obj
+    elif "reference" in value:
+        return objects[value["reference"]]
+    elif "tuple" in value:
+        return tuple([_decode(item, objects, arrays) for item in value["tuple"]])
+    elif "dict" in value:
+        return dict([(_decode(key, objects, arrays), _decode(item, objects, arrays)) for key, item in value["dict"]])
+    elif "complex" in value:
+        return complex(*value["complex"])
+    elif "global" in value:
+        return _get_global(value["global"])
+    else:
+        raise ValueError("Corrupted snapshot")
+
+def _get_global_name(obj):
+    module = getattr(obj, "__module__", None)
+    qualname = getattr(obj, "__qualname__", "")
+
+    if module is None or "<" in qualname: raise ValueError("Object cannot be saved: " + repr(obj))
+
+    return module + ":" + qualname
+
+def _get_global(name):
+    module_name, qualname = name.split(":")
+
+    if not _is_allowed_module(module_name): raise ValueError("Class not allowed in snapshots: " + name)
+
+    obj = importlib.import_module(module_name)
+    for attribute in qualname.split("."): obj = getattr(obj, attribute)
+
+    # the attributes can lead out of the allowed packages (e.g. a module imported by an allowed one)
+    if not isinstance(obj, (type, types.FunctionType, types.BuiltinFunctionType)) or not _is_allowed_module(getattr(obj, "__module__", None)):
+        raise ValueError("Class not allowed in snapshots: " + name)
+
+    return obj
+
+def _is_allowed_module(module_name):
+    return isinstance(module_name, str) and module_name.split(".")[0] in _ALLOWED_PACKAGES
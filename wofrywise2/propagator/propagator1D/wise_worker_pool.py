@@ -0,0 +1,192 @@
+import atexit
+import multiprocessing
+import multiprocessing.util
+import os
+import threading
+import time
+import traceback
+import weakref
+
+from multiprocessing.connection import wait
+
+# Long-lived worker processes, started on first use and reused by all the propagations. Each worker keeps a state
+# (e.g. the upstream field of an integral): a named value is shipped to the workers only when its fingerprint changes.
+
+_worker_state = {}
+_is_worker_process = False
+
+def get_worker_state(name):
+    return _worker_state[name]
+
+def is_worker_process():
+    return _is_worker_process
+
+def _worker_loop(connection):
+    global _is_worker_process
+    _is_worker_process = True
+
+    while True:
+        try:
+            message = connection.recv()
+        except (EOFError, OSError): # the calling process is gone
+            break
+
+        command = message[0]
+
+        if command == "stop":
+            break
+        elif command == "set_state":
+            _worker_state[message[1]] = message[2]
+        elif command == "remove_state":
+            _worker_state.pop(message[1], None)
+        elif command == "run":
+            try:
+                result = (True, message[1](*message[2]))
+            except Exception as exception:
+                result = (False, exception)
+
+            try:
+                connection.send(result)
+            except Exception: # e.g. an exception that cannot be pickled
+                connection.send((False, RuntimeError(traceback.format_exc())))
+
+    connection.close()
+
+class WiseWorkerPool(object):
+
+    def __init__(self, n_workers=None):
+        self.__n_workers = max(1, int(n_workers or os.cpu_count() or 1))
+        self.__workers = []
+        self.__workers_finalizer = None
+        self.__state_fingerprints = {}
+        self.__busy_time = 0.0
+        self.__lock = threading.RLock()
+
+    def get_n_workers(self):
+        return self.__n_workers
+
+    def is_started(self):
+        return len(self.__workers) > 0
+
+    def start(self):
+        with self.__lock:
+            if self.is_started(): return
+
+            self.__workers = []
+            for _ in range(self.__n_workers):
+                connection, worker_connection = multiprocessing.Pipe()
+
+                process = multiprocessing.Process(target=_worker_loop, args=(worker_connection,), name="WiseWorker")
+                process.start()
+                worker_connection.close()
+
+                self.__workers.append((process, connection))
+
+            # the workers are stopped when the pool is shut down, garbage collected or at exit
+            self.__workers_finalizer = weakref.finalize(self, _stop_workers, self.__workers)
+
+            _started_pools.add(self)
+
+    def update_state(self, name, fingerprint, value):
+        with self.__lock:
+            self.start()
+
+            if not fingerprint is None and self.__state_fingerprints.get(name, None) == fingerprint: return False
+
+            for _, connection in self.__workers: connection.send(("set_state", name, value))
+            self.__state_fingerprints[name] = fingerprint
+
+            return True
+
+    def remove_state(self, name):
+        with self.__lock:
+            if not name in self.__state_fingerprints: return
+
+            for _, connection in self.__workers: connection.send(("remove_state", name))
+            del self.__state_fingerprints[name]
+
+    def has_state(self, name, fingerprint):
+        return self.__state_fingerprints.get(name, None) == fingerprint
+
+    def get_busy_time(self):
+        # seconds spent by the workers on the tasks (transfers included), summed up since the pool was created
+        return self.__busy_time
+
+    def map(self, function, *iterables):
+        # function must be picklable (a module level function): it reads the shipped values with get_worker_state
+        tasks = list(zip(*iterables))
+
+        with self.__lock:
+            self.start()
+
+            results = [None]*len(tasks)
+            errors = []
+
+            idle_connections = [connection for _, connection in self.__workers]
+            running = {}
+            next_task = 0
+
+            try:
+                while next_task < len(tasks) or len(running) > 0:
+                    while next_task < len(tasks) and len(idle_connections) > 0:
+                        connection = idle_connections.pop()
+                        running[connection] = (next_task, time.perf_counter())
+                        connection.send(("run", function, tasks[next_task]))
+                        next_task += 1
+
+                    for connection in wait(list(running.keys())):
+                        try:
+                            success, result = connection.recv()
+                        except EOFError:
+                            raise RuntimeError("A worker process terminated abruptly")
+
+                        task, start_time = running.pop(connection)
+                        self.__busy_time += time.perf_counter() - start_time
+
+                        if success: results[task] = result
+                        else: errors.append(result)
+
+                        idle_connections.append(connection)
+            except BaseException:
+                # e.g. a result that cannot be unpickled, or KeyboardInterrupt: the results of the running tasks
+                # would be taken by the next map, so the workers are stopped (and started again on the next use)
+                if len(running) > 0: self.__shutdown()
+                raise
+
+            if len(errors) > 0: raise errors[0]
+
+            return results
+
+    def shutdown(self):
+        with self.__lock:
+            self.__shutdown()
+
+    def __shutdown(self):
+        if not self.__workers_finalizer is None: self.__workers_finalizer()
+
+        self.__workers = []
+        self.__workers_finalizer = None
+        self.__state_fingerprints = {}
+
+        _started_pools.discard(self)
+
+def _stop_workers(workers):
+    for _, connection in workers:
+        try:
+            connection.send(("stop",))
+            connection.close()
+        except OSError: # the worker is gone
+            pass
+
+    for process, _ in workers:
+        process.join(timeout=5.0)
+        if process.is_alive(): process.terminate()
+
+    del workers[:]
+
+_started_pools = weakref.WeakSet()
+
+# multiprocessing joins the (non daemonic) workers at exit: they are stopped before, since this is registered after it
+@atexit.register
+def _shutdown_started_pools():
+    for worker_pool in list(_started_pools): worker_pool.shutdown()
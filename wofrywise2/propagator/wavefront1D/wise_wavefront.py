@@ -2,31 +2,167 @@ import numpy
 
 from wofry.propagator.wavefront1D.generic_wavefront import GenericWavefront1D, WavefrontDimension
 from wofry.propagator.decorators import WavefrontDecorator
+from wofry.propagator.polarization import Polarization
 
-from wiselib2.Fundation import ComputationResults
+from srxraylib.util.data_structures import ScaledArray
+
+# default of the computation results, built at the first use (wiselib2 is not imported with the module)
+_NEW_COMPUTATION_RESULTS = object()
 
 class WiseWavefront(WavefrontDecorator):
 
+    __propagation_profile = None
+
     def __init__(self,
-                 wise_computation_results=ComputationResults()):
+                 wise_computation_results=_NEW_COMPUTATION_RESULTS):
+        if wise_computation_results is _NEW_COMPUTATION_RESULTS:
+            from wiselib2.Fundation import ComputationResults
+
+            wise_computation_results = ComputationResults()
 
         self.wise_computation_result = wise_computation_results
 
     def get_dimension(self):
         return WavefrontDimension.ONE
 
-    def toGenericWavefront(self):
+    def get_propagation_profile(self):
+        # per element record of the propagation that produced the wavefront (with the "profile" additional parameter)
+        return self.__propagation_profile
+
+    def set_propagation_profile(self, propagation_profile=None):
+        self.__propagation_profile = propagation_profile
+
+    def toGenericWavefront(self, copy=False):
+        # the generic wavefront can be changed in place (e.g. rescale_amplitude): read-only arrays are copied. The
+        # arrays are not rounded, as they are by GenericWavefront1D.initialize_wavefront_from_arrays
         wavelength = self.wise_computation_result.Lambda
-        position = self.wise_computation_result.S
-        electric_field = numpy.real(self.wise_computation_result.Field) + 1j*numpy.imag(self.wise_computation_result.Field)
+        position = _get_array(self.wise_computation_result.S, float, copy or not _is_writeable(self.wise_computation_result.S))
+        electric_field = _get_array(self.wise_computation_result.Field, complex, copy or not _is_writeable(self.wise_computation_result.Field))
 
-        return GenericWavefront1D.initialize_wavefront_from_arrays(x_array=position, y_array=electric_field, wavelength=wavelength)
+        return GenericWavefront1D(wavelength=wavelength, electric_field_array=_get_scaled_array(electric_field, position))
 
     @classmethod
-    def fromGenericWavefront(cls, wavefront):
+    def fromGenericWavefront(cls, wavefront, copy=False):
+        from wiselib2.Fundation import ComputationResults
+
         wise_computation_result = ComputationResults()
         wise_computation_result.Lambda = wavefront.get_wavelength()
-        wise_computation_result.S = wavefront.get_abscissas()
-        wise_computation_result.Field = wavefront.get_complex_amplitude()
+        wise_computation_result.S = _get_array(wavefront.get_abscissas(), float, copy)
+        wise_computation_result.Field = _get_array(wavefront.get_complex_amplitude(), complex, copy)
 
         return WiseWavefront(wise_computation_results=wise_computation_result)
+
+class WiseLazyWavefront(GenericWavefront1D):
+
+    __wise_wavefront = None
+    __electric_field_array = None
+    __derived_quantities = None
+
+    def __init__(self, wise_wavefront=None):
+        # the generic wavefront is materialized at the first access to the electric field array
+        self.reset(WiseWavefront() if wise_wavefront is None else wise_wavefront)
+
+        self._electric_field_array_pi = None
+
+    def reset(self, wise_wavefront):
+        # e.g. a deferred wavefront filled by the computation: the materialized arrays are dropped
+        self.__wise_wavefront = wise_wavefront
+        self.__electric_field_array = None
+        self.__derived_quantities = {}
+
+        self._wavelength = None if wise_wavefront.wise_computation_result is None else wise_wavefront.wise_computation_result.Lambda
+
+    @property
+    def _electric_field_array(self):
+        if self.__electric_field_array is None:
+            self.__electric_field_array = self.__wise_wavefront.toGenericWavefront()._electric_field_array
+            self.__derived_quantities = None
+
+        return self.__electric_field_array
+
+    @_electric_field_array.setter
+    def _electric_field_array(self, electric_field_array):
+        self.__electric_field_array = electric_field_array
+        self.__derived_quantities = None
+
+    def is_materialized(self):
+        return not self.__electric_field_array is None
+
+    def get_wise_wavefront(self):
+        if self.is_materialized():
+            wise_wavefront = WiseWavefront.fromGenericWavefront(self, copy=not can_share_arrays(self))
+            wise_wavefront.set_propagation_profile(self.get_propagation_profile())
+
+            return wise_wavefront
+        else:
+            return self.__wise_wavefront
+
+    def get_propagation_profile(self):
+        return self.__wise_wavefront.get_propagation_profile()
+
+    def get_amplitude(self, polarization=Polarization.SIGMA):
+        if self.is_materialized() or polarization != Polarization.SIGMA:
+            return super(WiseLazyWavefront, self).get_amplitude(polarization=polarization)
+
+        return self.__get_derived_quantity("amplitude", numpy.absolute)
+
+    def get_intensity(self, polarization=Polarization.SIGMA):
+        if self.is_materialized() or not polarization in (Polarization.SIGMA, Polarization.TOTAL):
+            return super(WiseLazyWavefront, self).get_intensity(polarization=polarization)
+
+        return self.__get_derived_quantity("intensity", lambda field: field.real**2 + field.imag**2)
+
+    def get_phase(self, from_minimum_intensity=0.0, unwrap=0, polarization=Polarization.SIGMA):
+        if self.is_materialized() or polarization != Polarization.SIGMA:
+            return super(WiseLazyWavefront, self).get_phase(from_minimum_intensity=from_minimum_intensity, unwrap=unwrap, polarization=polarization)
+
+        phase = self.__get_derived_quantity("phase", numpy.angle)
+
+        if from_minimum_intensity > 0.0:
+            intensity = self.get_intensity()
+            intensity /= intensity.max()
+            phase[numpy.where(intensity < from_minimum_intensity)] = 0.0
+
+        if unwrap: phase = numpy.unwrap(phase)
+
+        return phase
+
+    # derived quantities are cached until the generic wavefront is materialized, copies are returned to the caller
+    def __get_derived_quantity(self, name, function):
+        if not name in self.__derived_quantities:
+            self.__derived_quantities[name] = function(numpy.asarray(self.__wise_wavefront.wise_computation_result.Field))
+
+        return self.__derived_quantities[name].copy()
+
+def can_share_arrays(generic_wavefront):
+    # otherwise fromGenericWavefront requires copy=True (e.g. complex64 fields)
+    return numpy.asarray(generic_wavefront.get_complex_amplitude()).dtype == numpy.dtype(complex) and \
+           numpy.asarray(generic_wavefront.get_abscissas()).dtype == numpy.dtype(float)
+
+# arrays are shared between the WISE and the generic wavefronts, unless a copy is explicitly requested
+def _get_array(array, dtype, copy):
+    if copy: return numpy.array(array, dtype=dtype)
+
+    array = numpy.asarray(array)
+    if array.dtype != numpy.dtype(dtype): raise ValueError("Array of type " + str(array.dtype) + " cannot be shared as " + numpy.dtype(dtype).name + ": use copy=True")
+
+    return array
+
+def _is_writeable(array):
+    return not isinstance(array, numpy.ndarray) or array.flags.writeable
+
+# ScaledArray.__init__ rounds (and so copies) both arrays to 12 decimals: here they are shared as they are, so the
+# generic wavefront has the exact WISE values. The checks of the sizes are the ones of ScaledArray.__init__
+def _get_scaled_array(np_array, scale):
+    if len(np_array) != len(scale): raise Exception("np_array and scale must have the same dimension: (" + str(len(np_array)) + " != " + str(len(scale)))
+    if len(np_array) == 0: raise Exception("np_array can't have 0 size")
+
+    scaled_array = ScaledArray.__new__(ScaledArray)
+    scaled_array.np_array = np_array
+    scaled_array.scale = scale
+    scaled_array.stored_delta = scaled_array._delta()
+    scaled_array.stored_offset = scaled_array._offset()
+    scaled_array.stored_size = scaled_array._size()
+    scaled_array._v_interpolate_values = numpy.vectorize(scaled_array.interpolate_value)
+
+    return scaled_array